@@ -1,13 +1,20 @@
-from flask import Flask, render_template_string, redirect, url_for, request, jsonify
+from flask import Flask, render_template, redirect, url_for, request, jsonify
 import time
 import threading
 import sys
 import os
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 
 # Import shared utilities
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from shared import ControllerConfig, GPIOController, SunsetScheduler
+from shared import (ControllerConfig, GPIOController, SunsetScheduler, JobManager, ActuatorBusy, HubLink,
+                    UdpResponder)
+from shared.controller_link import LINK_PATH
+from shared.actuator import PRIORITY_STOP
+from shared.templating import setup_templates
+from shared.event_stream import EventStream
+from shared.serving import serve
 
 # Load configuration
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'local_config.json')
@@ -28,6 +35,41 @@ RAISE_BLINDS_OFFSET = config_manager.get('schedule.raise_blinds_offset', 0)
 # Channel settings
 DEFAULT_CHANNEL = config_manager.get('default_channel', 0)  # 0 = All Channels, 1-16 = specific channel
 
+# Channel Up/Down press timing used when stepping between channels
+CHANNEL_PRESS_DURATION = config_manager.get('channel_navigation.press_duration', 0.8)
+CHANNEL_PRESS_GAP = config_manager.get('channel_navigation.press_gap', 0.5)
+CHANNEL_WAKE_TIMEOUT = config_manager.get('channel_navigation.wake_timeout', 5.0)
+
+# Remote power monitoring: "auto"/"event" react to power changes as they happen, "poll" re-reads the pin every second
+GPIO_MONITORING_MODE = config_manager.get('gpio_monitoring.mode', 'auto')
+GPIO_RECONCILE_INTERVAL = config_manager.get('gpio_monitoring.reconcile_interval', 60)
+
+# Press sequences waiting for the remote beyond this are refused instead of queued
+ACTUATOR_QUEUE_SIZE = config_manager.get('actuator_queue_size', 8)
+
+# Browsers receiving live state updates over /api/events at the same time
+MAX_LIVE_CLIENTS = config_manager.get('live_updates.max_clients', 20)
+
+# Persistent WebSocket to the hub: status changes are pushed and commands arrive on it (needs websocket-client)
+HUB_LINK_ENABLED = config_manager.get('hub_link.enabled', True)
+HUB_LINK_URL = config_manager.get('hub_link.url', f"ws://{urlparse(HUB_URL).hostname}:5002{LINK_PATH}")
+HUB_LINK_CONTROLLER_URL = config_manager.get('hub_link.controller_url')  # This controller's URL in the hub config
+HUB_LINK_HEARTBEAT = config_manager.get('hub_link.heartbeat', 30)
+HUB_LINK_TOKEN = config_manager.get('hub_link.token', '')  # Must match controller_link.token in hub_config.json
+
+# UDP configuration (compact signed commands and heartbeats from the hub, next to /api/command; off by default)
+UDP_ENABLED = config_manager.get('udp.enabled', False)
+UDP_PORT = config_manager.get('udp.port', 5003)
+UDP_SECRET = config_manager.get('udp.secret', '')  # Must match udp_transport.secret in the hub's hub_config.json
+UDP_MAX_SKEW = config_manager.get('udp.max_skew', 120)  # Oldest packet accepted, in seconds
+
+# HTTP server: "production" (waitress) or "development" (Flask's built-in server)
+SERVER_MODE = config_manager.get('server.mode', 'production')
+SERVER_THREADS = config_manager.get('server.threads', 6)  # On top of one per live page stream
+SERVER_CONNECTION_LIMIT = config_manager.get('server.connection_limit', 100)
+SERVER_CHANNEL_TIMEOUT = config_manager.get('server.channel_timeout', 30)  # Seconds an idle connection stays open
+SERVER_ACCESS_LOG = config_manager.get('server.access_log', True)
+
 # GPIO Pin Configuration
 REMOTE_POWER_PIN = 4
 BUTTON_PINS = {
@@ -40,22 +82,55 @@ BUTTON_PINS = {
 
 # Initialize GPIO Controller
 TEST_MODE = config_manager.get("test_mode", False)
-gpio_controller = GPIOController(REMOTE_POWER_PIN, BUTTON_PINS, TEST_MODE, DEFAULT_CHANNEL)
-sunset_scheduler = SunsetScheduler(WEATHER_API_KEY, LOCATION)
+gpio_controller = GPIOController(REMOTE_POWER_PIN, BUTTON_PINS, TEST_MODE, DEFAULT_CHANNEL, ACTUATOR_QUEUE_SIZE,
+                                 CHANNEL_PRESS_DURATION, CHANNEL_PRESS_GAP, CHANNEL_WAKE_TIMEOUT)
+sunset_scheduler = SunsetScheduler(WEATHER_API_KEY, LOCATION,
+                                   table_dir=os.path.join(os.path.dirname(__file__), 'solar_tables'))
+
+# Async jobs run on the GPIO actuator thread rather than a thread of their own
+def run_job_on_actuator(fn, job):
+    if job.command == 'stop_blinds':
+        gpio_controller.actuator.submit(fn, PRIORITY_STOP, job.command, preempts=True)
+        return
+    
+    # Queued moves are dropped when a Stop arrives before they start
+    future = gpio_controller.actuator.submit(fn, name=job.command,
+                                             preemptible=job.command in ('lower_blinds', 'raise_blinds', 'sweep'))
+    def on_done(future):
+        if future.exception() is not None:
+            job.cancel(str(future.exception()))
+    future.add_done_callback(on_done)
+
+job_manager = JobManager(runner=run_job_on_actuator)  # Background execution of hub commands sent with "async": true
 
 app = Flask(__name__)
+setup_templates(app, ['index.html', 'schedule.html'])  # Compile pages once; static assets cached by browsers
 last_hub_contact = datetime.now()  # Track when we last heard from the hub
 standalone_mode = False  # Start in connected mode
+gpio_controller.state.update(standalone_mode=standalone_mode)  # Versioned with the remote's state for /api/status
+live_events = EventStream("controller", max_clients=MAX_LIVE_CLIENTS)  # Pushes state changes to open pages
+
+# Function to send open pages whatever changed in the remote's state
+def publish_live_state(_controller=None):
+    live_events.publish({
+        'remote_on': gpio_controller.remote_on,
+        'channel_status': gpio_controller.channel_status,
+        'channel_selection_in_progress': gpio_controller.channel_selection_in_progress,
+        'standalone_mode': standalone_mode
+    })
+
+gpio_controller.add_state_listener(publish_live_state)
+publish_live_state()
 
 # Start GPIO monitoring
-gpio_controller.start_monitoring()
+gpio_controller.start_monitoring(mode=GPIO_MONITORING_MODE, reconcile_interval=GPIO_RECONCILE_INTERVAL)
 
 # Convenience functions that delegate to GPIO controller
-def lower_blinds():
-    return gpio_controller.lower_blinds()
+def lower_blinds(progress=None):
+    return gpio_controller.lower_blinds(progress)
 
-def raise_blinds():
-    return gpio_controller.raise_blinds()
+def raise_blinds(progress=None):
+    return gpio_controller.raise_blinds(progress)
 
 def stop_blinds():
     return gpio_controller.stop_blinds()
@@ -68,11 +143,17 @@ def check_hub_connectivity():
     if (datetime.now() - last_hub_contact).total_seconds() > 300:  # 5 minutes
         if not standalone_mode:
             standalone_mode = True
+            gpio_controller.state.update(standalone_mode=True)
             print(f"No contact from hub for 5 minutes. Switching to standalone mode.")
+            publish_live_state()
+            push_status_to_hub()
     else:
         if standalone_mode:
             standalone_mode = False
+            gpio_controller.state.update(standalone_mode=False)
             print(f"Hub contact restored. Switching to connected mode.")
+            publish_live_state()
+            push_status_to_hub()
 
 # Background thread to check hub connectivity
 def monitor_hub_connectivity():
@@ -84,444 +165,166 @@ def monitor_hub_connectivity():
 hub_monitor_thread = threading.Thread(target=monitor_hub_connectivity, daemon=True)
 hub_monitor_thread.start()
 
+# Function to collect the status the hub sees, whether it polls /api/status or gets it over the hub link
+def current_status():
+    version, state = gpio_controller.state.snapshot()
+    return {'location_name': LOCATION_NAME, **state, 'version': version}
+
+# Function to push the current status to the hub (dropped while the link is down; the hub polls then),
+# and its digest over UDP so the hub polls a changed UDP controller at once
+def push_status_to_hub(_controller=None):
+    hub_link.send({'type': 'status', 'status': current_status()})
+    if udp_responder is not None:
+        udp_responder.push_digest()
+
+# Function to note a message from the hub over the link, which counts as hub contact like its HTTP requests
+def note_hub_contact():
+    global last_hub_contact
+    last_hub_contact = datetime.now()
+    if standalone_mode:
+        check_hub_connectivity()
+
+# Function to run a command the hub sent over the link as a job, replying with the job once it has finished
+def run_hub_link_command(message, reply):
+    command = message.get('command')
+    params = message.get('params') or {}
+    error = validate_command(command, params)
+    if error:
+        reply({'success': False, 'error': error})
+        return
+    
+    def finished(job):
+        reply({'success': job.status == 'succeeded', 'error': job.error, 'job_id': job.id, 'job': job.to_dict()})
+    try:
+        job_manager.submit(command, params, lambda progress: run_command(command, params, progress), on_finish=finished)
+    except Exception as e:
+        reply({'success': False, 'error': str(e)})
+
+hub_link = HubLink(HUB_LINK_URL,
+                   lambda: {'type': 'hello', 'token': HUB_LINK_TOKEN, 'url': HUB_LINK_CONTROLLER_URL,
+                            'name': LOCATION_NAME, 'status': current_status()},
+                   run_hub_link_command, note_hub_contact, HUB_LINK_HEARTBEAT)
+
+# Function to start a command the hub sent over UDP as a job; returns an error message to refuse it
+def run_udp_command(command, params, finish):
+    error = validate_command(command, params)
+    if error:
+        return error
+    try:
+        job_manager.submit(command, params, lambda progress: run_command(command, params, progress),
+                           on_finish=lambda job: finish({'success': job.status == 'succeeded', 'error': job.error}))
+    except Exception as e:
+        return str(e)
+    return None
+
+udp_responder = None
+if UDP_ENABLED and UDP_SECRET:
+    udp_responder = UdpResponder(UDP_SECRET, UDP_PORT, run_udp_command, current_status, note_hub_contact,
+                                 max_skew=UDP_MAX_SKEW)
+    udp_responder.start()
+elif UDP_ENABLED:
+    print("udp.secret is not set in local_config.json; UDP commands are disabled")
+
+gpio_controller.add_state_listener(push_status_to_hub)
+if HUB_LINK_ENABLED and not HUB_LINK_TOKEN:
+    print("hub_link.token is not set in local_config.json; the hub will poll this controller")
+elif HUB_LINK_ENABLED and hub_link.available:
+    hub_link.start()
+elif HUB_LINK_ENABLED:
+    print("websocket-client is not installed (pip3 install websocket-client); the hub will poll this controller")
+
 @app.route('/')
 def index():
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{{ location_name }}</title>
-        <style>
-            * {
-                box-sizing: border-box;
-                font-family: Arial, sans-serif;
-            }
-            body {
-                margin: 0;
-                padding: 16px;
-                background-color: #f5f5f5;
-                max-width: 600px;
-                margin: 0 auto;
-            }
-            h1 {
-                text-align: center;
-                color: #333;
-                font-size: 24px;
-                margin-bottom: 20px;
-            }
-            .status-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .control-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .button-group {
-                display: flex;
-                justify-content: space-between;
-                margin-bottom: 15px;
-            }
-            button {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 16px;
-                cursor: pointer;
-                width: 100%;
-                margin: 5px 0;
-                transition: background-color 0.3s;
-            }
-            button:hover {
-                background-color: #45a049;
-            }
-            button:disabled {
-                background-color: #cccccc;
-                cursor: not-allowed;
-                opacity: 0.7;
-            }
-            .power-button {
-                background-color: #f44336;
-            }
-            .power-button:hover {
-                background-color: #d32f2f;
-            }
-            .power-button:disabled {
-                background-color: #ffcccb;
-            }
-            .direction-buttons {
-                display: flex;
-                flex-direction: column;
-                gap: 10px;
-                margin-bottom: 15px;
-            }
-            .direction-buttons .button-row {
-                display: flex;
-                justify-content: space-between;
-                gap: 10px;
-            }
-            .direction-buttons button {
-                flex: 1;
-                margin: 0;
-            }
-            .up-button {
-                background-color: #2196F3;
-            }
-            .up-button:hover {
-                background-color: #1976D2;
-            }
-            .up-button:disabled {
-                background-color: #bbdefb;
-            }
-            .stop-button {
-                background-color: #FF9800;
-            }
-            .stop-button:hover {
-                background-color: #F57C00;
-            }
-            .stop-button:disabled {
-                background-color: #ffe0b2;
-            }
-            .down-button {
-                background-color: #2196F3;
-            }
-            .down-button:hover {
-                background-color: #1976D2;
-            }
-            .down-button:disabled {
-                background-color: #bbdefb;
-            }
-            .pair-button {
-                background-color: #9C27B0;
-            }
-            .pair-button:hover {
-                background-color: #7B1FA2;
-            }
-            .pair-button:disabled {
-                background-color: #E1BEE7;
-            }
-            .channel-form {
-                display: flex;
-                flex-direction: column;
-                gap: 10px;
-            }
-            .channel-form .input-row {
-                display: flex;
-                gap: 10px;
-            }
-            select {
-                flex: 1;
-                padding: 12px;
-                border: 1px solid #ddd;
-                border-radius: 8px;
-                font-size: 16px;
-            }
-            select:disabled {
-                background-color: #f5f5f5;
-                cursor: not-allowed;
-            }
-            .channel-form button {
-                flex: 0 0 80px;
-            }
-            .status-indicator {
-                display: inline-block;
-                width: 12px;
-                height: 12px;
-                border-radius: 50%;
-                margin-right: 8px;
-            }
-            .status-on {
-                background-color: #4CAF50;
-            }
-            .status-off {
-                background-color: #f44336;
-            }
-            .processing-alert {
-                background-color: #fff3cd;
-                color: #856404;
-                border-radius: 8px;
-                padding: 15px;
-                margin: 15px 0;
-                text-align: center;
-                font-weight: bold;
-                border: 1px solid #ffeeba;
-            }
-            .standalone-mode {
-                background-color: #f8d7da;
-                color: #721c24;
-                border-radius: 8px;
-                padding: 15px;
-                margin: 15px 0;
-                text-align: center;
-                font-weight: bold;
-                border: 1px solid #f5c6cb;
-            }
-            /* Advanced dropdown styles */
-            .advanced-dropdown {
-                position: relative;
-                display: inline-block;
-                width: 100%;
-                margin-top: 15px;
-            }
-            .advanced-dropdown-btn {
-                background-color: #673AB7;
-                color: white;
-                width: 100%;
-                text-align: left;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                cursor: pointer;
-                font-size: 16px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            .advanced-dropdown-btn:hover {
-                background-color: #5E35B1;
-            }
-            .advanced-dropdown-btn:after {
-                content: "▼";
-                font-size: 12px;
-                margin-left: 10px;
-            }
-            .advanced-dropdown-btn.active:after {
-                content: "▲";
-            }
-            .advanced-dropdown-content {
-                display: none;
-                background-color: #f9f9f9;
-                border-radius: 8px;
-                padding: 15px;
-                margin-top: 5px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                border: 1px solid #ddd;
-            }
-            .advanced-dropdown-content.show {
-                display: block;
-            }
-        </style>
-        <script>
-            // Function to check if channel selection is complete
-            function checkChannelSelectionStatus() {
-                fetch('/channel_selection_status')
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.in_progress) {
-                            // If still in progress, check again in 1 second
-                            setTimeout(checkChannelSelectionStatus, 1000);
-                        } else {
-                            // If complete, reload the page to update UI
-                            window.location.reload();
-                        }
-                    });
-            }
-
-            // Start checking if we're in channel selection mode
-            {% if channel_selection_in_progress %}
-            document.addEventListener('DOMContentLoaded', function() {
-                setTimeout(checkChannelSelectionStatus, 1000);
-            });
-            {% endif %}
-            
-            // Advanced dropdown toggle function
-            function toggleAdvancedDropdown() {
-                const dropdownContent = document.getElementById("advancedDropdownContent");
-                const dropdownBtn = document.getElementById("advancedDropdownBtn");
-                dropdownContent.classList.toggle("show");
-                dropdownBtn.classList.toggle("active");
-            }
-            
-            // Close dropdown if user clicks outside of it
-            document.addEventListener('click', function(event) {
-                const dropdown = document.getElementById("advancedDropdown");
-                const dropdownBtn = document.getElementById("advancedDropdownBtn");
-                
-                if (!dropdown.contains(event.target) && !dropdownBtn.contains(event.target)) {
-                    const dropdownContent = document.getElementById("advancedDropdownContent");
-                    if (dropdownContent.classList.contains("show")) {
-                        dropdownContent.classList.remove("show");
-                        dropdownBtn.classList.remove("active");
-                    }
-                }
-            });
-        </script>
-    </head>
-    <body>
-        <h1>{{ location_name }}</h1>
-        
-        <div style="margin-bottom: 15px; text-align: center;">
-            <a href="{{ hub_url }}" style="display: inline-block; background-color: #2196F3; color: white; padding: 8px 15px; text-decoration: none; border-radius: 4px; font-size: 14px;">
-                ← Back to Hub
-            </a>
-        </div>
-        
-        {% if standalone_mode %}
-        <div class="standalone-mode">
-            <p>STANDALONE MODE: Hub connection lost. Operating independently.</p>
-        </div>
-        {% endif %}
-        
-        <div class="status-panel">
-            <p>
-                <span class="status-indicator {{ 'status-on' if remote_on else 'status-off' }}"></span>
-                <strong>Remote:</strong> {{ 'ON' if remote_on else 'OFF' }}
-            </p>
-            {% if remote_on %}
-            <p><strong>Channel:</strong> {{ channel_status }}</p>
-            {% endif %}
-        </div>
-        
-        {% if channel_selection_in_progress %}
-        <div class="processing-alert">
-            <p>Channel selection in progress... Please wait.</p>
-        </div>
-        {% endif %}
-        
-        <div class="control-panel">
-            <form action="/toggle_remote" method="post">
-                <button type="submit" class="power-button" {% if channel_selection_in_progress %}disabled{% endif %}>Power {{ 'OFF' if remote_on else 'ON' }}</button>
-            </form>
-            
-            <div style="margin-top: 10px; display: flex; gap: 10px;">
-                <a href="/schedule" style="flex: 1; display: block; text-align: center; background-color: #673AB7; color: white; padding: 12px 20px; text-decoration: none; border-radius: 8px; font-size: 16px;">
-                    View Sunset Schedule
-                </a>
-            </div>
-            
-            {% if remote_on %}
-            <h2>Blind Controls</h2>
-            <div class="direction-buttons">
-                <div class="button-row">
-                    <form action="/press/Up" method="post" style="flex: 1;">
-                        <button type="submit" class="up-button" {% if channel_selection_in_progress %}disabled{% endif %}>Up</button>
-                    </form>
-                </div>
-                <div class="button-row">
-                    <form action="/press/Stop" method="post" style="flex: 1;">
-                        <button type="submit" class="stop-button" {% if channel_selection_in_progress %}disabled{% endif %}>Stop</button>
-                    </form>
-                </div>
-                <div class="button-row">
-                    <form action="/press/Down" method="post" style="flex: 1;">
-                        <button type="submit" class="down-button" {% if channel_selection_in_progress %}disabled{% endif %}>Down</button>
-                    </form>
-                </div>
-            </div>
-            
-            <div id="advancedDropdown" class="advanced-dropdown">
-                <button id="advancedDropdownBtn" type="button" class="advanced-dropdown-btn" onclick="toggleAdvancedDropdown()">
-                    Advanced Options
-                </button>
-                <div id="advancedDropdownContent" class="advanced-dropdown-content">
-                    <h3>Pairing</h3>
-                    <form action="/pair" method="post" style="margin-bottom: 20px;">
-                        <button type="submit" class="pair-button" {% if channel_selection_in_progress %}disabled{% endif %}>Pair</button>
-                    </form>
-                    
-                    <h3>Channel Selection</h3>
-                    <form action="/go_to_all_channels" method="post" style="margin-bottom: 10px;">
-                        <button type="submit" {% if channel_selection_in_progress %}disabled{% endif %}>All Channels</button>
-                    </form>
-                    
-                    <form action="/select_channel" method="post" class="channel-form">
-                        <div class="input-row">
-                            <select name="channel" id="channel" {% if channel_selection_in_progress %}disabled{% endif %}>
-                                {% for i in range(1, 17) %}
-                                    <option value="{{ i }}">Channel {{ i }}</option>
-                                {% endfor %}
-                            </select>
-                            <button type="submit" {% if channel_selection_in_progress %}disabled{% endif %}>Go</button>
-                        </div>
-                    </form>
-                </div>
-            </div>
-            {% endif %}
-        </div>
-    </body>
-    </html>
-    ''', button_names=BUTTON_PINS.keys(), remote_on=gpio_controller.remote_on, channel_status=gpio_controller.channel_status, 
+    return render_template('index.html', button_names=BUTTON_PINS.keys(), remote_on=gpio_controller.remote_on, channel_status=gpio_controller.channel_status, 
         channel_selection_in_progress=gpio_controller.channel_selection_in_progress, location_name=LOCATION_NAME, 
         hub_url=HUB_URL, standalone_mode=standalone_mode)
 
+# Check a button-panel action from the page; returns an error message or None
+def validate_page_action(action, params):
+    if action in ('toggle_remote', 'pair', 'select_all_channels'):
+        return None
+    if action == 'press':
+        return None if params.get('button') in BUTTON_PINS else f"Unknown button: {params.get('button')}"
+    if action == 'select_channel':
+        channel = params.get('channel')
+        return None if isinstance(channel, int) and 1 <= channel <= 16 else 'Invalid channel'
+    return f'Unknown action: {action}'
+
+# Queue a validated button-panel action on the remote without waiting for it; returns why it was refused or None.
+# The page learns the outcome from the live event stream.
+def start_page_action(action, params):
+    # Nothing else may touch the remote while it is stepping through channels
+    if gpio_controller.channel_selection_in_progress:
+        return 'Channel selection in progress'
+    if action in ('press', 'select_channel') and not gpio_controller.remote_on:
+        return 'Remote is off'
+    
+    if action == 'toggle_remote':
+        gpio_controller.actuator.submit(gpio_controller.toggle_remote_power, name='toggle_remote')
+    elif action == 'press':
+        gpio_controller.press_button(params['button'])
+    elif action == 'pair':
+        gpio_controller.pair_remote()
+    elif action == 'select_all_channels':
+        gpio_controller.go_to_all_channels(wait=False)
+    elif action == 'select_channel':
+        gpio_controller.select_channel(params['channel'])
+    return None
+
+@app.route('/api/actions/<action>', methods=['POST'])
+def page_action(action):
+    # JSON version of the page's buttons: answers as soon as the action is queued, with no page render
+    params = request.get_json(silent=True) or {}
+    error = validate_page_action(action, params)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    error = start_page_action(action, params)
+    state = {
+        'remote_on': gpio_controller.remote_on,
+        'channel_status': gpio_controller.channel_status,
+        'channel_selection_in_progress': gpio_controller.channel_selection_in_progress
+    }
+    if error:
+        return jsonify({'success': False, 'error': error, 'state': state}), 409
+    return jsonify({'success': True, 'action': action, 'state': state}), 202
+
 @app.route('/toggle_remote', methods=['POST'])
 def toggle_remote():
-    # Don't allow toggling if channel selection is in progress
-    if gpio_controller.channel_selection_in_progress:
-        return redirect(url_for('index'))
-        
-    gpio_controller.toggle_remote_power()
+    start_page_action('toggle_remote', {})
     return redirect(url_for('index'))
 
 @app.route('/press/<button_name>', methods=['POST'])
 def press_button(button_name):
-    # Don't allow button presses if channel selection is in progress
-    if gpio_controller.channel_selection_in_progress:
-        return redirect(url_for('index'))
-        
-    if gpio_controller.remote_on and button_name in BUTTON_PINS:
-        def press_release():
-            gpio_controller.press_button_action(button_name)
-        threading.Thread(target=press_release).start()
+    if button_name in BUTTON_PINS:
+        start_page_action('press', {'button': button_name})
     return redirect(url_for('index'))
 
 @app.route('/pair', methods=['POST'])
 def pair_button():
-    # Don't allow button presses if channel selection is in progress
-    if gpio_controller.channel_selection_in_progress:
-        return redirect(url_for('index'))
-        
-    gpio_controller.pair_remote()
+    start_page_action('pair', {})
     return redirect(url_for('index'))
 
 @app.route('/channel_selection_status')
 def channel_selection_status():
     return jsonify({'in_progress': gpio_controller.channel_selection_in_progress})
 
+@app.route('/api/events')
+def live_event_stream():
+    # Server-Sent Events: remote power, channel and selection state once, then only what changes
+    return live_events.response()
+
 @app.route('/go_to_all_channels', methods=['POST'])
 def go_to_all_channels():
-    # Don't allow channel selection if already in progress
-    if gpio_controller.channel_selection_in_progress:
-        return redirect(url_for('index'))
-    
-    # Use GPIO controller to handle all channels selection
-    def process_all_channels():
-        gpio_controller.channel_selection_in_progress = True
-        try:
-            gpio_controller.toggle_remote_power()  # Turn off
-            time.sleep(2)
-            gpio_controller.toggle_remote_power()  # Turn on
-            time.sleep(3)
-            gpio_controller.select_all_channels()
-        finally:
-            gpio_controller.channel_selection_in_progress = False
-            print("All channels selection complete")
-    
-    threading.Thread(target=process_all_channels).start()
+    start_page_action('select_all_channels', {})
     return redirect(url_for('index'))
 
 @app.route('/select_channel', methods=['POST'])
 def select_channel():
-    # Don't allow channel selection if not powered on or already in progress
-    if not gpio_controller.remote_on or gpio_controller.channel_selection_in_progress:
-        return redirect(url_for('index'))
-    
     channel = int(request.form.get('channel', 1))
     if channel < 1 or channel > 16:
         channel = 1
-    
-    # Use GPIO controller to handle channel selection
-    gpio_controller.select_channel(channel)
+    start_page_action('select_channel', {'channel': channel})
     return redirect(url_for('index'))
 
 @app.route('/schedule')
@@ -529,128 +332,7 @@ def view_schedule():
     schedule_times = sunset_scheduler.format_schedule_times(
         LOWER_BLINDS_OFFSET, RAISE_BLINDS_OFFSET)
     
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Blind Schedule</title>
-        <style>
-            * {
-                box-sizing: border-box;
-                font-family: Arial, sans-serif;
-            }
-            body {
-                margin: 0;
-                padding: 16px;
-                background-color: #f5f5f5;
-                max-width: 600px;
-                margin: 0 auto;
-            }
-            h1 {
-                text-align: center;
-                color: #333;
-                font-size: 24px;
-                margin-bottom: 20px;
-            }
-            .schedule-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 15px;
-                margin-bottom: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .schedule-item {
-                margin-bottom: 15px;
-                padding-bottom: 15px;
-                border-bottom: 1px solid #eee;
-            }
-            .schedule-item:last-child {
-                border-bottom: none;
-                margin-bottom: 0;
-                padding-bottom: 0;
-            }
-            .time {
-                font-weight: bold;
-                color: #2196F3;
-            }
-            .action-buttons {
-                margin-top: 20px;
-                display: flex;
-                gap: 10px;
-            }
-            .action-buttons a {
-                flex: 1;
-                display: block;
-                background-color: #4CAF50;
-                color: white;
-                text-align: center;
-                padding: 12px 20px;
-                text-decoration: none;
-                border-radius: 8px;
-                font-size: 16px;
-                transition: background-color 0.3s;
-            }
-            .action-buttons a:hover {
-                background-color: #45a049;
-            }
-            .action-buttons .home-button {
-                background-color: #2196F3;
-            }
-            .action-buttons .home-button:hover {
-                background-color: #1976D2;
-            }
-            .standalone-mode {
-                background-color: #f8d7da;
-                color: #721c24;
-                border-radius: 8px;
-                padding: 15px;
-                margin: 15px 0;
-                text-align: center;
-                font-weight: bold;
-                border: 1px solid #f5c6cb;
-            }
-        </style>
-    </head>
-    <body>
-        <h1>{{ location_name }} Blind Schedule</h1>
-        
-        <div style="margin-bottom: 15px; text-align: center;">
-            <a href="{{ hub_url }}" style="display: inline-block; background-color: #2196F3; color: white; padding: 8px 15px; text-decoration: none; border-radius: 4px; font-size: 14px;">
-                ← Back to Hub
-            </a>
-        </div>
-        
-        {% if standalone_mode %}
-        <div class="standalone-mode">
-            <p>STANDALONE MODE: Hub connection lost. Using local schedule settings.</p>
-        </div>
-        {% endif %}
-        
-        <div class="schedule-panel">
-            <div class="schedule-item">
-                <p><strong>Today's Sunset:</strong> <span class="time">{{ sunset_time }}</span></p>
-                {% if timezone %}
-                <small style="color: #666;">Timezone: {{ timezone }}</small>
-                {% endif %}
-            </div>
-            
-            <div class="schedule-item">
-                <p><strong>Lower Blinds:</strong> <span class="time">{{ lower_time }}</span> ({{ lower_offset }} minutes before sunset)</p>
-            </div>
-            
-            <div class="schedule-item">
-                <p><strong>Raise Blinds:</strong> <span class="time">{{ raise_time }}</span> {% if raise_offset == 0 %}(at sunset){% else %}({{ raise_offset }} minutes after sunset){% endif %}</p>
-            </div>
-        </div>
-        
-        <div class="action-buttons">
-            <a href="/" class="home-button">Back to Controls</a>
-        </div>
-    </body>
-    </html>
-    ''', sunset_time=schedule_times['sunset_time'],
+    return render_template('schedule.html', sunset_time=schedule_times['sunset_time'],
         lower_time=schedule_times['lower_time'],
         raise_time=schedule_times['raise_time'],
         lower_offset=schedule_times['lower_offset'],
@@ -658,6 +340,14 @@ def view_schedule():
         timezone=schedule_times.get('timezone'),
         location_name=LOCATION_NAME, hub_url=HUB_URL, standalone_mode=standalone_mode)
 
+@app.errorhandler(ActuatorBusy)
+def actuator_busy(e):
+    # Backpressure: the remote already has a full queue of press sequences
+    print(f"Rejected request to {request.path}: {e}")
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '2'}
+    return redirect(url_for('index'))
+
 @app.route('/cleanup')
 def cleanup():
     gpio_controller.cleanup()
@@ -669,14 +359,90 @@ def get_status():
     global last_hub_contact
     last_hub_contact = datetime.now()  # Update last contact time
     
-    return jsonify({
-        'location_name': LOCATION_NAME,
-        'remote_on': gpio_controller.remote_on,
-        'channel_status': gpio_controller.channel_status,
-        'blinds_lowered': gpio_controller.blinds_lowered,
-        'standalone_mode': standalone_mode,
-        'channel_selection_in_progress': gpio_controller.channel_selection_in_progress
-    })
+    # The hub sends back the version it has: unchanged state is an empty 304, otherwise only what changed
+    version = gpio_controller.state.version
+    since = request.args.get('since')
+    if version in request.if_none_match or since == version:
+        response = app.response_class(status=304)
+    else:
+        version, changes = gpio_controller.state.changes_since(since) if since else (version, None)
+        # A version from before a restart (or none at all) gets the full status
+        body = {'version': version, 'since': since, 'changes': changes} if changes is not None else current_status()
+        version = body['version']
+        response = jsonify(body)
+    response.set_etag(version)
+    return response
+
+@app.route('/api/hub_link', methods=['GET'])
+def hub_link_status():
+    return jsonify({'enabled': HUB_LINK_ENABLED, **hub_link.to_dict()})
+
+@app.route('/api/udp', methods=['GET'])
+def udp_status():
+    if udp_responder is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **udp_responder.to_dict()})
+
+# Check a hub command before running it; returns an error message or None
+def validate_command(command, params):
+    if command in ('raise_blinds', 'lower_blinds', 'stop_blinds', 'toggle_remote', 'select_all_channels',
+                   'resync_channel'):
+        return None
+    
+    if command == 'select_channel':
+        channel = params.get('channel')
+        if channel is None or not isinstance(channel, int) or channel < 1 or channel > 16:
+            return 'Invalid channel'
+        return None
+    
+    if command == 'sweep':
+        channels = params.get('channels')
+        if not isinstance(channels, list) or not channels:
+            return 'Expected a non-empty "channels" list'
+        if any(not isinstance(channel, int) or channel < 1 or channel > 16 for channel in channels):
+            return 'Invalid channel'
+        if params.get('action') not in ('lower_blinds', 'raise_blinds', 'stop_blinds'):
+            return 'Invalid sweep action'
+        return None
+    
+    return f'Unknown command: {command}'
+
+# Run a validated hub command and return its result
+def run_command(command, params, progress=None):
+    if command == 'raise_blinds':
+        return {'success': raise_blinds(progress)}
+    
+    elif command == 'lower_blinds':
+        return {'success': lower_blinds(progress)}
+    
+    elif command == 'stop_blinds':
+        return {'success': stop_blinds()}
+    
+    elif command == 'toggle_remote':
+        gpio_controller.toggle_remote_power()
+        return {'success': True, 'remote_on': gpio_controller.remote_on}
+    
+    elif command == 'select_channel':
+        # Use GPIO controller to handle channel selection
+        gpio_controller.select_channel(params['channel'])
+        return {'success': True}
+    
+    elif command == 'select_all_channels':
+        gpio_controller.go_to_all_channels()
+        return {'success': True}
+    
+    elif command == 'sweep':
+        return gpio_controller.sweep(params['channels'], params['action'], progress)
+    
+    elif command == 'resync_channel':
+        gpio_controller.resync_channel()
+        return {'success': True, 'channel_status': gpio_controller.channel_status}
+
+# Run a validated list of commands as one sequence on the remote
+def run_batch(steps, progress=None):
+    results = gpio_controller.run_batch(steps, progress)
+    success = len(results) == len(steps) and all(result['success'] for result in results)
+    return {'success': success, 'results': results}
 
 @app.route('/api/command', methods=['POST'])
 def execute_command():
@@ -691,36 +457,78 @@ def execute_command():
     params = request.json.get('params', {})
     print(f"DEBUG: Received command: {command}")
     
-    if command == 'raise_blinds':
-        success = raise_blinds()
-        return jsonify({'success': success})
+    error = validate_command(command, params)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
     
-    elif command == 'lower_blinds':
-        print(f"DEBUG: Executing lower_blinds command")
-        success = lower_blinds()
-        print(f"DEBUG: lower_blinds returned: {success}")
-        return jsonify({'success': success})
+    # Async mode: accept the command now and let the hub collect the result from /api/jobs/<id>
+    if request.json.get('async'):
+        job = job_manager.submit(command, params, lambda progress: run_command(command, params, progress))
+        status_url = url_for('get_job', job_id=job.id)
+        return jsonify({'success': True, 'job_id': job.id, 'status_url': status_url}), 202, {'Location': status_url}
     
-    elif command == 'stop_blinds':
-        success = stop_blinds()
-        return jsonify({'success': success})
+    return jsonify(run_command(command, params))
+
+@app.route('/api/batch', methods=['POST'])
+def execute_batch():
+    global last_hub_contact
+    last_hub_contact = datetime.now()  # Update last contact time
     
-    elif command == 'toggle_remote':
-        gpio_controller.toggle_remote_power()
-        return jsonify({'success': True, 'remote_on': gpio_controller.remote_on})
+    if not request.json or not isinstance(request.json.get('commands'), list) or not request.json['commands']:
+        return jsonify({'success': False, 'error': 'Expected a non-empty "commands" list'}), 400
     
-    elif command == 'select_channel':
-        channel = params.get('channel')
-        if channel is None or not isinstance(channel, int) or channel < 1 or channel > 16:
-            return jsonify({'success': False, 'error': 'Invalid channel'}), 400
-        
-        # Use GPIO controller to handle channel selection
-        gpio_controller.select_channel(channel)
-        return jsonify({'success': True})
+    steps = []
+    for index, step in enumerate(request.json['commands']):
+        if not isinstance(step, dict):
+            return jsonify({'success': False, 'error': f'Step {index + 1}: invalid format'}), 400
+        command = step.get('command')
+        params = step.get('params') or {}
+        error = validate_command(command, params)
+        if error:
+            return jsonify({'success': False, 'error': f'Step {index + 1}: {error}'}), 400
+        steps.append({'command': command, 'params': params})
     
-    else:
-        return jsonify({'success': False, 'error': f'Unknown command: {command}'}), 400
+    if request.json.get('async'):
+        job = job_manager.submit('batch', {'commands': steps}, lambda progress: run_batch(steps, progress))
+        status_url = url_for('get_job', job_id=job.id)
+        return jsonify({'success': True, 'job_id': job.id, 'status_url': status_url}), 202, {'Location': status_url}
+    
+    return jsonify(run_batch(steps))
+
+@app.route('/api/sweep', methods=['POST'])
+def execute_sweep():
+    global last_hub_contact
+    last_hub_contact = datetime.now()  # Update last contact time
+    
+    if not request.json:
+        return jsonify({'success': False, 'error': 'Invalid request format'}), 400
+    
+    params = {'channels': request.json.get('channels'), 'action': request.json.get('action')}
+    error = validate_command('sweep', params)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    if request.json.get('async'):
+        job = job_manager.submit('sweep', params, lambda progress: run_command('sweep', params, progress))
+        status_url = url_for('get_job', job_id=job.id)
+        return jsonify({'success': True, 'job_id': job.id, 'status_url': status_url}), 202, {'Location': status_url}
+    
+    return jsonify(run_command('sweep', params))
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify([job.to_dict() for job in job_manager.recent()])
 
 if __name__ == '__main__':
     print(f"Running Blind Controller for {LOCATION_NAME}")
-    app.run(host='0.0.0.0', port=5000)
+    # Keep-alive lets the hub reuse its connection to this controller between polls
+    serve(app, '0.0.0.0', 5000, SERVER_MODE, threads=SERVER_THREADS + MAX_LIVE_CLIENTS,
+          connection_limit=SERVER_CONNECTION_LIMIT, channel_timeout=SERVER_CHANNEL_TIMEOUT,
+          access_log=SERVER_ACCESS_LOG, name="controller")
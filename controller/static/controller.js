@@ -0,0 +1,180 @@
+// Function to check if channel selection is complete (only used by browsers without EventSource)
+function checkChannelSelectionStatus() {
+    fetch('/channel_selection_status')
+        .then(response => response.json())
+        .then(data => {
+            if (data.in_progress) {
+                // If still in progress, check again in 1 second
+                setTimeout(checkChannelSelectionStatus, 1000);
+            } else {
+                // If complete, reload the page to update UI
+                window.location.reload();
+            }
+        });
+}
+
+// Apply a JSON merge patch from the live update stream to our copy of the state
+function applyMergePatch(target, patch) {
+    for (const key of Object.keys(patch)) {
+        if (patch[key] === null) {
+            delete target[key];
+        } else {
+            target[key] = patch[key];
+        }
+    }
+    return target;
+}
+
+let liveState = {};
+let optimisticState = {};  // What we expect after an action we sent, until the controller confirms it
+let liveConnected = false;
+
+function renderLiveState() {
+    const state = Object.assign({}, liveState, optimisticState);
+    const remoteOn = !!state.remote_on;
+    const busy = !!state.channel_selection_in_progress;
+    
+    document.getElementById('standaloneBanner').hidden = !state.standalone_mode;
+    document.getElementById('remoteIndicator').className = 'status-indicator ' + (remoteOn ? 'status-on' : 'status-off');
+    document.getElementById('remoteState').textContent = remoteOn ? 'ON' : 'OFF';
+    document.getElementById('channelRow').hidden = !remoteOn;
+    document.getElementById('channelStatus').textContent = state.channel_status || '';
+    document.getElementById('selectionAlert').hidden = !busy;
+    document.getElementById('powerButton').textContent = 'Power ' + (remoteOn ? 'OFF' : 'ON');
+    document.getElementById('remoteControls').hidden = !remoteOn;
+    document.body.dataset.selectionInProgress = busy ? 'true' : 'false';
+    
+    // Every control is locked while the remote is stepping through channels
+    document.querySelectorAll('.control-panel form button, .control-panel form select').forEach(function(control) {
+        control.disabled = busy;
+    });
+}
+
+// Live updates: the controller streams its state and then only what changes, instead of us polling and reloading
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.EventSource) {
+        if (document.body.dataset.selectionInProgress === 'true') {
+            setTimeout(checkChannelSelectionStatus, 1000);
+        }
+        return;
+    }
+    const source = new EventSource('/api/events');
+    source.addEventListener('state', function(event) {
+        liveState = JSON.parse(event.data);
+        optimisticState = {};
+        liveConnected = true;
+        renderLiveState();
+    });
+    source.addEventListener('patch', function(event) {
+        const patch = JSON.parse(event.data);
+        liveState = applyMergePatch(liveState, patch);
+        // The controller has now reported these fields itself
+        Object.keys(patch).forEach(function(key) { delete optimisticState[key]; });
+        renderLiveState();
+    });
+    source.onerror = function() {
+        if (source.readyState !== EventSource.CLOSED) {
+            return;  // The browser reconnects by itself
+        }
+        // The controller refused the stream (too many live pages); fall back to forms and polling
+        liveConnected = false;
+        if (document.body.dataset.selectionInProgress === 'true') {
+            setTimeout(checkChannelSelectionStatus, 1000);
+        }
+    };
+});
+
+function showActionError(message) {
+    const banner = document.getElementById('actionError');
+    banner.textContent = message;
+    banner.hidden = false;
+    clearTimeout(showActionError.timer);
+    showActionError.timer = setTimeout(function() { banner.hidden = true; }, 4000);
+}
+
+// What the page should show straight away for an action, before the controller reports back
+function expectedState(action) {
+    const state = Object.assign({}, liveState, optimisticState);
+    if (action === 'toggle_remote') {
+        return {remote_on: !state.remote_on};
+    }
+    if (action === 'select_channel' || action === 'select_all_channels') {
+        return {channel_selection_in_progress: true};
+    }
+    return {};
+}
+
+// Send a button's action as JSON and update the page right away; the live stream confirms or corrects it
+function sendAction(form, button) {
+    const action = form.dataset.action;
+    const params = {};
+    if (form.dataset.button) {
+        params.button = form.dataset.button;
+    }
+    if (action === 'select_channel') {
+        params.channel = parseInt(form.querySelector('select[name="channel"]').value, 10);
+    }
+    
+    const expected = expectedState(action);
+    Object.assign(optimisticState, expected);
+    renderLiveState();
+    if (button) {
+        button.classList.add('pressed');
+        setTimeout(function() { button.classList.remove('pressed'); }, 200);
+    }
+    
+    // Don't keep showing a guess the controller never confirmed
+    setTimeout(function() {
+        Object.keys(expected).forEach(function(key) { delete optimisticState[key]; });
+        renderLiveState();
+    }, 10000);
+    
+    fetch('/api/actions/' + action, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(params)
+    })
+        .then(response => response.json().then(data => ({ok: response.ok, data: data})))
+        .then(result => {
+            if (!result.ok) {
+                throw new Error(result.data.error || 'Action failed');
+            }
+        })
+        .catch(error => {
+            Object.keys(expected).forEach(function(key) { delete optimisticState[key]; });
+            renderLiveState();
+            showActionError(error.message);
+        });
+}
+
+// Button forms are sent with fetch when the live stream is up; otherwise they post and reload as before
+document.addEventListener('submit', function(event) {
+    const form = event.target;
+    if (!form.dataset.action || !liveConnected || !window.fetch) {
+        return;
+    }
+    event.preventDefault();
+    sendAction(form, event.submitter || form.querySelector('button'));
+});
+
+// Advanced dropdown toggle function
+function toggleAdvancedDropdown() {
+    const dropdownContent = document.getElementById("advancedDropdownContent");
+    const dropdownBtn = document.getElementById("advancedDropdownBtn");
+    dropdownContent.classList.toggle("show");
+    dropdownBtn.classList.toggle("active");
+}
+
+// Close dropdown if user clicks outside of it
+document.addEventListener('click', function(event) {
+    const dropdown = document.getElementById("advancedDropdown");
+    const dropdownBtn = document.getElementById("advancedDropdownBtn");
+    
+    if (!dropdown.contains(event.target) && !dropdownBtn.contains(event.target)) {
+        const dropdownContent = document.getElementById("advancedDropdownContent");
+        if (dropdownContent.classList.contains("show")) {
+            dropdownContent.classList.remove("show");
+            dropdownBtn.classList.remove("active");
+        }
+    }
+});
@@ -1,19 +1,36 @@
-from flask import Flask, render_template_string, redirect, url_for, request, jsonify
+from flask import Flask, render_template, redirect, url_for, request, jsonify
 import os
 import json
 import requests
 import time
 import threading
-import schedule
-from datetime import datetime, timedelta
-from astral import Location
+import sys
+from datetime import datetime, timedelta, time as dt_time
+from urllib.parse import urlparse
 from zoneinfo import ZoneInfo
 
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None  # Without flask-sock controllers are only polled
+
+# Import shared utilities
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared import (FanOut, WeatherClient, SolarCalendar, TimerEngine, SchedulePlan, PollCadence, PollSchedule,
+                    LinkRegistry, UdpTransport, ControllerHealth, RetryBudget, get_client, prune_clients)
+from shared.controller_link import LINK_PATH
+from shared.udp_link import encode_command
+from shared.templating import FragmentCache, setup_templates
+from shared.snapshot import SnapshotPublisher
+from shared.event_stream import EventStream
+from shared.serving import serve, serve_websockets
+
 app = Flask(__name__)
 
 # Configuration file path
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.json')
 HUB_CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'hub_config.json')
+SOLAR_TABLE_DIR = os.path.join(os.path.dirname(__file__), 'solar_tables')  # Precomputed sunrise/sunset tables
 
 # Load blind controllers configuration
 def load_config():
@@ -52,6 +69,80 @@ def load_hub_config():
                 "enabled": False,
                 "lower_time": "14:00",  # 2:00 PM
                 "raise_time": "18:00"   # 6:00 PM
+            },
+            "fanout": {
+                "max_workers": 8,        # Controllers commanded at the same time
+                "command_deadline": 20,  # Seconds each controller gets to finish a command
+                "async_commands": True   # Submit commands as controller jobs instead of holding a request open
+            },
+            "weather_forecast": {
+                "enabled": True,         # Plan cloud decisions from the hourly forecast instead of polling
+                "refresh_times": ["05:00", "13:00"],  # Local times the forecast is fetched
+                "lead_time": 10,         # Minutes ahead of a forecast change that the blinds move
+                "correction_interval": 60  # Minutes between current-conditions checks in the monitoring window
+            },
+            "controller_health": {
+                "failure_threshold": 3,  # Consecutive failed calls that open a controller's circuit
+                "open_delay": 15,        # Seconds a circuit first stays open; doubles after each failed trial
+                "max_open_delay": 300,   # Longest a circuit stays open before a trial call
+                "max_retries": 2,        # Retries of a call the controller never answered
+                "retry_delay": 0.2,      # Seconds before the first retry; doubles for each further one
+                "retry_budget_ratio": 0.1,  # Retries allowed per first attempt, across all controllers
+                "retry_budget_reserve": 10  # Retries that may happen in a burst
+            },
+            "controller_link": {
+                "enabled": True,         # Accept WebSocket links from controllers (needs flask-sock)
+                "token": "",             # Shared token controllers send in their hello; no links until it is set
+                "port": 5002,            # Port of the WebSocket listener
+                "heartbeat": 30          # Seconds of silence before a controller sends a heartbeat
+            },
+            "udp_transport": {
+                "secret": "",            # Shared secret signing every packet; UDP is off until it is set
+                "port": 5003,            # Controllers' UDP port, unless a controller entry sets "udp_port"
+                "retransmit": 0.25,      # Seconds before the first retransmission; doubles for each further one
+                "max_retransmits": 4,    # Retransmissions of an unanswered packet
+                "max_skew": 120          # Oldest packet accepted, in seconds (hub and controller clocks must agree)
+            },
+            "weather_cadence": {
+                "enabled": True,         # Poll faster near the cloud threshold and slower far from it
+                "floor": 5,              # Shortest minutes between checks
+                "ceiling": 30,           # Longest minutes between checks (correction_interval in forecast mode)
+                "far_band": 30,          # Cloud cover points from the threshold at which checks reach the ceiling
+                "warmup": 5              # Minutes before the monitoring window of the one check outside it
+            },
+            "templates": {
+                "fragment_cache": True   # Reuse the rendered admin panel until the configuration changes
+            },
+            "schedule_plan": {
+                "days": 7                # Days of lower/raise times planned ahead
+            },
+            "dashboard": {
+                "refresh_interval": 60,  # Seconds between background rebuilds of the dashboard snapshot
+                "max_live_clients": 50   # Browsers receiving live updates at the same time
+            },
+            "weather_cache": {
+                "ttl": 300,              # Seconds cloud cover is served without asking the weather API
+                "max_stale": 3600,       # Oldest cloud cover pages may show while a refresh runs
+                "request_timeout": 5     # Seconds per weather API request
+            },
+            "server": {
+                "mode": "production",    # "production" (waitress) or "development" (Flask's built-in server)
+                "threads": 16,           # Request threads, on top of one per live dashboard stream
+                "connection_limit": 200, # Open connections accepted at once
+                "channel_timeout": 30,   # Seconds an idle keep-alive or stalled connection stays open
+                "access_log": True       # Print one line per request
+            },
+            "status_poller": {
+                "max_workers": 32,       # Controllers polled at the same time
+                "request_timeout": 5,    # Seconds per status request
+                "sweep_deadline": 10,    # Seconds for a whole status sweep
+                "interval": 60,          # Seconds between polls of a controller whose status changed lately
+                "fast_interval": 5,      # Seconds between polls after a command or while a channel is being selected
+                "idle_interval": 180,    # Seconds between polls of a controller whose status hasn't changed lately
+                "offline_interval": 300, # Seconds between polls of a controller that didn't answer
+                "idle_after": 600,       # Seconds without a status change before a controller counts as idle
+                "busy_window": 60,       # Seconds of fast polling after a command
+                "jitter": 0.2            # Fraction each interval is randomly stretched or shortened by
             }
         }
         # Save default configuration
@@ -63,11 +154,14 @@ def load_hub_config():
 def save_config(config):
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
+    fragment_cache.invalidate()
+    refresh_dashboard()
 
 # Save hub configuration
 def save_hub_config(config):
     with open(HUB_CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
+    fragment_cache.invalidate()
 
 # Load configurations
 config = load_config()
@@ -86,10 +180,117 @@ TEST_MODE_ENABLED = hub_config.get('test_mode', {}).get('enabled', False)
 TEST_LOWER_TIME = hub_config.get('test_mode', {}).get('lower_time', '14:00')
 TEST_RAISE_TIME = hub_config.get('test_mode', {}).get('raise_time', '18:00')
 
+# Fan-out configuration (hub-wide commands run against controllers concurrently)
+FANOUT_MAX_WORKERS = hub_config.get('fanout', {}).get('max_workers', 8)
+COMMAND_DEADLINE = hub_config.get('fanout', {}).get('command_deadline', 20)  # Seconds per controller
+ASYNC_COMMANDS = hub_config.get('fanout', {}).get('async_commands', True)  # Use controller job IDs
+
+# Weather cache configuration (all cloud cover reads share one cached API response)
+WEATHER_CACHE_TTL = hub_config.get('weather_cache', {}).get('ttl', 300)
+WEATHER_MAX_STALE = hub_config.get('weather_cache', {}).get('max_stale', 3600)
+WEATHER_REQUEST_TIMEOUT = hub_config.get('weather_cache', {}).get('request_timeout', 5)
+
+# Forecast mode (cloud decisions are planned from the hourly forecast; current conditions only correct it)
+FORECAST_ENABLED = hub_config.get('weather_forecast', {}).get('enabled', True)
+FORECAST_REFRESH_TIMES = hub_config.get('weather_forecast', {}).get('refresh_times', ['05:00', '13:00'])
+FORECAST_LEAD_TIME = hub_config.get('weather_forecast', {}).get('lead_time', 10)
+FORECAST_CORRECTION_INTERVAL = hub_config.get('weather_forecast', {}).get('correction_interval', 60)
+
+# Adaptive cloud monitor cadence (checks between floor and ceiling minutes apart, none outside the window but a warm-up)
+CADENCE_ENABLED = hub_config.get('weather_cadence', {}).get('enabled', True)
+CADENCE_FLOOR = hub_config.get('weather_cadence', {}).get('floor', 5)
+CADENCE_CEILING = hub_config.get('weather_cadence', {}).get('ceiling', 30)
+CADENCE_FAR_BAND = hub_config.get('weather_cadence', {}).get('far_band', 30)
+CADENCE_WARMUP = hub_config.get('weather_cadence', {}).get('warmup', 5)
+
+# Page rendering: templates are compiled once at startup, config-only fragments are cached
+FRAGMENT_CACHE_ENABLED = hub_config.get('templates', {}).get('fragment_cache', True)
+
+# Schedule plan configuration (lower/raise times are planned this many days ahead)
+SCHEDULE_PLAN_DAYS = hub_config.get('schedule_plan', {}).get('days', 7)
+
+# Dashboard snapshot configuration (the page is rebuilt in the background and served as-is to every viewer)
+DASHBOARD_REFRESH_INTERVAL = hub_config.get('dashboard', {}).get('refresh_interval', 60)
+DASHBOARD_MAX_LIVE_CLIENTS = hub_config.get('dashboard', {}).get('max_live_clients', 50)
+
+# HTTP server configuration
+SERVER_MODE = hub_config.get('server', {}).get('mode', 'production')
+SERVER_THREADS = hub_config.get('server', {}).get('threads', 16)
+SERVER_CONNECTION_LIMIT = hub_config.get('server', {}).get('connection_limit', 200)
+SERVER_CHANNEL_TIMEOUT = hub_config.get('server', {}).get('channel_timeout', 30)
+SERVER_ACCESS_LOG = hub_config.get('server', {}).get('access_log', True)
+
+# Controller health (circuit breaker per controller, retries limited by one budget shared by all controllers)
+HEALTH_FAILURE_THRESHOLD = hub_config.get('controller_health', {}).get('failure_threshold', 3)
+HEALTH_OPEN_DELAY = hub_config.get('controller_health', {}).get('open_delay', 15)
+HEALTH_MAX_OPEN_DELAY = hub_config.get('controller_health', {}).get('max_open_delay', 300)
+HEALTH_MAX_RETRIES = hub_config.get('controller_health', {}).get('max_retries', 2)
+HEALTH_RETRY_DELAY = hub_config.get('controller_health', {}).get('retry_delay', 0.2)
+HEALTH_RETRY_BUDGET_RATIO = hub_config.get('controller_health', {}).get('retry_budget_ratio', 0.1)
+HEALTH_RETRY_BUDGET_RESERVE = hub_config.get('controller_health', {}).get('retry_budget_reserve', 10)
+
+# Controller link configuration (controllers keep a WebSocket open to the hub; linked ones aren't polled)
+CONTROLLER_LINK_TOKEN = hub_config.get('controller_link', {}).get('token', '')
+CONTROLLER_LINK_ENABLED = (hub_config.get('controller_link', {}).get('enabled', True) and Sock is not None
+                           and bool(CONTROLLER_LINK_TOKEN))
+CONTROLLER_LINK_PORT = hub_config.get('controller_link', {}).get('port', 5002)
+CONTROLLER_LINK_HEARTBEAT = hub_config.get('controller_link', {}).get('heartbeat', 30)
+
+# UDP transport configuration (controllers with "transport": "udp" in config.json get compact signed commands
+# and heartbeats instead of HTTP requests)
+UDP_SECRET = hub_config.get('udp_transport', {}).get('secret', '')
+UDP_PORT = hub_config.get('udp_transport', {}).get('port', 5003)
+UDP_RETRANSMIT = hub_config.get('udp_transport', {}).get('retransmit', 0.25)
+UDP_MAX_RETRANSMITS = hub_config.get('udp_transport', {}).get('max_retransmits', 4)
+UDP_MAX_SKEW = hub_config.get('udp_transport', {}).get('max_skew', 120)
+
+# Status poller configuration (each controller has its own interval; those due are polled concurrently
+# within one sweep deadline)
+STATUS_POLL_WORKERS = hub_config.get('status_poller', {}).get('max_workers', 32)
+STATUS_REQUEST_TIMEOUT = hub_config.get('status_poller', {}).get('request_timeout', 5)
+STATUS_SWEEP_DEADLINE = hub_config.get('status_poller', {}).get('sweep_deadline', 10)
+STATUS_SWEEP_INTERVAL = hub_config.get('status_poller', {}).get('interval', 60)
+STATUS_FAST_INTERVAL = hub_config.get('status_poller', {}).get('fast_interval', 5)
+STATUS_IDLE_INTERVAL = hub_config.get('status_poller', {}).get('idle_interval', 180)
+STATUS_OFFLINE_INTERVAL = hub_config.get('status_poller', {}).get('offline_interval', 300)
+STATUS_IDLE_AFTER = hub_config.get('status_poller', {}).get('idle_after', 600)
+STATUS_BUSY_WINDOW = hub_config.get('status_poller', {}).get('busy_window', 60)
+STATUS_POLL_JITTER = hub_config.get('status_poller', {}).get('jitter', 0.2)
+
 # Global variables for tracking state
 controller_status = {}  # Store status of each controller
 blinds_lowered = False  # Track if blinds are currently lowered
 location_details_cache = None  # Cache for location data retrieved from weather API
+solar_calendar = None  # Yearly sun tables for the location in location_details_cache
+last_fanout_results = {}  # Most recent fan-out result per command
+command_fanout = FanOut(FANOUT_MAX_WORKERS, COMMAND_DEADLINE)
+status_fanout = FanOut(STATUS_POLL_WORKERS, STATUS_REQUEST_TIMEOUT)
+last_status_sweep = {}  # Timing and missed controllers of the most recent status sweep
+poll_schedule = PollSchedule(STATUS_FAST_INTERVAL, STATUS_SWEEP_INTERVAL, STATUS_IDLE_INTERVAL, STATUS_OFFLINE_INTERVAL,
+                             STATUS_IDLE_AFTER, STATUS_BUSY_WINDOW, STATUS_POLL_JITTER)  # When each controller is due
+status_poll_wakeup = threading.Event()  # Set to poll due controllers before the status updater's wait is over
+forecast_stats = {'planned_changes': 0, 'applied_changes': 0, 'confirmed': 0, 'corrections': 0}  # Forecast mode outcomes
+monitor_cadence = PollCadence(CADENCE_FLOOR, CADENCE_CEILING, CLOUD_THRESHOLD, MONITORING_INTERVAL,
+                              CADENCE_FAR_BAND)  # Limits are set again by schedule_cloud_monitor()
+fragment_cache = FragmentCache(FRAGMENT_CACHE_ENABLED)  # Rendered admin panel, reset when config is saved
+dashboard = SnapshotPublisher(lambda: build_dashboard(), name="dashboard")  # Page served to every viewer
+dashboard_events = EventStream("dashboard", max_clients=DASHBOARD_MAX_LIVE_CLIENTS)  # Live changes to open pages
+setup_templates(app, ['index.html', 'admin_panel.html'])
+schedule_plan = SchedulePlan(SCHEDULE_PLAN_DAYS)  # Lower/raise times for the coming days
+timer = TimerEngine()  # Fires scheduled blind actions and the cloud cover monitor at exact deadlines
+controller_health = ControllerHealth(HEALTH_FAILURE_THRESHOLD, HEALTH_OPEN_DELAY, HEALTH_MAX_OPEN_DELAY,
+                                     HEALTH_MAX_RETRIES, HEALTH_RETRY_DELAY,
+                                     RetryBudget(HEALTH_RETRY_BUDGET_RATIO, HEALTH_RETRY_BUDGET_RESERVE))
+controller_links = LinkRegistry(lambda hello, remote_addr: identify_controller(hello, remote_addr),
+                                lambda url, status: on_controller_status(url, status),
+                                lambda url: on_controller_link_closed(url),
+                                CONTROLLER_LINK_HEARTBEAT,
+                                CONTROLLER_LINK_TOKEN)  # WebSockets controllers keep open to the hub
+udp_transport = UdpTransport(UDP_SECRET, UDP_RETRANSMIT, UDP_MAX_RETRANSMITS, UDP_MAX_SKEW,
+                             lambda url, digest: on_controller_digest(url, digest)) if UDP_SECRET else None
+udp_unchanged_polls = 0  # Polls a UDP heartbeat answered without an HTTP request (the status version hadn't moved)
+weather_client = WeatherClient(WEATHER_API_KEY, LOCATION, CLOUD_THRESHOLD,
+                               WEATHER_CACHE_TTL, WEATHER_MAX_STALE, WEATHER_REQUEST_TIMEOUT)
 
 # Function to get location coordinates and timezone based on configured LOCATION
 def get_location_details():
@@ -130,793 +331,622 @@ def get_location_details():
 
     return location_details_cache
 
+# Function to get the solar tables for the configured location (computed once per location and year)
+def get_solar_calendar():
+    global solar_calendar
+    location_details = get_location_details()
+    
+    if (solar_calendar is None
+            or (solar_calendar.latitude, solar_calendar.longitude, solar_calendar.tz_name)
+            != (round(location_details['latitude'], 4), round(location_details['longitude'], 4),
+                location_details['timezone'])):
+        calendar = SolarCalendar(location_details['latitude'], location_details['longitude'],
+                                 location_details['timezone'], SOLAR_TABLE_DIR)
+        calendar.prepare()
+        solar_calendar = calendar
+    return solar_calendar
+
 # Function to get sunset time for the current day
 def get_sunset_time():
-    location_details = get_location_details()
+    return get_solar_calendar().sunset()
 
-    # Initialize Astral Location with actual coordinates/timezone
-    location = Location()
-    location.name = "Configured Location"
-    location.region = str(LOCATION)
-    location.latitude = location_details['latitude']
-    location.longitude = location_details['longitude']
-    location.timezone = location_details['timezone']
-    location.elevation = 0
-
-    # Calculate today's sunset time using the configured timezone
-    location_now = datetime.now(ZoneInfo(location.timezone))
-    sun_info = location.sun(date=location_now, local=True)
-    sunset = sun_info['sunset']
-
-    print(f"Today's sunset time ({location.timezone}): {sunset.strftime('%H:%M:%S')}")
-    return sunset
-
-# Function to get current cloud cover percentage
-def get_cloud_cover():
-    try:
-        url = f"http://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={LOCATION}&aqi=no"
-        response = requests.get(url)
-        data = response.json()
-        
-        # Get cloud cover percentage (0-100)
-        cloud_cover = data['current']['cloud']
-        
-        # Also get condition text for logging
-        condition = data['current']['condition']['text']
-        
-        print(f"Current conditions: {condition}, Cloud cover: {cloud_cover}%")
-        return cloud_cover, condition
-    except Exception as e:
-        print(f"Error checking weather: {e}")
-        return None, None
+# Function to get current cloud cover percentage (from the weather cache; max_age limits how stale it may be)
+def get_cloud_cover(max_age=None):
+    return weather_client.get_cloud_cover(max_age)
 
 # Function to determine if it's overcast
-def is_overcast():
-    cloud_cover, _ = get_cloud_cover()
-    if cloud_cover is not None:
-        return cloud_cover >= CLOUD_THRESHOLD
-    return False
+def is_overcast(max_age=None):
+    return weather_client.is_overcast(max_age)
+
+# Function to decide if the sky is (about to be) overcast: in forecast mode the forecast FORECAST_LEAD_TIME
+# minutes ahead, otherwise (or without a forecast) the current conditions
+def sky_overcast():
+    if FORECAST_ENABLED:
+        ahead = datetime.now().astimezone() + timedelta(minutes=FORECAST_LEAD_TIME)
+        cloud_cover, _ = weather_client.forecast_cloud_cover(ahead)
+        if cloud_cover is not None:
+            return cloud_cover >= CLOUD_THRESHOLD
+    # Blind decisions never use conditions older than the cache TTL, unlike the dashboard
+    return is_overcast(max_age=WEATHER_CACHE_TTL)
+
+# Function to get the cloud cover to show; in forecast mode this doesn't call the current-conditions API
+def get_display_cloud_cover():
+    if not FORECAST_ENABLED:
+        return get_cloud_cover()
+    cloud_cover, condition = weather_client.peek_cloud_cover(WEATHER_CACHE_TTL)
+    if cloud_cover is None:
+        weather_client.get_forecast()  # Only calls the API if there is no forecast yet
+        cloud_cover, condition = weather_client.forecast_cloud_cover()
+    return cloud_cover, condition
 
 # Function to send command to a controller
-def send_command_to_controller(controller_url, command, params=None):
-    try:
-        if params is None:
-            params = {}
-        
-        url = f"{controller_url.rstrip('/')}/api/command"
-        response = requests.post(url, json={
-            "command": command,
-            "params": params
-        }, timeout=5)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error sending command to {controller_url}: {response.status_code} {response.text}")
-            return {"success": False, "error": f"HTTP {response.status_code}"}
-    except Exception as e:
-        print(f"Exception sending command to {controller_url}: {e}")
-        return {"success": False, "error": str(e)}
+def send_command_to_controller(controller_url, command, params=None, timeout=5):
+    return get_client(controller_url).command(command, params, timeout=timeout)
 
-# Function to get status from a controller
-def get_controller_status(controller_url):
-    try:
-        url = f"{controller_url.rstrip('/')}/api/status"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error getting status from {controller_url}: {response.status_code} {response.text}")
-            return None
-    except Exception as e:
-        print(f"Exception getting status from {controller_url}: {e}")
+# Function to get status from a controller; it only sends what changed since the status we already have.
+# Controllers whose circuit is open are skipped at once (CircuitOpen) until their next trial
+def get_controller_status(controller_url, timeout=5):
+    known = {key: value for key, value in controller_status.get(controller_url, {}).items()
+             if key not in ('offline', 'link')}
+    address = udp_address(controller_url)
+    if address is not None:
+        attempt = lambda timeout_left: poll_status_over_udp(controller_url, address, known, timeout_left)
+    else:
+        attempt = lambda timeout_left: get_client(controller_url).poll_status(known, timeout=timeout_left)
+    return controller_health.call(controller_url, attempt, lambda status: "No status" if status is None else None,
+                                  timeout)
+
+# Function to poll a UDP controller: a heartbeat returns its status version, and only a changed status is
+# fetched over HTTP
+def poll_status_over_udp(controller_url, address, known, timeout):
+    global udp_unchanged_polls
+    started = time.monotonic()
+    digest = udp_transport.heartbeat(controller_url, *address, timeout=timeout)
+    if digest is None:
         return None
+    if known.get('version') == digest['version']:
+        udp_unchanged_polls += 1
+        return known
+    return get_client(controller_url).poll_status(known, timeout=max(0.1, timeout - (time.monotonic() - started)))
 
-# Function to update status of all controllers
-def update_all_controller_status():
-    global controller_status
-    
+# Function to find the UDP address of a controller set to "transport": "udp" (None for HTTP controllers,
+# and for all of them while the hub has no UDP secret)
+def udp_address(controller_url):
+    if udp_transport is None:
+        return None
+    for controller in config['controllers']:
+        if controller['url'] == controller_url and controller.get('transport') == 'udp':
+            return urlparse(controller_url).hostname, controller.get('udp_port', UDP_PORT)
+    return None
+
+# Function to run a command on a controller within timeout seconds: over its link if it has one, then over UDP
+# if the controller uses it and the command has a compact form, otherwise HTTP
+def run_controller_command(controller_url, command, params=None, timeout=COMMAND_DEADLINE):
+    result = controller_links.command(controller_url, command, params, timeout)
+    if result is not None:
+        return result
+    address = udp_address(controller_url)
+    if address is not None and encode_command(command, params) is not None:
+        attempt = lambda timeout_left: udp_transport.command(controller_url, *address, command, params, timeout_left)
+    elif ASYNC_COMMANDS:
+        # Every controller accepts its job within milliseconds; then we collect the outcome
+        attempt = lambda timeout_left: get_client(controller_url).run_job(command, params, deadline=timeout_left)
+    else:
+        attempt = lambda timeout_left: send_command_to_controller(controller_url, command, params, timeout=timeout_left)
+    # Calls that got no answer count against the controller's circuit, but a command is only retried if it never
+    # reached the controller: one that timed out waiting for its answer may have run, and must not run twice
+    failed = lambda result: result.get('error') if result.get('unreachable') or result.get('no_answer') else None
+    return controller_health.call(controller_url, attempt, failed, timeout,
+                                  retryable=lambda result: bool(result.get('unreachable')))
+
+# Function to find the configured URL of a controller opening a link: the URL it reports, then its address,
+# then its name (controllers behind NAT are known by the URL or name in their hello). Only called for hellos
+# carrying the shared link token, so a reported URL or name is never taken on its own
+def identify_controller(hello, remote_addr):
+    reported = (hello.get('url') or '').rstrip('/')
+    for controller in config['controllers']:
+        if reported and controller['url'].rstrip('/') == reported:
+            return controller['url']
+    for controller in config['controllers']:
+        if urlparse(controller['url']).hostname == remote_addr:
+            return controller['url']
+    for controller in config['controllers']:
+        if hello.get('name') and controller.get('name') == hello.get('name'):
+            return controller['url']
+    return None
+
+# Function to take a status a controller pushed over its link
+def on_controller_status(url, status):
+    controller_status[url] = {**status, 'link': True}
+    controller_health.breaker(url).record_success()
+    refresh_dashboard()
+
+# Function to take a status digest a UDP controller pushed; a new version gets the controller polled right away
+def on_controller_digest(url, digest):
+    if digest['version'] != controller_status.get(url, {}).get('version'):
+        poll_schedule.poll_now(url)
+        status_poll_wakeup.set()
+
+# Function to note a closed link; the controller is polled again, starting right away
+def on_controller_link_closed(url):
+    if url in controller_status:
+        controller_status[url]['link'] = False
+    poll_schedule.poll_now(url)
+    status_poll_wakeup.set()
+
+# Function to get the circuits of configured controllers that are open or half-open, by controller URL
+def controller_circuits():
+    circuits = {}
     for controller in config['controllers']:
-        url = controller['url']
-        status = get_controller_status(url)
-        if status:
-            controller_status[url] = status
-            print(f"Updated status for {controller['name']}: {status}")
+        breaker = controller_health.breaker(controller['url'])
+        if breaker.state != 'closed':
+            circuits[controller['url']] = {'state': breaker.state, 'failures': breaker.failures,
+                                           'retry_at': breaker.retry_at.strftime("%I:%M:%S %p")}
+    return circuits
+
+# Function to forget connection pools, circuit breakers and poll times of controllers that were removed
+def prune_controllers():
+    active_urls = [controller['url'] for controller in config['controllers']]
+    prune_clients(active_urls)
+    controller_health.forget(active_urls)
+    poll_schedule.forget(active_urls)
+
+# Function to collect everything the dashboard shows (runs in the background, never on a request)
+def build_dashboard():
+    cloud_cover, condition = get_display_cloud_cover()
+    sunset = get_sunset_time()
+    state = {
+        'config': config,
+        'hub_config': hub_config,
+        'controller_status': controller_status,
+        'cloud_cover': cloud_cover or 0,
+        'condition': condition or "Unknown",
+        'is_overcast': cloud_cover is not None and cloud_cover >= CLOUD_THRESHOLD,
+        'cloud_threshold': CLOUD_THRESHOLD,
+        'sunset_time': sunset.strftime("%I:%M %p"),
+        'lower_time': (sunset - timedelta(minutes=LOWER_BLINDS_OFFSET)).strftime("%I:%M %p"),
+        'raise_time': (sunset + timedelta(minutes=RAISE_BLINDS_OFFSET)).strftime("%I:%M %p"),
+        'lower_offset': LOWER_BLINDS_OFFSET,
+        'raise_offset': RAISE_BLINDS_OFFSET,
+        # Circuit state of controllers the hub is currently not calling (closed circuits are left out)
+        'controller_health': controller_circuits()
+    }
+    return state, render_dashboard
+
+# Function to render the dashboard page from a snapshot's state
+def render_dashboard(state):
+    with app.app_context():
+        # The admin panel (controller list and settings form) only changes when the configuration is saved
+        admin_panel = fragment_cache.get('admin_panel', lambda: render_template(
+            'admin_panel.html', config=state['config'], hub_config=state['hub_config']))
+        return render_template('index.html', admin_panel=admin_panel, **state)
+
+# Function to pick out the parts of a dashboard snapshot that open pages update in place
+def dashboard_live_state(state):
+    controllers = state['config']['controllers']
+    return {
+        # Pages reload themselves when the layout changes; everything else is patched into the page
+        'layout': {
+            'controllers': [controller['url'] for controller in controllers],
+            'test_mode': state['hub_config'].get('test_mode', {}).get('enabled', False),
+            'cloud_threshold': state['cloud_threshold']
+        },
+        'weather': {
+            'cloud_cover': state['cloud_cover'],
+            'condition': state['condition'],
+            'is_overcast': state['is_overcast']
+        },
+        'schedule': {
+            'sunset_time': state['sunset_time'],
+            'lower_time': state['lower_time'],
+            'raise_time': state['raise_time'],
+            'lower_offset': state['lower_offset'],
+            'raise_offset': state['raise_offset']
+        },
+        'controllers': {controller['url']: {**state['controller_status'].get(controller['url'], {}),
+                                            'circuit': state['controller_health'].get(controller['url'])}
+                        for controller in controllers}
+    }
+
+# Function to rebuild the dashboard snapshot, e.g. after a status sweep or a settings change
+def refresh_dashboard():
+    snapshot = dashboard.rebuild()
+    # Open pages receive only what changed since the previous snapshot
+    dashboard_events.publish(dashboard_live_state(snapshot.state))
+
+# Function to (re)start the periodic dashboard rebuild that picks up new weather and schedule times
+def schedule_dashboard_refresh():
+    timer.cancel_tag('dashboard')
+    timer.schedule_every(DASHBOARD_REFRESH_INTERVAL, refresh_dashboard, 'dashboard_refresh', tag='dashboard')
+
+# Function to poll the given controllers (by default every controller without a link) and schedule their next polls
+def update_all_controller_status(controllers=None):
+    global controller_status, last_status_sweep
+    
+    # Linked controllers push their status as it changes; the rest are polled concurrently within one deadline
+    if controllers is None:
+        controllers = [controller for controller in config['controllers']
+                       if not controller_links.connected(controller['url'])]
+    result = status_fanout.run(
+        controllers,
+        lambda controller, timeout: get_controller_status(controller['url'], timeout=timeout),
+        label="status",
+        overall_deadline=STATUS_SWEEP_DEADLINE)
+    
+    changed_any = False
+    for outcome in result.outcomes:
+        url = outcome.url
+        previous = controller_status.get(url)
+        if outcome.success:
+            changed = outcome.response != previous
+            controller_status[url] = outcome.response
+            if changed:
+                print(f"Updated status for {outcome.name}: {outcome.response}")
         else:
             # If we can't reach the controller, mark it as offline
-            if url in controller_status:
-                controller_status[url]['offline'] = True
+            changed = previous is None or not previous.get('offline')
+            if previous is not None:
+                previous['offline'] = True
             else:
                 controller_status[url] = {"offline": True}
+        poll_schedule.record(url, outcome.response if outcome.success else None, changed)
+        changed_any = changed_any or changed
+    
+    last_status_sweep = {
+        'started_at': result.started_at.isoformat(),
+        'finished_at': datetime.now().isoformat(),
+        'duration': round(result.duration, 3),
+        'polled': len(result.outcomes),
+        'linked': sum(1 for controller in config['controllers'] if controller_links.connected(controller['url'])),
+        # Since startup: full answers, answers with only the changes, and empty "not modified" answers
+        'responses': {**{kind: sum(get_client(controller['url']).poll_stats[kind] for controller in config['controllers'])
+                         for kind in ('full', 'delta', 'not_modified')},
+                      'udp_unchanged': udp_unchanged_polls},
+        'online': len(result.succeeded),
+        'missed_deadline': [outcome.name for outcome in result.timed_out],
+        'failed': [outcome.name for outcome in result.failed if not outcome.timed_out]
+    }
+    if result.timed_out:
+        print(f"Status sweep missed deadline for: {', '.join(last_status_sweep['missed_deadline'])}")
+    print(f"Status sweep of {len(result.outcomes)} controllers finished in {result.duration:.1f}s "
+          f"({last_status_sweep['linked']} linked)")
+    if changed_any:
+        refresh_dashboard()
+
+# Function to send a command to all controllers at once
+def send_command_to_all_controllers(command, params=None):
+    call = lambda controller, timeout: run_controller_command(controller['url'], command, params, timeout)
+    result = command_fanout.run(config['controllers'], call, label=command)
+    
+    for outcome in result.outcomes:
+        if outcome.success:
+            print(f"{command} succeeded on {outcome.name} in {outcome.latency:.1f}s")
+        else:
+            print(f"{command} failed on {outcome.name}: {outcome.error}")
+    print(f"{command}: {len(result.succeeded)}/{len(result.outcomes)} controllers succeeded in {result.duration:.1f}s")
+    
+    last_fanout_results[command] = result
+    # Watch the controllers closely while they settle after the command
+    for controller in config['controllers']:
+        poll_schedule.expedite(controller['url'])
+    status_poll_wakeup.set()
+    return result
 
-# Function to lower blinds on all controllers
-def lower_blinds_on_all_controllers():
+# Function to lower blinds on all controllers (unless it is cloudy, when check_weather is set)
+def lower_blinds_on_all_controllers(check_weather=True):
     global blinds_lowered
     
     # Check if it's cloudy (above threshold)
-    if is_overcast():
+    if check_weather and sky_overcast():
         print(f"Cloud cover is above threshold ({CLOUD_THRESHOLD}%). Skipping blind lowering.")
-        return
+        return None
     
     print("Lowering blinds on all controllers")
-    
-    for controller in config['controllers']:
-        url = controller['url']
-        result = send_command_to_controller(url, "lower_blinds")
-        if result and result.get('success'):
-            print(f"Successfully lowered blinds on {controller['name']}")
-        else:
-            print(f"Failed to lower blinds on {controller['name']}")
+    result = send_command_to_all_controllers("lower_blinds")
     
     blinds_lowered = True
     print("STATE: DOWN (hub)")
+    return result
 
 # Function to raise blinds on all controllers
 def raise_blinds_on_all_controllers():
     global blinds_lowered
     
     print("Raising blinds on all controllers")
-    
-    for controller in config['controllers']:
-        url = controller['url']
-        result = send_command_to_controller(url, "raise_blinds")
-        if result and result.get('success'):
-            print(f"Successfully raised blinds on {controller['name']}")
-        else:
-            print(f"Failed to raise blinds on {controller['name']}")
+    result = send_command_to_all_controllers("raise_blinds")
     
     blinds_lowered = False
     print("STATE: UP (hub)")
+    return result
 
-# Function to schedule blind actions for the day
+# Function to collect the settings the schedule plan is built from
+def schedule_plan_settings():
+    location_details = get_location_details()
+    return {
+        'timezone': location_details['timezone'],
+        'latitude': location_details['latitude'],
+        'longitude': location_details['longitude'],
+        'lower_offset': LOWER_BLINDS_OFFSET,
+        'raise_offset': RAISE_BLINDS_OFFSET,
+        'test_mode': TEST_MODE_ENABLED,
+        'test_lower_time': TEST_LOWER_TIME,
+        'test_raise_time': TEST_RAISE_TIME
+    }
+
+# Function to run a planned action and arm the timer for its next planned time
+def run_scheduled_action(action):
+    try:
+        if action == 'lower':
+            lower_blinds_on_all_controllers()
+        else:
+            raise_blinds_on_all_controllers()
+    finally:
+        arm_scheduled_action(action)
+
+# Function to arm the timer for the next planned lower/raise, leaving it alone if already armed for that time
+def arm_scheduled_action(action):
+    tag = f'{action}_blinds'
+    deadline = schedule_plan.next(action, datetime.now(ZoneInfo(schedule_plan.settings['timezone'])))
+    armed = timer.jobs(tag)
+    if armed and armed[0].deadline == deadline:
+        return
+    
+    timer.cancel_tag(tag)
+    if deadline is None:
+        return
+    timer.schedule_at(deadline, lambda: run_scheduled_action(action), tag, tag=tag)
+    
+    when = deadline.strftime('%Y-%m-%d %H:%M:%S')
+    if TEST_MODE_ENABLED:
+        print(f"[TEST MODE] Scheduled to {action} blinds at {when} (manual test time)")
+    elif action == 'lower':
+        print(f"Scheduled to lower blinds at {when} ({LOWER_BLINDS_OFFSET} minutes before sunset, if not too cloudy)")
+    elif RAISE_BLINDS_OFFSET == 0:
+        print(f"Scheduled to raise blinds at {when} (at sunset)")
+    else:
+        print(f"Scheduled to raise blinds at {when} ({RAISE_BLINDS_OFFSET} minutes after sunset)")
+
+# Function to bring the schedule plan up to date and arm the next lower/raise actions
 def schedule_blind_actions():
     global location_details_cache
     # If we're stuck on the fallback location, try to refresh once; otherwise reuse cache
     if location_details_cache and location_details_cache.get("timezone") == "America/New_York" and str(LOCATION) != "10001":
         location_details_cache = None
-    # Clear any existing jobs
-    schedule.clear()
     
-    if TEST_MODE_ENABLED:
-        # Use manual test times
-        lower_time_str = TEST_LOWER_TIME
-        raise_time_str = TEST_RAISE_TIME
-        
-        # Schedule the jobs
-        schedule.every().day.at(lower_time_str).do(lower_blinds_on_all_controllers)
-        schedule.every().day.at(raise_time_str).do(raise_blinds_on_all_controllers)
-        
-        print(f"[TEST MODE] Scheduled to lower blinds at {lower_time_str} (manual test time)")
-        print(f"[TEST MODE] Scheduled to raise blinds at {raise_time_str} (manual test time)")
-        
-    else:
-        # Use sunset-based scheduling
-        # Get today's sunset time
-        sunset = get_sunset_time()
-        
-        # Calculate times for lowering and raising blinds
-        lower_time = sunset - timedelta(minutes=LOWER_BLINDS_OFFSET)
-        raise_time = sunset + timedelta(minutes=RAISE_BLINDS_OFFSET)
-        
-        # Format times for scheduler (HH:MM format)
-        lower_time_str = lower_time.strftime("%H:%M")
-        raise_time_str = raise_time.strftime("%H:%M")
-        
-        # Schedule the jobs
-        schedule.every().day.at(lower_time_str).do(lower_blinds_on_all_controllers)
-        schedule.every().day.at(raise_time_str).do(raise_blinds_on_all_controllers)
-        
-        print(f"Scheduled to lower blinds at {lower_time_str} ({LOWER_BLINDS_OFFSET} minutes before sunset, if not too cloudy)")
-        if RAISE_BLINDS_OFFSET == 0:
-            print(f"Scheduled to raise blinds at {raise_time_str} (at sunset)")
-        else:
-            print(f"Scheduled to raise blinds at {raise_time_str} ({RAISE_BLINDS_OFFSET} minutes after sunset)")
+    # Rebuilt only when a setting it depends on changed; otherwise just rolled forward to today
+    if schedule_plan.update(schedule_plan_settings(), lambda day: get_solar_calendar().sunset(day)):
+        print(f"Schedule plan rebuilt for the next {schedule_plan.days} days")
+    
+    for action in SchedulePlan.ACTIONS:
+        arm_scheduled_action(action)
+    
+    # Roll the plan forward just after local midnight
+    if not timer.jobs('replan'):
+        now = datetime.now(ZoneInfo(schedule_plan.settings['timezone']))
+        replan_time = (now + timedelta(days=1)).replace(hour=0, minute=0, second=5, microsecond=0)
+        timer.schedule_at(replan_time, schedule_blind_actions, 'plan_day', tag='replan')
+    
+    schedule_forecast_actions()
+    if not timer.jobs('forecast_refresh'):
+        schedule_forecast_refresh()
+    refresh_dashboard()
 
-# Function to monitor cloud cover and control blinds
-def monitor_cloud_cover():
-    global blinds_lowered
+# Function to move the blinds for a change the forecast predicted
+def apply_forecast_change(overcast):
+    forecast_stats['applied_changes'] += 1
+    if overcast and blinds_lowered:
+        print(f"Forecast: clouds expected within {FORECAST_LEAD_TIME} minutes. Raising blinds.")
+        raise_blinds_on_all_controllers()
+    elif not overcast and not blinds_lowered:
+        print(f"Forecast: sun expected within {FORECAST_LEAD_TIME} minutes. Lowering blinds.")
+        lower_blinds_on_all_controllers(check_weather=False)
+
+# Function to schedule today's forecast cloud changes in the monitoring window, FORECAST_LEAD_TIME minutes early
+def schedule_forecast_actions():
+    timer.cancel_tag('forecast')
+    if not FORECAST_ENABLED or TEST_MODE_ENABLED:
+        return
+    forecast = weather_client.get_forecast()
+    if forecast is None:
+        print("No cloud forecast available; using current conditions only")
+        return
     
-    while True:
-        # Skip cloud monitoring if in test mode
-        if TEST_MODE_ENABLED:
-            print("[TEST MODE] Skipping cloud monitoring - using manual schedule only")
-            time.sleep(MONITORING_INTERVAL * 60)
+    sunset = get_sunset_time()
+    now = datetime.now(sunset.tzinfo)
+    monitoring_start = sunset - timedelta(minutes=LOWER_BLINDS_OFFSET)
+    lead = timedelta(minutes=FORECAST_LEAD_TIME)
+    # The planned lower at the start of the window already looks lead minutes ahead; schedule every later change
+    for when, overcast in forecast.changes(monitoring_start, sunset, CLOUD_THRESHOLD)[1:]:
+        run_at = when - lead
+        if run_at <= max(now, monitoring_start):
             continue
-        # Get current time
-        now = datetime.now()
-        
-        # Get sunset time
-        sunset = get_sunset_time()
-        
-        # Convert sunset to naive datetime to match now
-        if sunset.tzinfo is not None:
-            sunset = sunset.replace(tzinfo=None)
-        
-        # Define monitoring period (from LOWER_BLINDS_OFFSET minutes before sunset to sunset)
-        monitoring_start = sunset - timedelta(minutes=LOWER_BLINDS_OFFSET)
-        
-        # Check if we're in the monitoring period
-        in_monitoring_period = monitoring_start <= now <= sunset
+        name = 'forecast_raise' if overcast else 'forecast_lower'
+        timer.schedule_at(run_at, lambda overcast=overcast: apply_forecast_change(overcast), name, tag='forecast')
+        forecast_stats['planned_changes'] += 1
+        print(f"Forecast: {'clouds' if overcast else 'sun'} at {when.astimezone(sunset.tzinfo).strftime('%H:%M')}, "
+              f"moving blinds at {run_at.astimezone(sunset.tzinfo).strftime('%H:%M')}")
+
+# Function to fetch a new forecast and replan today's forecast changes from it
+def refresh_forecast():
+    try:
+        weather_client.get_forecast(refresh=True)
+        schedule_forecast_actions()
+    finally:
+        schedule_forecast_refresh()
+
+# Function to arm the next forecast fetch at the earliest of FORECAST_REFRESH_TIMES
+def schedule_forecast_refresh():
+    timer.cancel_tag('forecast_refresh')
+    if not FORECAST_ENABLED:
+        return
+    tz = ZoneInfo(get_location_details()['timezone'])
+    now = datetime.now(tz)
+    refresh_at = []
+    for refresh_time in FORECAST_REFRESH_TIMES:
+        at = datetime.combine(now.date(), dt_time.fromisoformat(refresh_time), tz)
+        refresh_at.append(at if at > now else at + timedelta(days=1))
+    timer.schedule_at(min(refresh_at), refresh_forecast, 'forecast_refresh', tag='forecast_refresh')
+
+# Function to check cloud cover and move blinds during the monitoring window; returns the reading it acted on.
+# Runs on the adaptive cadence, or with it disabled every MONITORING_INTERVAL minutes (FORECAST_CORRECTION_INTERVAL
+# in forecast mode, where it only corrects a wrong forecast)
+def check_cloud_cover():
+    global blinds_lowered
+    
+    # Skip cloud monitoring if in test mode
+    if TEST_MODE_ENABLED:
+        print("[TEST MODE] Skipping cloud monitoring - using manual schedule only")
+        return
+    
+    # Get sunset time and the current time in the same timezone
+    sunset = get_sunset_time()
+    now = datetime.now(sunset.tzinfo)
+    
+    # Define monitoring period (from LOWER_BLINDS_OFFSET minutes before sunset to sunset)
+    monitoring_start = sunset - timedelta(minutes=LOWER_BLINDS_OFFSET)
+    
+    # Check if we're in the monitoring period
+    in_monitoring_period = monitoring_start <= now <= sunset
+    
+    # Only monitor during relevant hours
+    if in_monitoring_period:
+        # Blind decisions use conditions no older than the cache TTL
+        cloud_cover, condition = get_cloud_cover(max_age=WEATHER_CACHE_TTL)
         
-        # Only monitor during relevant hours
-        if in_monitoring_period:
-            cloud_cover, condition = get_cloud_cover()
+        if cloud_cover is not None:
+            print(f"Current cloud cover: {cloud_cover}%, Condition: {condition}")
             
-            if cloud_cover is not None:
-                print(f"Current cloud cover: {cloud_cover}%, Condition: {condition}")
-                
-                if cloud_cover < CLOUD_THRESHOLD:
-                    if not blinds_lowered:
-                        print(f"Sunny conditions ({cloud_cover}% < {CLOUD_THRESHOLD}%). Lowering blinds.")
-                        lower_blinds_on_all_controllers()
-                else:
-                    if blinds_lowered:
-                        print(f"Cloudy conditions ({cloud_cover}% >= {CLOUD_THRESHOLD}%). Raising blinds.")
-                        raise_blinds_on_all_controllers()
-        
-        # Reset blind state at the end of the day
-        if now.hour >= 23:
-            blinds_lowered = False
+            sunny = cloud_cover < CLOUD_THRESHOLD
+            predicted, _ = weather_client.forecast_cloud_cover(now) if FORECAST_ENABLED else (None, None)
+            if predicted is not None and (predicted < CLOUD_THRESHOLD) == sunny:
+                forecast_stats['confirmed'] += 1
+                # The forecast is right, so the blinds may already have moved lead minutes ahead of the next
+                # change; bring them in line with the forecast for then rather than undoing that move
+                lead_at = min(now + timedelta(minutes=FORECAST_LEAD_TIME), sunset)
+                ahead, _ = weather_client.forecast_cloud_cover(lead_at)
+                if ahead is not None and (ahead < CLOUD_THRESHOLD) != sunny:
+                    print(f"Forecast: {ahead}% cloud cover at {lead_at.strftime('%H:%M')}; following the forecast")
+                    sunny = not sunny
+            elif predicted is not None:
+                forecast_stats['corrections'] += 1
             
-        # Sleep for the monitoring interval
-        time.sleep(MONITORING_INTERVAL * 60)
+            # Scheduled actions are never re-run, so the blinds are also brought in line here after a hub restart
+            # or a forecast change whose time had already passed
+            if sunny:
+                if not blinds_lowered:
+                    print(f"Sunny conditions ({cloud_cover}% < {CLOUD_THRESHOLD}%). Lowering blinds.")
+                    lower_blinds_on_all_controllers(check_weather=False)
+            elif blinds_lowered:
+                print(f"Cloudy conditions ({cloud_cover}% >= {CLOUD_THRESHOLD}%). Raising blinds.")
+                raise_blinds_on_all_controllers()
+        return cloud_cover
+    
+    # Reset blind state at the end of the day
+    if now.hour >= 23:
+        blinds_lowered = False
+    return None
 
-# Function to run the scheduler
-def run_scheduler():
-    # Schedule blind actions for today
-    schedule_blind_actions()
+# Function to get the monitoring window (from LOWER_BLINDS_OFFSET minutes before sunset to sunset) of a day
+def monitoring_window(day=None):
+    sunset = get_solar_calendar().sunset(day)
+    return sunset - timedelta(minutes=LOWER_BLINDS_OFFSET), sunset
+
+# Function to arm the adaptive cloud monitor's next wake-up: next_check inside the window, otherwise the window's
+# start (after one warm-up check), and once the window is over 23:00 to reset the day and then tomorrow's warm-up
+def arm_cloud_monitor(next_check=None):
+    window_start, sunset = monitoring_window()
+    now = datetime.now(sunset.tzinfo)
+    warmup_at = window_start - timedelta(minutes=CADENCE_WARMUP)
     
-    # Run the scheduler
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+    if next_check is not None and next_check <= sunset:
+        timer.schedule_at(next_check, lambda: run_cloud_monitor('check'), 'cloud_monitor', tag='monitor')
+    elif now < warmup_at:
+        timer.schedule_at(warmup_at, lambda: run_cloud_monitor('warmup'), 'cloud_warmup', tag='monitor')
+    elif now < window_start:
+        timer.schedule_at(window_start, lambda: run_cloud_monitor('check'), 'cloud_monitor', tag='monitor')
+    elif now <= sunset and next_check is None:
+        timer.schedule_at(now, lambda: run_cloud_monitor('check'), 'cloud_monitor', tag='monitor')
+    else:
+        monitor_cadence.close_window(sunset)
+        day_end = now.replace(hour=23, minute=0, second=0, microsecond=0)
+        if now < day_end:
+            timer.schedule_at(day_end, lambda: run_cloud_monitor('day_end'), 'cloud_day_end', tag='monitor')
+        else:
+            tomorrow_start, _ = monitoring_window(now.date() + timedelta(days=1))
+            timer.schedule_at(tomorrow_start - timedelta(minutes=CADENCE_WARMUP), lambda: run_cloud_monitor('warmup'),
+                              'cloud_warmup', tag='monitor')
 
-# Start the scheduler in a background thread
-scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-scheduler_thread.start()
+# Function for one adaptive cloud monitor wake-up; each one arms the next, so nothing runs (or calls the weather
+# API) between the end of one window and the warm-up before the next
+def run_cloud_monitor(phase):
+    global blinds_lowered
+    window_start, sunset = monitoring_window()
+    now = datetime.now(sunset.tzinfo)
+    
+    if phase == 'warmup':
+        # One reading just before the window, so its first interval already knows how close the sky is to the threshold
+        cloud_cover, condition = get_cloud_cover(max_age=WEATHER_CACHE_TTL)
+        monitor_cadence.warmup(now, cloud_cover)
+        print(f"Cloud monitor warm-up: {cloud_cover}% cloud cover, Condition: {condition}")
+    elif phase == 'check' and window_start <= now <= sunset:
+        first = monitor_cadence.last_poll is None
+        cloud_cover = check_cloud_cover()
+        interval = monitor_cadence.observe(now, cloud_cover, first=first)
+        print(f"Next cloud check in {interval:.0f} minutes ({monitor_cadence.last_reason})")
+        arm_cloud_monitor(now + timedelta(minutes=interval))
+        return
+    elif phase == 'day_end':
+        blinds_lowered = False
+    arm_cloud_monitor()
+
+# Function to (re)start the cloud cover monitor with the current settings
+def schedule_cloud_monitor():
+    timer.cancel_tag('monitor')
+    # Forecast mode only corrects the forecast, so it may wait up to the correction interval
+    fixed_interval = FORECAST_CORRECTION_INTERVAL if FORECAST_ENABLED else MONITORING_INTERVAL
+    if not CADENCE_ENABLED:
+        timer.schedule_every(fixed_interval * 60, check_cloud_cover, 'cloud_monitor', tag='monitor')
+        return
+    if TEST_MODE_ENABLED:
+        print("[TEST MODE] Cloud monitor not scheduled - using manual schedule only")
+        return
+    ceiling = FORECAST_CORRECTION_INTERVAL if FORECAST_ENABLED else CADENCE_CEILING
+    monitor_cadence.configure(CADENCE_FLOOR, ceiling, CLOUD_THRESHOLD, fixed_interval)
+    arm_cloud_monitor()
 
-# Start the cloud cover monitoring thread
-cloud_monitor_thread = threading.Thread(target=monitor_cloud_cover, daemon=True)
-cloud_monitor_thread.start()
+# Start the timer engine; the first plan is made on a timer job since it may need the weather API
+timer.start()
+timer.schedule_at(datetime.now().astimezone(), schedule_blind_actions, 'plan_day', tag='replan')
+timer.schedule_at(datetime.now().astimezone(), schedule_cloud_monitor, 'start_cloud_monitor', tag='monitor')
+schedule_dashboard_refresh()
 
 # Start the controller status update thread
 def run_status_updater():
     while True:
-        update_all_controller_status()
-        time.sleep(60)  # Update every minute
+        status_poll_wakeup.clear()
+        polled = [controller for controller in config['controllers']
+                  if not controller_links.connected(controller['url'])]
+        # Controllers due within the next second are polled along with those already due, in one sweep
+        due = set(poll_schedule.due([controller['url'] for controller in polled], slack=1))
+        if due:
+            update_all_controller_status([controller for controller in polled if controller['url'] in due])
+        # Sleep until the next controller is due, or a command or closed link wakes us up earlier
+        wait = poll_schedule.next_due_in([controller['url'] for controller in polled])
+        status_poll_wakeup.wait(STATUS_SWEEP_INTERVAL if wait is None else min(wait, STATUS_SWEEP_INTERVAL))
 
 status_thread = threading.Thread(target=run_status_updater, daemon=True)
 status_thread.start()
 
+# Start receiving UDP acknowledgements, results and status digests
+if udp_transport is not None:
+    udp_transport.start()
+elif any(controller.get('transport') == 'udp' for controller in config['controllers']):
+    print("udp_transport.secret is not set in hub_config.json; controllers set to UDP are reached over HTTP")
+
 @app.route('/')
 def index():
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Blind Control Hub</title>
-        <style>
-            * {
-                box-sizing: border-box;
-                font-family: Arial, sans-serif;
-            }
-            body {
-                margin: 0;
-                padding: 16px;
-                background-color: #f5f5f5;
-                max-width: 800px;
-                margin: 0 auto;
-            }
-            h1 {
-                text-align: center;
-                color: #333;
-                font-size: 28px;
-                margin-bottom: 20px;
-            }
-            .controller-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
-                gap: 20px;
-                margin-bottom: 30px;
-            }
-            .controller-card {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                transition: transform 0.3s, box-shadow 0.3s;
-                cursor: pointer;
-                text-decoration: none;
-                color: inherit;
-                display: block;
-                position: relative;
-            }
-            .controller-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-            }
-            .controller-card h2 {
-                margin-top: 0;
-                color: #2196F3;
-                font-size: 20px;
-            }
-            .controller-card p {
-                color: #666;
-                margin-bottom: 0;
-            }
-            .status-indicator {
-                position: absolute;
-                top: 10px;
-                right: 10px;
-                width: 12px;
-                height: 12px;
-                border-radius: 50%;
-            }
-            .status-online {
-                background-color: #4CAF50;
-            }
-            .status-offline {
-                background-color: #f44336;
-            }
-            .status-standalone {
-                background-color: #FF9800;
-            }
-            .admin-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 20px;
-                margin-top: 30px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .admin-panel h2 {
-                margin-top: 0;
-                color: #333;
-                font-size: 20px;
-            }
-            .admin-toggle {
-                background-color: #673AB7;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 16px;
-                cursor: pointer;
-                width: 100%;
-                text-align: left;
-                margin-bottom: 15px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            .admin-toggle:hover {
-                background-color: #5E35B1;
-            }
-            .admin-toggle:after {
-                content: "▼";
-                font-size: 12px;
-            }
-            .admin-toggle.active:after {
-                content: "▲";
-            }
-            .admin-content {
-                display: none;
-                padding: 15px;
-                background-color: #f9f9f9;
-                border-radius: 8px;
-                margin-bottom: 15px;
-            }
-            .admin-content.show {
-                display: block;
-            }
-            .form-group {
-                margin-bottom: 15px;
-            }
-            label {
-                display: block;
-                margin-bottom: 5px;
-                font-weight: bold;
-            }
-            input[type="text"] {
-                width: 100%;
-                padding: 10px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                font-size: 16px;
-            }
-            button {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 10px 15px;
-                font-size: 16px;
-                cursor: pointer;
-                transition: background-color 0.3s;
-            }
-            button:hover {
-                background-color: #45a049;
-            }
-            .controller-list {
-                margin-top: 20px;
-            }
-            .controller-item {
-                background-color: #f9f9f9;
-                border-radius: 4px;
-                padding: 15px;
-                margin-bottom: 10px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            .controller-item-info {
-                flex: 1;
-            }
-            .controller-item-actions {
-                display: flex;
-                gap: 10px;
-            }
-            .edit-btn {
-                background-color: #2196F3;
-            }
-            .edit-btn:hover {
-                background-color: #1976D2;
-            }
-            .delete-btn {
-                background-color: #f44336;
-            }
-            .delete-btn:hover {
-                background-color: #d32f2f;
-            }
-            .control-buttons {
-                display: flex;
-                gap: 10px;
-                margin-bottom: 20px;
-            }
-            .control-buttons button {
-                flex: 1;
-                padding: 15px;
-                font-size: 18px;
-            }
-            .up-button {
-                background-color: #2196F3;
-            }
-            .up-button:hover {
-                background-color: #1976D2;
-            }
-            .stop-button {
-                background-color: #FF9800;
-            }
-            .stop-button:hover {
-                background-color: #F57C00;
-            }
-            .down-button {
-                background-color: #2196F3;
-            }
-            .down-button:hover {
-                background-color: #1976D2;
-            }
-            .weather-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 20px;
-                margin-bottom: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .weather-panel h2 {
-                margin-top: 0;
-                color: #333;
-                font-size: 20px;
-            }
-            .weather-info {
-                display: flex;
-                align-items: center;
-                margin-bottom: 15px;
-            }
-            .weather-icon {
-                width: 64px;
-                height: 64px;
-                margin-right: 15px;
-            }
-            .weather-details {
-                flex: 1;
-            }
-            .weather-condition {
-                font-size: 18px;
-                margin-bottom: 5px;
-            }
-            .cloud-status {
-                margin-top: 15px;
-                padding: 15px;
-                border-radius: 8px;
-                text-align: center;
-                font-weight: bold;
-            }
-            .cloud-status.overcast {
-                background-color: #e1f5fe;
-                color: #0288d1;
-            }
-            .cloud-status.clear {
-                background-color: #f1f8e9;
-                color: #689f38;
-            }
-            .schedule-panel {
-                background-color: #fff;
-                border-radius: 8px;
-                padding: 20px;
-                margin-bottom: 20px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-            .schedule-panel h2 {
-                margin-top: 0;
-                color: #333;
-                font-size: 20px;
-            }
-            .schedule-item {
-                margin-bottom: 15px;
-                padding-bottom: 15px;
-                border-bottom: 1px solid #eee;
-            }
-            .schedule-item:last-child {
-                border-bottom: none;
-                margin-bottom: 0;
-                padding-bottom: 0;
-            }
-            .time {
-                font-weight: bold;
-                color: #2196F3;
-            }
-        </style>
-        <script>
-            function toggleAdminPanel() {
-                const content = document.getElementById('adminContent');
-                const button = document.getElementById('adminToggle');
-                content.classList.toggle('show');
-                button.classList.toggle('active');
-            }
-            
-            function editController(index) {
-                const controllers = {{ config|tojson }}.controllers;
-                const controller = controllers[index];
-                
-                document.getElementById('editIndex').value = index;
-                document.getElementById('editName').value = controller.name;
-                document.getElementById('editUrl').value = controller.url;
-                document.getElementById('editDescription').value = controller.description;
-                
-                document.getElementById('editForm').style.display = 'block';
-                document.getElementById('addForm').style.display = 'none';
-            }
-            
-            function cancelEdit() {
-                document.getElementById('editForm').style.display = 'none';
-                document.getElementById('addForm').style.display = 'block';
-            }
-            
-            // Auto-refresh the page every 60 seconds to update status
-            setTimeout(function() {
-                window.location.reload();
-            }, 60000);
-        </script>
-    </head>
-    <body>
-        <h1>Blind Control Hub</h1>
-        
-        
-        <div class="weather-panel">
-            <h2>Current Weather</h2>
-            <div class="weather-info">
-                <div class="weather-details">
-                    <div class="weather-condition">{{ condition }}</div>
-                    <div>Cloud Cover: {{ cloud_cover }}%</div>
-                </div>
-            </div>
-            
-            <div class="cloud-status {{ 'overcast' if is_overcast else 'clear' }}">
-                {% if is_overcast %}
-                    Currently CLOUDY (above {{ cloud_threshold }}% cloud cover)
-                    <p>Blinds will be raised during monitoring period</p>
-                {% else %}
-                    Currently SUNNY (below {{ cloud_threshold }}% cloud cover)
-                    <p>Blinds will be lowered during monitoring period</p>
-                {% endif %}
-            </div>
-        </div>
-        
-        <div class="schedule-panel">
-            <h2>Today's Schedule</h2>
-            {% if hub_config.test_mode.enabled %}
-                <div style="background-color: #fff3cd; color: #856404; padding: 10px; border-radius: 4px; margin-bottom: 15px; text-align: center; font-weight: bold;">
-                    🧪 TEST MODE ACTIVE
-                </div>
-                <div class="schedule-item">
-                    <p><strong>Test Lower Time:</strong> <span class="time">{{ hub_config.test_mode.lower_time }}</span></p>
-                </div>
-                <div class="schedule-item">
-                    <p><strong>Test Raise Time:</strong> <span class="time">{{ hub_config.test_mode.raise_time }}</span></p>
-                </div>
-                <div class="schedule-item">
-                    <small style="color: #666;">Weather monitoring and sunset scheduling are disabled in test mode</small>
-                </div>
-            {% else %}
-                <div class="schedule-item">
-                    <p><strong>Sunset:</strong> <span class="time">{{ sunset_time }}</span></p>
-                </div>
-                
-                <div class="schedule-item">
-                    <p><strong>Lower Blinds:</strong> <span class="time">{{ lower_time }}</span> ({{ lower_offset }} minutes before sunset)</p>
-                </div>
-                
-                <div class="schedule-item">
-                    <p><strong>Raise Blinds:</strong> <span class="time">{{ raise_time }}</span> {% if raise_offset == 0 %}(at sunset){% else %}({{ raise_offset }} minutes after sunset){% endif %}</p>
-                </div>
-            {% endif %}
-            
-            <form action="/reschedule" method="get" style="margin-top: 15px;">
-                <button type="submit">Refresh Schedule</button>
-            </form>
-        </div>
-        
-        <h2>Controllers</h2>
-        <div class="controller-grid">
-            {% for controller in config['controllers'] %}
-            <a href="{{ controller['url'] }}" class="controller-card">
-                <h2>{{ controller['name'] }}</h2>
-                <p>{{ controller['description'] }}</p>
-                
-                {% set status = controller_status.get(controller['url'], {}) %}
-                {% if status.get('offline', False) %}
-                    <span class="status-indicator status-offline" title="Offline"></span>
-                {% elif status.get('standalone_mode', False) %}
-                    <span class="status-indicator status-standalone" title="Standalone Mode"></span>
-                {% else %}
-                    <span class="status-indicator status-online" title="Online"></span>
-                {% endif %}
-                
-                {% if status and not status.get('offline', False) %}
-                    <div style="margin-top: 10px;">
-                        <p><strong>Remote:</strong> {{ 'ON' if status.get('remote_on', False) else 'OFF' }}</p>
-                        {% if status.get('remote_on', False) %}
-                            <p><strong>Channel:</strong> {{ status.get('channel_status', 'Unknown') }}</p>
-                        {% endif %}
-                    </div>
-                {% endif %}
-            </a>
-            {% endfor %}
-        </div>
-        
-        <div class="admin-panel">
-            <button id="adminToggle" class="admin-toggle" onclick="toggleAdminPanel()">
-                Admin Settings
-            </button>
-            
-            <div id="adminContent" class="admin-content">
-                <div id="addForm">
-                    <h3>Add New Controller</h3>
-                    <form action="/add_controller" method="post">
-                        <div class="form-group">
-                            <label for="name">Name:</label>
-                            <input type="text" id="name" name="name" required placeholder="e.g., North Building">
-                        </div>
-                        <div class="form-group">
-                            <label for="url">URL:</label>
-                            <input type="text" id="url" name="url" required placeholder="e.g., http://192.168.4.203:5000/">
-                        </div>
-                        <div class="form-group">
-                            <label for="description">Description:</label>
-                            <input type="text" id="description" name="description" placeholder="e.g., Controls for North Building blinds">
-                        </div>
-                        <button type="submit">Add Controller</button>
-                    </form>
-                </div>
-                
-                <div id="editForm" style="display: none;">
-                    <h3>Edit Controller</h3>
-                    <form action="/edit_controller" method="post">
-                        <input type="hidden" id="editIndex" name="index">
-                        <div class="form-group">
-                            <label for="editName">Name:</label>
-                            <input type="text" id="editName" name="name" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="editUrl">URL:</label>
-                            <input type="text" id="editUrl" name="url" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="editDescription">Description:</label>
-                            <input type="text" id="editDescription" name="description">
-                        </div>
-                        <button type="submit">Save Changes</button>
-                        <button type="button" onclick="cancelEdit()" style="background-color: #999;">Cancel</button>
-                    </form>
-                </div>
-                
-                <div class="controller-list">
-                    <h3>Manage Controllers</h3>
-                    {% for controller in config['controllers'] %}
-                    <div class="controller-item">
-                        <div class="controller-item-info">
-                            <strong>{{ controller['name'] }}</strong><br>
-                            <small>{{ controller['url'] }}</small>
-                        </div>
-                        <div class="controller-item-actions">
-                            <button class="edit-btn" onclick="editController({{ loop.index0 }})">Edit</button>
-                            <form action="/delete_controller" method="post" style="display: inline;">
-                                <input type="hidden" name="index" value="{{ loop.index0 }}">
-                                <button type="submit" class="delete-btn" onclick="return confirm('Are you sure you want to delete this controller?')">Delete</button>
-                            </form>
-                        </div>
-                    </div>
-                    {% endfor %}
-                </div>
-                
-                <div style="margin-top: 20px;">
-                    <h3>Hub Configuration</h3>
-                    <form action="/update_hub_config" method="post">
-                        <div class="form-group">
-                            <label for="weather_api_key">Weather API Key:</label>
-                            <input type="text" id="weather_api_key" name="weather_api_key" value="{{ hub_config.weather_api_key }}" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="location">Location (Zip Code):</label>
-                            <input type="text" id="location" name="location" value="{{ hub_config.location }}" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="cloud_threshold">Cloud Threshold (%):</label>
-                            <input type="text" id="cloud_threshold" name="cloud_threshold" value="{{ hub_config.cloud_threshold }}" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="monitoring_interval">Monitoring Interval (minutes):</label>
-                            <input type="text" id="monitoring_interval" name="monitoring_interval" value="{{ hub_config.monitoring_interval }}" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="lower_blinds_offset">Lower Blinds Offset (minutes before sunset):</label>
-                            <input type="text" id="lower_blinds_offset" name="lower_blinds_offset" value="{{ hub_config.schedule.lower_blinds_offset }}" required>
-                        </div>
-                        <div class="form-group">
-                            <label for="raise_blinds_offset">Raise Blinds Offset (minutes after sunset):</label>
-                            <input type="text" id="raise_blinds_offset" name="raise_blinds_offset" value="{{ hub_config.schedule.raise_blinds_offset }}" required>
-                        </div>
-                        
-                        <h4 style="margin-top: 30px; color: #FF9800;">Test Mode Settings</h4>
-                        <div class="form-group">
-                            <label for="test_mode_enabled">
-                                <input type="checkbox" id="test_mode_enabled" name="test_mode_enabled" value="true" {% if hub_config.test_mode.enabled %}checked{% endif %} style="margin-right: 8px;">
-                                Enable Test Mode (ignore sunset times and weather)
-                            </label>
-                        </div>
-                        <div class="form-group">
-                            <label for="test_lower_time">Test Lower Time (HH:MM):</label>
-                            <input type="time" id="test_lower_time" name="test_lower_time" value="{{ hub_config.test_mode.lower_time }}">
-                            <small style="color: #666;">Time to lower blinds during testing</small>
-                        </div>
-                        <div class="form-group">
-                            <label for="test_raise_time">Test Raise Time (HH:MM):</label>
-                            <input type="time" id="test_raise_time" name="test_raise_time" value="{{ hub_config.test_mode.raise_time }}">
-                            <small style="color: #666;">Time to raise blinds during testing</small>
-                        </div>
-                        
-                        <button type="submit">Save Hub Configuration</button>
-                    </form>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    ''', config=config, 
-        controller_status=controller_status,
-        hub_config=hub_config,
-        cloud_cover=get_cloud_cover()[0] or 0,
-        condition=get_cloud_cover()[1] or "Unknown",
-        is_overcast=is_overcast(),
-        cloud_threshold=CLOUD_THRESHOLD,
-        sunset_time=get_sunset_time().strftime("%I:%M %p"),
-        lower_time=(get_sunset_time() - timedelta(minutes=LOWER_BLINDS_OFFSET)).strftime("%I:%M %p"),
-        raise_time=(get_sunset_time() + timedelta(minutes=RAISE_BLINDS_OFFSET)).strftime("%I:%M %p"),
-        lower_offset=LOWER_BLINDS_OFFSET,
-        raise_offset=RAISE_BLINDS_OFFSET)
+    # The page was rendered in the background; browsers that already have it get a 304
+    return dashboard.serve(request)
 
 @app.route('/add_controller', methods=['POST'])
 def add_controller():
@@ -935,6 +965,7 @@ def add_controller():
         'description': description
     })
     save_config(config)
+    prune_controllers()
     
     return redirect(url_for('index'))
 
@@ -951,12 +982,15 @@ def edit_controller():
     
     config = load_config()
     if 0 <= index < len(config['controllers']):
+        # Settings the form doesn't show, such as "transport", are kept
         config['controllers'][index] = {
+            **config['controllers'][index],
             'name': name,
             'url': url,
             'description': description
         }
         save_config(config)
+        prune_controllers()
     
     return redirect(url_for('index'))
 
@@ -969,6 +1003,7 @@ def delete_controller():
     if 0 <= index < len(config['controllers']):
         del config['controllers'][index]
         save_config(config)
+        prune_controllers()
     
     return redirect(url_for('index'))
 
@@ -1017,9 +1052,11 @@ def update_hub_config():
     TEST_MODE_ENABLED = test_mode_enabled
     TEST_LOWER_TIME = test_lower_time
     TEST_RAISE_TIME = test_raise_time
+    weather_client.configure(WEATHER_API_KEY, LOCATION, CLOUD_THRESHOLD)
     
-    # Reschedule blind actions with new settings
+    # Reschedule blind actions and the cloud monitor with new settings (this also rebuilds the dashboard)
     schedule_blind_actions()
+    schedule_cloud_monitor()
     
     return redirect(url_for('index'))
 
@@ -1038,9 +1075,7 @@ def raise_all():
 @app.route('/stop_all', methods=['POST'])
 def stop_all():
     # Stop blinds on all controllers
-    for controller in config['controllers']:
-        url = controller['url']
-        send_command_to_controller(url, "stop_blinds")
+    send_command_to_all_controllers("stop_blinds")
     return redirect(url_for('index'))
 
 @app.route('/lower_all', methods=['POST'])
@@ -1049,6 +1084,97 @@ def lower_all():
     lower_blinds_on_all_controllers()
     return redirect(url_for('index'))
 
+@app.route('/api/status', methods=['GET'])
+def hub_status():
+    # Controller status as of the latest sweep or link push, with the sweep's timing, each controller's
+    # poll interval (and how the intervals are distributed) and the open links
+    return jsonify({
+        'controllers': controller_status,
+        'last_sweep': last_status_sweep,
+        'polling': poll_schedule.describe(),
+        'links': {'enabled': CONTROLLER_LINK_ENABLED, 'port': CONTROLLER_LINK_PORT, **controller_links.describe()},
+        'udp': {'enabled': True, **udp_transport.to_dict()} if udp_transport is not None else {'enabled': False}
+    })
+
+@app.route('/api/health', methods=['GET'])
+def controller_health_status():
+    # Circuit breaker of every controller the hub has called, and the shared retry budget
+    return jsonify(controller_health.describe())
+
+@app.route('/api/fanout', methods=['GET'])
+def fanout_results():
+    # Latest per-controller outcome of each hub-wide command
+    return jsonify({command: result.to_dict() for command, result in last_fanout_results.items()})
+
+@app.route('/api/weather', methods=['GET'])
+def weather_status():
+    # Cached conditions plus hit/miss counters showing how many weather API calls the cache saved
+    cloud_cover, condition = get_display_cloud_cover()
+    forecast = weather_client.forecast_cache.peek()
+    return jsonify({
+        'cloud_cover': cloud_cover,
+        'condition': condition,
+        'cloud_threshold': CLOUD_THRESHOLD,
+        'cache': weather_client.cache.describe(),
+        'forecast': {
+            'enabled': FORECAST_ENABLED,
+            'lead_time': FORECAST_LEAD_TIME,
+            'correction_interval': FORECAST_CORRECTION_INTERVAL,
+            'forecast': forecast.to_dict() if forecast else None,
+            'cache': weather_client.forecast_cache.describe(),
+            'planned': [job.to_dict() for job in timer.jobs('forecast')],
+            **forecast_stats
+        },
+        'cadence': {
+            'enabled': CADENCE_ENABLED,
+            **monitor_cadence.to_dict(),
+            'next': [job.to_dict() for job in timer.jobs('monitor')]
+        }
+    })
+
+@app.route('/api/schedule', methods=['GET'])
+def schedule_status():
+    # Planned lower/raise times for the coming days and the actions currently armed
+    return jsonify({
+        **schedule_plan.to_dict(),
+        'armed': [job.to_dict() for job in timer.jobs() if job.tag in ('lower_blinds', 'raise_blinds')]
+    })
+
+@app.route('/api/dashboard', methods=['GET'])
+def dashboard_status():
+    # Version, ETag and build/serve counters of the dashboard snapshot, and the live update stream
+    return jsonify({**dashboard.describe(), 'live': dashboard_events.describe()})
+
+@app.route('/api/events', methods=['GET'])
+def dashboard_event_stream():
+    # Server-Sent Events: the full dashboard state once, then a merge patch whenever it changes
+    return dashboard_events.response()
+
+@app.route('/api/timers', methods=['GET'])
+def timer_status():
+    # Pending timer jobs and how late recent ones fired
+    return jsonify({
+        'pending': [job.to_dict() for job in timer.jobs()],
+        'recent': list(timer.history)
+    })
+
+if CONTROLLER_LINK_ENABLED:
+    sock = Sock(app)
+
+    @sock.route(LINK_PATH)
+    def controller_link(ws):
+        # A controller's persistent link: it pushes status changes, we push commands
+        controller_links.serve(ws, request.remote_addr)
+
 if __name__ == '__main__':
     print("Running Blind Control Hub on port 5001")
-    app.run(host='0.0.0.0', port=5001)
+    if CONTROLLER_LINK_ENABLED:
+        serve_websockets(app, '0.0.0.0', CONTROLLER_LINK_PORT, name="controller-link")
+    elif Sock is not None and hub_config.get('controller_link', {}).get('enabled', True):
+        print("controller_link.token is not set in hub_config.json; controller links are refused, polling controllers")
+    else:
+        print("Controller links disabled or flask-sock not installed (pip3 install flask-sock); polling controllers")
+    # Every open dashboard holds a thread for its live update stream
+    serve(app, '0.0.0.0', 5001, SERVER_MODE, threads=SERVER_THREADS + DASHBOARD_MAX_LIVE_CLIENTS,
+          connection_limit=SERVER_CONNECTION_LIMIT, channel_timeout=SERVER_CHANNEL_TIMEOUT,
+          access_log=SERVER_ACCESS_LOG, name="hub")
@@ -0,0 +1,143 @@
+function toggleAdminPanel() {
+    const content = document.getElementById('adminContent');
+    const button = document.getElementById('adminToggle');
+    content.classList.toggle('show');
+    button.classList.toggle('active');
+}
+
+function editController(index) {
+    const controllers = JSON.parse(document.getElementById('controllersData').textContent);
+    const controller = controllers[index];
+    
+    document.getElementById('editIndex').value = index;
+    document.getElementById('editName').value = controller.name;
+    document.getElementById('editUrl').value = controller.url;
+    document.getElementById('editDescription').value = controller.description;
+    
+    document.getElementById('editForm').style.display = 'block';
+    document.getElementById('addForm').style.display = 'none';
+}
+
+function cancelEdit() {
+    document.getElementById('editForm').style.display = 'none';
+    document.getElementById('addForm').style.display = 'block';
+}
+
+// Apply a JSON merge patch from the live update stream to our copy of the state
+function applyMergePatch(target, patch) {
+    if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) {
+        return patch;
+    }
+    if (target === null || typeof target !== 'object' || Array.isArray(target)) {
+        target = {};
+    }
+    for (const key of Object.keys(patch)) {
+        if (patch[key] === null) {
+            delete target[key];
+        } else {
+            target[key] = applyMergePatch(target[key], patch[key]);
+        }
+    }
+    return target;
+}
+
+function setField(name, value) {
+    document.querySelectorAll('[data-field="' + name + '"]').forEach(function(element) {
+        element.textContent = value;
+    });
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// Same markup as the controller card in index.html
+function renderControllerStatus(status) {
+    let html;
+    if (status.offline) {
+        html = '<span class="status-indicator status-offline" title="Offline"></span>';
+    } else if (status.standalone_mode) {
+        html = '<span class="status-indicator status-standalone" title="Standalone Mode"></span>';
+    } else {
+        html = '<span class="status-indicator status-online" title="Online"></span>';
+    }
+    if (Object.keys(status).length && !status.offline) {
+        html += '<div style="margin-top: 10px;"><p><strong>Remote:</strong> ' + (status.remote_on ? 'ON' : 'OFF') + '</p>';
+        if (status.remote_on) {
+            html += '<p><strong>Channel:</strong> ' + escapeHtml(status.channel_status || 'Unknown') + '</p>';
+        }
+        html += '</div>';
+    }
+    if (status.circuit) {
+        html += '<p class="circuit-note">' + (status.circuit.state === 'open'
+            ? 'Not contacted until ' + escapeHtml(status.circuit.retry_at) + ' (' + status.circuit.failures + ' failed calls)'
+            : 'Checking again (' + status.circuit.failures + ' failed calls)') + '</p>';
+    }
+    return html;
+}
+
+let liveState = null;
+
+function renderLiveState(changed) {
+    if (changed.weather) {
+        const weather = liveState.weather;
+        setField('condition', weather.condition);
+        setField('cloud_cover', weather.cloud_cover);
+        document.getElementById('cloudStatusOvercast').hidden = !weather.is_overcast;
+        document.getElementById('cloudStatusClear').hidden = !!weather.is_overcast;
+    }
+    if (changed.schedule) {
+        const schedule = liveState.schedule;
+        setField('sunset_time', schedule.sunset_time);
+        setField('lower_time', schedule.lower_time);
+        setField('raise_time', schedule.raise_time);
+        setField('lower_offset', schedule.lower_offset);
+        setField('raise_offset_text', schedule.raise_offset ? '(' + schedule.raise_offset + ' minutes after sunset)' : '(at sunset)');
+    }
+    if (changed.controllers) {
+        document.querySelectorAll('.controller-card[data-url]').forEach(function(card) {
+            const url = card.dataset.url;
+            if (url in changed.controllers) {
+                card.querySelector('.controller-status').innerHTML = renderControllerStatus(liveState.controllers[url] || {});
+            }
+        });
+    }
+}
+
+// Live updates: the hub streams the dashboard state and then only what changes, instead of us reloading the page
+function startLiveUpdates() {
+    if (!window.EventSource) {
+        setTimeout(function() { window.location.reload(); }, 60000);
+        return;
+    }
+    const source = new EventSource('/api/events');
+    source.addEventListener('state', function(event) {
+        const state = JSON.parse(event.data);
+        if (liveState && JSON.stringify(liveState.layout) !== JSON.stringify(state.layout)) {
+            window.location.reload();
+            return;
+        }
+        liveState = state;
+        renderLiveState(state);
+    });
+    source.addEventListener('patch', function(event) {
+        const patch = JSON.parse(event.data);
+        if (!liveState || patch.layout) {
+            // Controllers or settings changed shape; the server-rendered page is the simplest way to show that
+            window.location.reload();
+            return;
+        }
+        liveState = applyMergePatch(liveState, patch);
+        renderLiveState(patch);
+    });
+    source.onerror = function() {
+        if (source.readyState === EventSource.CLOSED) {
+            // The hub refused the stream (too many live pages); fall back to reloading now and then
+            setTimeout(function() { window.location.reload(); }, 60000);
+        }
+    };
+}
+
+document.addEventListener('DOMContentLoaded', startLiveUpdates);
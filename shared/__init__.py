@@ -4,13 +4,62 @@ Shared utilities for blind control system
 
 from .config_manager import ConfigManager, ControllerConfig, HubConfig
 from .gpio_utils import GPIOController
+from .actuator import Actuator, ActuatorBusy, Preempted
+from .channel_navigator import ChannelNavigator, ALL_CHANNELS
+from .pin_events import PinEvents, PinEventsUnavailable, FakePinEvents
 from .weather_client import WeatherClient, SunsetScheduler
+from .solar_table import SolarTable, SolarCalendar
+from .cloud_forecast import CloudForecast
+from .fanout import FanOut, FanOutResult, ControllerOutcome
+from .controller_client import ControllerClient, get_client, prune_clients
+from .controller_link import LinkRegistry, HubLink
+from .udp_link import UdpTransport, UdpResponder
+from .circuit_breaker import CircuitBreaker, CircuitOpen, RetryBudget, ControllerHealth
+from .jobs import Job, JobManager
+from .timer_engine import TimerEngine, TimerJob
+from .schedule_plan import SchedulePlan
+from .versioned_state import VersionedState
+from .poll_cadence import PollCadence
+from .poll_schedule import PollSchedule
 
 __all__ = [
     'ConfigManager',
     'ControllerConfig', 
     'HubConfig',
     'GPIOController',
+    'Actuator',
+    'ActuatorBusy',
+    'Preempted',
+    'ChannelNavigator',
+    'ALL_CHANNELS',
+    'PinEvents',
+    'PinEventsUnavailable',
+    'FakePinEvents',
     'WeatherClient',
-    'SunsetScheduler'
+    'SunsetScheduler',
+    'SolarTable',
+    'SolarCalendar',
+    'CloudForecast',
+    'FanOut',
+    'FanOutResult',
+    'ControllerOutcome',
+    'ControllerClient',
+    'get_client',
+    'prune_clients',
+    'LinkRegistry',
+    'HubLink',
+    'UdpTransport',
+    'UdpResponder',
+    'CircuitBreaker',
+    'CircuitOpen',
+    'RetryBudget',
+    'ControllerHealth',
+    'Job',
+    'JobManager',
+    'TimerEngine',
+    'TimerJob',
+    'SchedulePlan',
+    'VersionedState',
+    'PollCadence',
+    'PollSchedule'
 ]
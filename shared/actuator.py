@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+# Lower numbers run first
+PRIORITY_STOP = 0
+PRIORITY_NORMAL = 10
+
+class ActuatorBusy(Exception):
+    """Raised when the actuator queue is full and a request can't be accepted"""
+
+class Preempted(Exception):
+    """Raised inside a preemptible sequence when a Stop takes over the pins"""
+
+class _Task:
+    def __init__(self, fn: Callable[[], Any], priority: int, name: str, preemptible: bool):
+        self.fn = fn
+        self.priority = priority
+        self.name = name
+        self.preemptible = preemptible
+        self.future = Future()
+
+class Actuator:
+    """Single worker thread that owns the remote's pins and runs press sequences one at a time.
+
+    Work is queued by priority in a bounded queue. A preempting request (Stop)
+    is always accepted, jumps the queue, cancels queued preemptible work and
+    interrupts the preemptible sequence that is currently running at its next
+    interruptible sleep.
+    """
+
+    def __init__(self, max_queue: int = 8, name: str = "gpio-actuator"):
+        self.max_queue = max_queue
+        self.name = name
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._preempt = threading.Event()
+        self._current = None
+        self._current_preemptible = False
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def on_actuator_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    @property
+    def current_task(self) -> Optional[str]:
+        return self._current.name if self._current else None
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def submit(self, fn: Callable[[], Any], priority: int = PRIORITY_NORMAL, name: str = "task",
+               preemptible: bool = False, preempts: bool = False) -> Future:
+        """Queue fn() to run on the actuator thread and return a Future for its result.
+
+        Raises ActuatorBusy when the queue is full, unless the request preempts.
+        """
+        task = _Task(fn, priority, name, preemptible)
+        with self._condition:
+            if preempts:
+                # Drop queued moves and interrupt the one in flight
+                kept = []
+                for entry in self._queue:
+                    if entry[2].preemptible:
+                        entry[2].future.set_exception(Preempted(f"{entry[2].name} cancelled by {name}"))
+                    else:
+                        kept.append(entry)
+                heapq.heapify(kept)
+                self._queue = kept
+                # Honoured as soon as the running task is (or enters) a preemptible sequence
+                if self._current is not None:
+                    self._preempt.set()
+            elif len(self._queue) >= self.max_queue:
+                raise ActuatorBusy(f"Actuator queue is full ({self.max_queue} pending), try again shortly")
+
+            heapq.heappush(self._queue, (priority, next(self._counter), task))
+            self._condition.notify()
+        return task.future
+
+    def run(self, fn: Callable[[], Any], priority: int = PRIORITY_NORMAL, name: str = "task",
+            preemptible: bool = False, preempts: bool = False) -> Any:
+        """Run fn() on the actuator thread and wait for its result.
+
+        Calls made from the actuator thread itself (a sequence calling another
+        sequence) run inline, since the pins are already owned by the caller.
+        """
+        if self.on_actuator_thread:
+            previous = self._current_preemptible
+            self._current_preemptible = preemptible
+            try:
+                return fn()
+            finally:
+                self._current_preemptible = previous
+        return self.submit(fn, priority, name, preemptible, preempts).result()
+
+    def check_preempted(self) -> None:
+        """Raise Preempted if a Stop is waiting to take over a preemptible sequence"""
+        if self._current_preemptible and self._preempt.is_set():
+            self._preempt.clear()
+            raise Preempted("Preempted by Stop")
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep between presses; returns early with Preempted if a Stop arrives"""
+        if not self.on_actuator_thread or not self._current_preemptible:
+            threading.Event().wait(seconds)
+            return
+        if self._preempt.wait(seconds):
+            self.check_preempted()
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, task = heapq.heappop(self._queue)
+                self._current = task
+                self._current_preemptible = task.preemptible
+                self._preempt.clear()
+
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.fn())
+                except BaseException as e:
+                    task.future.set_exception(e)
+
+            with self._condition:
+                self._current = None
+                self._current_preemptible = False
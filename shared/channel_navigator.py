@@ -0,0 +1,131 @@
+import time
+from typing import Iterable, List, Optional, Tuple
+
+ALL_CHANNELS = 0  # The "All Channels" slot sits between channel 16 and channel 1
+
+class ChannelNavigator:
+    """Tracks which channel the remote is on and plans the shortest Channel Up/Down path to another one.
+
+    Channel Up steps All Channels -> 1 -> 2 ... -> 16 -> All Channels, and Channel
+    Down steps the other way. A freshly powered remote sits on channel 1 with its
+    display asleep, and the first press after the display has gone to sleep only
+    wakes it without changing channel.
+    """
+
+    def __init__(self, num_channels: int = 16, wake_timeout: float = 5.0):
+        self.num_channels = num_channels
+        self.slots = num_channels + 1
+        self.wake_timeout = wake_timeout
+        self.position = None  # None until the remote's channel is known
+        self._last_press = None
+
+    @property
+    def known(self) -> bool:
+        return self.position is not None
+
+    @property
+    def display_awake(self) -> bool:
+        return self._last_press is not None and time.monotonic() - self._last_press < self.wake_timeout
+
+    def invalidate(self) -> None:
+        """Forget the tracked channel; the next navigation will resync by power cycling"""
+        self.position = None
+        self._last_press = None
+
+    def powered_on(self) -> None:
+        """The remote has just been powered on: channel 1, display asleep"""
+        self.position = 1
+        self._last_press = None
+
+    def powered_off(self) -> None:
+        self._last_press = None
+
+    def record_press(self, button_name: str) -> None:
+        """Update the tracked channel after a button press"""
+        if self.position is not None and self.display_awake:
+            if button_name == "Channel Up":
+                self.position = (self.position + 1) % self.slots
+            elif button_name == "Channel Down":
+                self.position = (self.position - 1) % self.slots
+        self._last_press = time.monotonic()
+
+    def distance(self, start: int, target: int) -> Tuple[str, int]:
+        """Shortest (button, number of steps) from one channel slot to another"""
+        up = (target - start) % self.slots
+        down = (start - target) % self.slots
+        if up <= down:
+            return "Channel Up", up
+        return "Channel Down", down
+
+    def plan(self, target: int, start: Optional[int] = None) -> List[str]:
+        """Presses that take the remote from start (default: current channel) to target"""
+        start = self.position if start is None else start
+        if start is None:
+            raise ValueError("Current channel is unknown")
+
+        button, steps = self.distance(start, target)
+        if steps == 0:
+            return []
+        presses = [button] * steps
+        if not self.display_awake:
+            presses.insert(0, button)  # Wake the display first
+        return presses
+
+    def plan_sweep(self, channels: Iterable[int], end: int, start: Optional[int] = None) -> Tuple[List[int], int]:
+        """Order in which to visit channels so the total Channel Up/Down presses, including
+        the final hop to end, are as few as possible. Returns (visit order, presses).
+
+        Whatever the order, the channels visited so far form an arc of the ring around
+        start, so an interval DP over (steps down, steps up, which end we are at) is exact.
+        """
+        start = self.position if start is None else start
+        if start is None:
+            raise ValueError("Current channel is unknown")
+        targets = set(channels)
+
+        def covered(target: int, down: int, up: int) -> bool:
+            return (target - start) % self.slots <= up or (start - target) % self.slots <= down
+
+        best = {(0, 0, 0): (0, ""), (0, 0, 1): (0, "")}  # (down, up, at_up_end) -> (presses, moves)
+        finish = None
+        for span in range(self.slots):
+            for down in range(span + 1):
+                up = span - down
+                for at_up_end in (0, 1):
+                    if (down, up, at_up_end) not in best:
+                        continue
+                    presses, moves = best[(down, up, at_up_end)]
+                    here = (start + up) % self.slots if at_up_end else (start - down) % self.slots
+                    if all(covered(target, down, up) for target in targets):
+                        total = presses + self.distance(here, end)[1]
+                        if finish is None or total < finish[0]:
+                            finish = (total, moves)
+                        continue
+                    if span + 1 >= self.slots:
+                        continue
+                    for state, cost, move in (((down + 1, up, 0), 1 if not at_up_end else span + 1, "D"),
+                                              ((down, up + 1, 1), 1 if at_up_end else span + 1, "U")):
+                        if state not in best or presses + cost < best[state][0]:
+                            best[state] = (presses + cost, moves + move)
+
+        total, moves = finish
+        order = [start] if start in targets else []
+        down = up = 0
+        for move in moves:
+            if move == "D":
+                down += 1
+                slot = (start - down) % self.slots
+            else:
+                up += 1
+                slot = (start + up) % self.slots
+            if slot in targets and slot not in order:
+                order.append(slot)
+        return order, total
+
+    @staticmethod
+    def label(position: Optional[int]) -> str:
+        if position is None:
+            return "Unknown"
+        if position == ALL_CHANNELS:
+            return "All Channels"
+        return f"Channel {position}"
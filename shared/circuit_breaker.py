@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a controller whose circuit is open"""
+
+class CircuitBreaker:
+    """Health of one controller: closed (calls go through), open (calls fail at once) or half-open (one trial call).
+
+    failure_threshold consecutive failures open the circuit. It stays open for
+    open_delay seconds, doubling (up to max_open_delay) each time a half-open
+    trial fails, with jitter so many dead controllers don't all retry in the
+    same sweep. A successful call closes it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_delay: float = 15, max_open_delay: float = 300):
+        self.failure_threshold = failure_threshold
+        self.open_delay = open_delay
+        self.max_open_delay = max_open_delay
+        self.state = CLOSED
+        self.failures = 0  # Consecutive failures
+        self.opens = 0  # Times opened since the last success
+        self.open_until = None  # time.monotonic() deadline of the open state
+        self.retry_at = None  # The same deadline as wall-clock time, for display
+        self.last_error = None
+        self.last_failure = None
+        self.last_success = None
+        self.rejected = 0  # Calls not made because the circuit was open
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; an open circuit whose delay has passed lets one trial through"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            if self.state == CLOSED:
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opens = 0
+            self.open_until = None
+            self._trial_running = False
+            self.last_success = datetime.now()
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            self.last_failure = datetime.now()
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = min(self.max_open_delay, self.open_delay * 2 ** self.opens)
+                delay *= random.uniform(0.5, 1.0)
+                self.open_until = time.monotonic() + delay
+                self.retry_at = datetime.now() + timedelta(seconds=delay)
+                self.opens += 1
+                self.state = OPEN
+            self._trial_running = False
+
+    def retry_in(self) -> Optional[float]:
+        """Seconds until an open circuit lets a trial call through"""
+        if self.state != OPEN:
+            return None
+        return max(0.0, self.open_until - time.monotonic())
+
+    def to_dict(self) -> Dict[str, Any]:
+        retry_in = self.retry_in()
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opens': self.opens,
+            'retry_in': round(retry_in, 1) if retry_in is not None else None,
+            'retry_at': self.retry_at.isoformat(timespec='seconds') if retry_in is not None else None,
+            'rejected': self.rejected,
+            'last_error': self.last_error,
+            'last_failure': self.last_failure.isoformat() if self.last_failure else None,
+            'last_success': self.last_success.isoformat() if self.last_success else None
+        }
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of first attempts, so retrying can't multiply an outage.
+
+    Every first attempt adds ratio tokens and every retry takes a whole one; the
+    bucket holds at most reserve tokens, which is also the burst allowed at start.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: float = 10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self.allowed = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.allowed += 1
+                return True
+            self.denied += 1
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'ratio': self.ratio, 'reserve': self.reserve, 'tokens': round(self.tokens, 2),
+                'allowed': self.allowed, 'denied': self.denied}
+
+class ControllerHealth:
+    """A circuit breaker per controller plus one retry budget shared by all of them.
+
+    call() skips controllers whose circuit is open (raising CircuitOpen at
+    once), and retries a failed call with jittered exponential backoff while
+    the budget, the circuit and the caller's deadline allow.
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_delay: float = 15, max_open_delay: float = 300,
+                 max_retries: int = 2, retry_delay: float = 0.2, budget: Optional[RetryBudget] = None):
+        self.failure_threshold = failure_threshold
+        self.open_delay = open_delay
+        self.max_open_delay = max_open_delay
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.budget = budget or RetryBudget()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        key = url.rstrip('/')
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.open_delay, self.max_open_delay)
+                self._breakers[key] = breaker
+            return breaker
+
+    def call(self, url: str, attempt: Callable[[float], T], failed: Callable[[T], Optional[str]],
+             timeout: float, retryable: Optional[Callable[[T], bool]] = None) -> T:
+        """Run attempt(timeout_left) against url's controller.
+
+        failed(result) returns an error message when the controller could not
+        be reached or did not answer (only those count against the circuit), or
+        None. A failed result is retried unless retryable(result) is False, e.g.
+        for a command that may already have run. The result of the last attempt
+        is returned.
+        """
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpen(f"Circuit open after {breaker.failures} failures; "
+                              f"next try in {breaker.retry_in() or 0:.0f}s")
+        self.budget.deposit()
+        deadline = time.monotonic() + timeout
+        retries = 0
+        while True:
+            try:
+                result = attempt(max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                breaker.record_failure(str(e))
+                raise
+            error = failed(result)
+            if error is None:
+                breaker.record_success()
+                return result
+            breaker.record_failure(error)
+            if retryable is not None and not retryable(result):
+                return result
+
+            delay = self.retry_delay * 2 ** retries * random.uniform(0.5, 1.0)
+            if (retries >= self.max_retries or breaker.state != CLOSED
+                    or time.monotonic() + delay >= deadline or not self.budget.withdraw()):
+                return result
+            retries += 1
+            time.sleep(delay)
+
+    def forget(self, active_urls) -> None:
+        """Drop breakers of controllers that are no longer configured"""
+        active = {url.rstrip('/') for url in active_urls}
+        with self._lock:
+            for key in list(self._breakers):
+                if key not in active:
+                    del self._breakers[key]
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            'controllers': {url: breaker.to_dict() for url, breaker in breakers.items()},
+            'retry_budget': self.budget.to_dict(),
+            'failure_threshold': self.failure_threshold,
+            'max_retries': self.max_retries
+        }
@@ -0,0 +1,88 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+class CloudForecast:
+    """Hourly cloud cover forecast, linearly interpolated between the hourly points.
+
+    Built from a weatherapi.com forecast.json response. Besides the cloud cover
+    at any moment it can list when the sky is expected to cross the overcast
+    threshold, so blind moves can be scheduled ahead of the change.
+    """
+
+    def __init__(self, points: List[Tuple[datetime, float, str]], fetched_at: Optional[datetime] = None):
+        self.points = sorted(points, key=lambda point: point[0])
+        self._times = [point[0].timestamp() for point in self.points]
+        self.fetched_at = fetched_at or datetime.now(timezone.utc)
+
+    @classmethod
+    def from_weatherapi(cls, data: Dict[str, Any]) -> 'CloudForecast':
+        points = []
+        for day in data['forecast']['forecastday']:
+            for hour in day['hour']:
+                when = datetime.fromtimestamp(hour['time_epoch'], timezone.utc)
+                points.append((when, float(hour['cloud']), hour['condition']['text']))
+        if not points:
+            raise ValueError("Forecast has no hourly data")
+        return cls(points)
+
+    @property
+    def start(self) -> datetime:
+        return self.points[0][0]
+
+    @property
+    def end(self) -> datetime:
+        return self.points[-1][0]
+
+    def covers(self, when: datetime) -> bool:
+        return self.start <= when <= self.end
+
+    def cloud_at(self, when: datetime) -> Optional[float]:
+        """Interpolated cloud cover percentage at when, or None outside the forecast"""
+        if not self.covers(when):
+            return None
+        t = when.timestamp()
+        index = bisect_right(self._times, t)
+        if index >= len(self.points):
+            return self.points[-1][1]
+        t0, t1 = self._times[index - 1], self._times[index]
+        c0, c1 = self.points[index - 1][1], self.points[index][1]
+        return c0 + (c1 - c0) * (t - t0) / (t1 - t0)
+
+    def condition_at(self, when: datetime) -> Optional[str]:
+        """Condition text of the forecast hour nearest to when"""
+        if not self.covers(when):
+            return None
+        t = when.timestamp()
+        index = min(range(len(self._times)), key=lambda i: abs(self._times[i] - t))
+        return self.points[index][2]
+
+    def changes(self, start: datetime, end: datetime, threshold: float) -> List[Tuple[datetime, bool]]:
+        """Overcast state at start, then every moment up to end where the forecast crosses threshold.
+
+        Returns (time, overcast) pairs; empty if the forecast doesn't cover start.
+        """
+        cover = self.cloud_at(start)
+        if cover is None:
+            return []
+        overcast = cover >= threshold
+        changes = [(start, overcast)]
+        for (t0, c0, _), (t1, c1, _) in zip(self.points, self.points[1:]):
+            if t1 <= start or t0 >= end:
+                continue
+            if (c0 >= threshold) == (c1 >= threshold):
+                continue
+            # Where the straight line between the two hours meets the threshold
+            crossing = t0 + (t1 - t0) * ((threshold - c0) / (c1 - c0))
+            if start < crossing <= end and (c1 >= threshold) != overcast:
+                overcast = c1 >= threshold
+                changes.append((crossing, overcast))
+        return changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'fetched_at': self.fetched_at.isoformat(),
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'hours': len(self.points)
+        }
@@ -0,0 +1,240 @@
+import asyncio
+import functools
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, TypedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+class ControllerStatus(TypedDict, total=False):
+    """Payload of a controller's /api/status endpoint"""
+    location_name: str
+    remote_on: bool
+    channel_status: str
+    blinds_lowered: bool
+    standalone_mode: bool
+    channel_selection_in_progress: bool
+    version: str
+
+class CommandResult(TypedDict, total=False):
+    """Payload of a controller's /api/command endpoint"""
+    success: bool
+    error: str
+    remote_on: bool
+    job_id: str
+    status_url: str
+    job: Dict[str, Any]
+    results: List[Dict[str, Any]]
+    unreachable: bool  # The request never reached the controller (connection refused, connect timeout, ...)
+    no_answer: bool  # The request may have reached the controller, but no answer came back (read timeout, ...)
+
+def _failed_request(e: Exception) -> CommandResult:
+    """Result of a command request that raised e.
+
+    Only a request that failed while connecting is marked unreachable, since
+    only that one is certain not to have run and may be sent again.
+    """
+    reason = getattr(e.args[0], 'reason', None) if isinstance(e, requests.ConnectionError) and e.args else None
+    if isinstance(e, requests.ConnectTimeout) or isinstance(reason, NewConnectionError):
+        return {"success": False, "error": str(e), "unreachable": True}
+    return {"success": False, "error": str(e), "no_answer": True}
+
+class ControllerClient:
+    """HTTP client for a single controller that keeps its connections alive between calls"""
+
+    def __init__(self, base_url: str, timeout: float = 5, pool_maxsize: int = 4):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.poll_stats = {'full': 0, 'delta': 0, 'not_modified': 0}  # Kinds of answer poll_status() got
+
+        # One host per client, so a single pool with a few keep-alive connections is enough
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def status(self, timeout: Optional[float] = None) -> Optional[ControllerStatus]:
+        """Get the controller's status, or None if it can't be reached"""
+        try:
+            response = self.session.get(self._url('/api/status'), timeout=timeout or self.timeout)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"Error getting status from {self.base_url}: {response.status_code} {response.text}")
+                return None
+        except Exception as e:
+            print(f"Exception getting status from {self.base_url}: {e}")
+            return None
+
+    def poll_status(self, known: Optional[ControllerStatus] = None,
+                    timeout: Optional[float] = None) -> Optional[ControllerStatus]:
+        """Get the controller's status given the last one we have, or None if it can't be reached.
+
+        known's version is sent back, so an unchanged controller answers with an
+        empty 304 and a changed one with only the fields that changed; either way
+        the whole up-to-date status is returned. Controllers without versioned
+        status answer with the full status every time.
+        """
+        version = (known or {}).get('version')
+        headers = {'If-None-Match': f'"{version}"'} if version else {}
+        params = {'since': version} if version else None
+        try:
+            response = self.session.get(self._url('/api/status'), headers=headers, params=params,
+                                        timeout=timeout or self.timeout)
+
+            if response.status_code == 304:
+                self.poll_stats['not_modified'] += 1
+                return dict(known)
+            elif response.status_code == 200:
+                data = response.json()
+                if 'changes' in data:
+                    self.poll_stats['delta'] += 1
+                    return {**known, **data['changes'], 'version': data['version']}
+                self.poll_stats['full'] += 1
+                return data
+            else:
+                print(f"Error getting status from {self.base_url}: {response.status_code} {response.text}")
+                return None
+        except Exception as e:
+            print(f"Exception getting status from {self.base_url}: {e}")
+            return None
+
+    def command(self, command: str, params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> CommandResult:
+        """Send a command to the controller and return its result"""
+        try:
+            response = self.session.post(self._url('/api/command'), json={
+                "command": command,
+                "params": params or {}
+            }, timeout=timeout or self.timeout)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"Error sending command to {self.base_url}: {response.status_code} {response.text}")
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+        except Exception as e:
+            print(f"Exception sending command to {self.base_url}: {e}")
+            return _failed_request(e)
+
+    def batch(self, commands: List[Dict[str, Any]], timeout: Optional[float] = None) -> CommandResult:
+        """Run an ordered list of {'command', 'params'} steps as one sequence on the controller"""
+        try:
+            response = self.session.post(self._url('/api/batch'), json={
+                "commands": commands
+            }, timeout=timeout or self.timeout)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"Error sending batch to {self.base_url}: {response.status_code} {response.text}")
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+        except Exception as e:
+            print(f"Exception sending batch to {self.base_url}: {e}")
+            return _failed_request(e)
+
+    def submit_command(self, command: str, params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None) -> CommandResult:
+        """Hand a command to the controller for background execution.
+
+        The controller answers 202 with a job_id straight away. Controllers that
+        predate async mode run the command inline and answer 200 without one.
+        """
+        try:
+            response = self.session.post(self._url('/api/command'), json={
+                "command": command,
+                "params": params or {},
+                "async": True
+            }, timeout=timeout or self.timeout)
+
+            if response.status_code in (200, 202):
+                return response.json()
+            else:
+                print(f"Error submitting command to {self.base_url}: {response.status_code} {response.text}")
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+        except Exception as e:
+            print(f"Exception submitting command to {self.base_url}: {e}")
+            return _failed_request(e)
+
+    def job(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Get the progress of a background command, or None if it can't be read"""
+        try:
+            response = self.session.get(self._url(f'/api/jobs/{job_id}'), timeout=timeout or self.timeout)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"Error getting job {job_id} from {self.base_url}: {response.status_code}")
+                return None
+        except Exception as e:
+            print(f"Exception getting job {job_id} from {self.base_url}: {e}")
+            return None
+
+    def run_job(self, command: str, params: Optional[Dict[str, Any]] = None,
+                deadline: float = 20, poll_interval: float = 0.5) -> CommandResult:
+        """Submit a command in async mode and wait up to deadline seconds for its job to finish"""
+        start = time.monotonic()
+        # A controller without async mode runs the command inline, so allow it the whole deadline
+        accepted = self.submit_command(command, params, timeout=deadline)
+        job_id = accepted.get('job_id')
+        if not accepted.get('success') or not job_id:
+            return accepted
+
+        while True:
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            time.sleep(min(poll_interval, remaining))
+            # Each poll gets only the time left, so the call never overruns its deadline
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            job = self.job(job_id, timeout=max(0.1, min(self.timeout, remaining)))
+            if job and job.get('status') in ('succeeded', 'failed'):
+                return {"success": job['status'] == 'succeeded', "error": job.get('error'),
+                        "job_id": job_id, "job": job}
+
+        return {"success": False, "error": f"Job {job_id} did not finish within {deadline}s", "job_id": job_id}
+
+    async def status_async(self, timeout: Optional[float] = None) -> Optional[ControllerStatus]:
+        """Async flavor of status(); runs on the event loop's executor using the same pooled session"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.status, timeout))
+
+    async def command_async(self, command: str, params: Optional[Dict[str, Any]] = None,
+                            timeout: Optional[float] = None) -> CommandResult:
+        """Async flavor of command(); runs on the event loop's executor using the same pooled session"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.command, command, params, timeout))
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
+
+# Clients are shared per controller URL so every caller reuses the same connection pool
+_clients: Dict[str, ControllerClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url: str, timeout: float = 5) -> ControllerClient:
+    """Get the shared client for a controller URL, creating it on first use"""
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ControllerClient(key, timeout)
+            _clients[key] = client
+        return client
+
+def prune_clients(active_urls: Iterable[str]) -> None:
+    """Close clients for controllers that are no longer configured"""
+    active = {url.rstrip('/') for url in active_urls}
+    with _clients_lock:
+        for key in list(_clients):
+            if key not in active:
+                _clients.pop(key).close()
@@ -0,0 +1,300 @@
+import hmac
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import websocket  # websocket-client; only controllers need it, to open the link
+except ImportError:
+    websocket = None
+
+LINK_PATH = '/api/controller_link'
+
+class ControllerLink:
+    """The hub's end of one controller's WebSocket"""
+
+    def __init__(self, url: str, ws: Any, remote_addr: str):
+        self.url = url
+        self.ws = ws
+        self.remote_addr = remote_addr
+        self.connected_at = datetime.now()
+        self.last_message = self.connected_at
+        self.messages_in = 0
+        self.messages_out = 0
+        self._next_id = 0
+        self._pending = {}  # request id -> {'event', 'result'}
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self._send_lock:
+            self.ws.send(json.dumps(message))
+            self.messages_out += 1
+
+    def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send message with a new id and wait up to timeout seconds for the controller's result"""
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            waiter = {'event': threading.Event(), 'result': None}
+            self._pending[request_id] = waiter
+        try:
+            self.send({**message, 'id': request_id})
+            if not waiter['event'].wait(timeout):
+                return {"success": False, "error": f"No result over the link within {timeout}s"}
+            return waiter['result']
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def resolve(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            waiter = self._pending.get(message.get('id'))
+        if waiter is not None:
+            waiter['result'] = message.get('result') or {"success": False, "error": message.get('error')}
+            waiter['event'].set()
+
+    def fail_pending(self, error: str) -> None:
+        with self._lock:
+            waiters = list(self._pending.values())
+        for waiter in waiters:
+            waiter['result'] = {"success": False, "error": error}
+            waiter['event'].set()
+
+    def close(self) -> None:
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'remote_addr': self.remote_addr,
+            'connected_at': self.connected_at.isoformat(),
+            'last_message': self.last_message.isoformat(),
+            'messages_in': self.messages_in,
+            'messages_out': self.messages_out
+        }
+
+class LinkRegistry:
+    """Hub side: the WebSocket each controller keeps open to the hub, keyed by the controller's configured URL.
+
+    A linked controller pushes its status whenever it changes and receives
+    commands the moment the hub sends them; controllers without a link are
+    polled and sent commands over HTTP as before. A hello without the shared
+    token is refused before the controller is identified, and no link is
+    accepted while the token is empty.
+    """
+
+    def __init__(self, identify: Callable[[Dict[str, Any], str], Optional[str]],
+                 on_status: Callable[[str, Dict[str, Any]], None],
+                 on_disconnect: Optional[Callable[[str], None]] = None, heartbeat: float = 30, token: str = ''):
+        """identify(hello, remote_addr) returns the configured URL of the controller saying hello, or None"""
+        self.identify = identify
+        self.on_status = on_status
+        self.on_disconnect = on_disconnect
+        self.heartbeat = heartbeat
+        self.token = token
+        self.connects = 0
+        self.rejected = 0
+        self._links: Dict[str, ControllerLink] = {}
+        self._lock = threading.Lock()
+
+    def serve(self, ws: Any, remote_addr: str) -> None:
+        """Handle one controller's connection until it closes (runs on the connection's request thread)"""
+        try:
+            raw = ws.receive(timeout=10)
+            hello = json.loads(raw) if raw else {}
+        except ValueError:
+            hello = {}
+        if hello.get('type') != 'hello' or not self._token_valid(hello.get('token')):
+            self.rejected += 1
+            print(f"[controller-link] Rejected link from {remote_addr}: missing or wrong token")
+            ws.send(json.dumps({'type': 'error', 'error': 'Link refused'}))
+            return
+        url = self.identify(hello, remote_addr)
+        if url is None:
+            self.rejected += 1
+            print(f"[controller-link] Rejected link from {remote_addr}: unknown controller {hello.get('name')!r}")
+            ws.send(json.dumps({'type': 'error', 'error': 'Unknown controller'}))
+            return
+
+        key = url.rstrip('/')
+        link = ControllerLink(url, ws, remote_addr)
+        with self._lock:
+            previous = self._links.get(key)
+            self._links[key] = link
+            self.connects += 1
+        if previous is not None:
+            previous.close()
+        link.send({'type': 'welcome', 'url': url, 'heartbeat': self.heartbeat})
+        print(f"[controller-link] {url} connected from {remote_addr}")
+
+        try:
+            if hello.get('status'):
+                self.on_status(url, hello['status'])
+            while True:
+                # Controllers send a heartbeat after heartbeat seconds of silence
+                raw = ws.receive(timeout=self.heartbeat * 3)
+                if raw is None:
+                    print(f"[controller-link] {url} stopped sending heartbeats")
+                    break
+                message = json.loads(raw)
+                link.last_message = datetime.now()
+                link.messages_in += 1
+                kind = message.get('type')
+                if kind == 'status':
+                    self.on_status(url, message['status'])
+                elif kind == 'result':
+                    link.resolve(message)
+                elif kind == 'heartbeat':
+                    link.send({'type': 'heartbeat'})
+        except Exception as e:
+            print(f"[controller-link] {url} link closed: {e}")
+        finally:
+            with self._lock:
+                if self._links.get(key) is link:
+                    del self._links[key]
+            link.fail_pending("Link closed")
+            print(f"[controller-link] {url} disconnected")
+            if self.on_disconnect is not None:
+                self.on_disconnect(url)
+
+    def _token_valid(self, token: Any) -> bool:
+        return bool(self.token) and isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def connected(self, url: str) -> bool:
+        with self._lock:
+            return url.rstrip('/') in self._links
+
+    def command(self, url: str, command: str, params: Optional[Dict[str, Any]] = None,
+                timeout: float = 20) -> Optional[Dict[str, Any]]:
+        """Run a command over url's link and wait for its result; None if the controller has no link"""
+        with self._lock:
+            link = self._links.get(url.rstrip('/'))
+        if link is None:
+            return None
+        return link.request({'type': 'command', 'command': command, 'params': params or {}}, timeout)
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            links = {url: link.to_dict() for url, link in self._links.items()}
+        return {'connected': links, 'connects': self.connects, 'rejected': self.rejected}
+
+class HubLink:
+    """Controller side: keeps one WebSocket open to the hub, reconnecting with backoff when it drops.
+
+    hello() builds the first message of every connection. on_command(message,
+    reply) handles a command from the hub and calls reply(result) when it is
+    done. on_contact() is called for every message from the hub, so the link
+    doubles as the hub's heartbeat.
+    """
+
+    def __init__(self, url: str, hello: Callable[[], Dict[str, Any]],
+                 on_command: Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], None],
+                 on_contact: Callable[[], None], heartbeat: float = 30, max_backoff: float = 60,
+                 name: str = "hub-link"):
+        self.url = url
+        self.hello = hello
+        self.on_command = on_command
+        self.on_contact = on_contact
+        self.heartbeat = heartbeat
+        self.max_backoff = max_backoff
+        self.name = name
+        self.connected_at = None
+        self.connects = 0
+        self.last_error = None
+        self._ws = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return websocket is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        """Send message if the link is up; returns False (and drops it) otherwise"""
+        with self._lock:
+            if self._ws is None:
+                return False
+            try:
+                self._ws.send(json.dumps(message))
+                return True
+            except Exception as e:
+                print(f"[{self.name}] Send failed: {e}")
+                return False
+
+    def _run(self) -> None:
+        backoff = 1
+        while True:
+            ws = None
+            try:
+                ws = websocket.create_connection(self.url, timeout=self.heartbeat)
+                ws.send(json.dumps(self.hello()))
+                welcome = json.loads(ws.recv() or '{}')
+                if welcome.get('type') != 'welcome':
+                    raise ConnectionError(welcome.get('error') or "Hub did not accept the link")
+                with self._lock:
+                    self._ws = ws
+                self.connected_at = datetime.now()
+                self.connects += 1
+                backoff = 1
+                print(f"[{self.name}] Connected to {self.url}")
+                self.on_contact()
+                self._receive(ws)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[{self.name}] {self.url}: {e}")
+            finally:
+                with self._lock:
+                    self._ws = None
+                self.connected_at = None
+                if ws is not None:
+                    try:
+                        ws.close()
+                    except Exception:
+                        pass
+            # Jittered so controllers don't all reconnect at once after a hub restart
+            time.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _receive(self, ws: Any) -> None:
+        last_heard = time.monotonic()
+        while True:
+            try:
+                raw = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                if time.monotonic() - last_heard > self.heartbeat * 3:
+                    raise TimeoutError("Hub stopped answering heartbeats")
+                self.send({'type': 'heartbeat'})
+                continue
+            if not raw:
+                raise ConnectionError("Hub closed the link")
+            last_heard = time.monotonic()
+            self.on_contact()
+            message = json.loads(raw)
+            if message.get('type') == 'command':
+                request_id = message.get('id')
+                self.on_command(message, lambda result: self.send({'type': 'result', 'id': request_id,
+                                                                    'result': result}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'available': self.available,
+            'connected': self.connected,
+            'connected_at': self.connected_at.isoformat() if self.connected_at else None,
+            'connects': self.connects,
+            'last_error': self.last_error
+        }
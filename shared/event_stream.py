@@ -0,0 +1,125 @@
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+from flask import Response
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """JSON merge patch (RFC 7386) that turns old into new; None for a key means it was removed"""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    patch = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            patch[key] = merge_patch(old[key], value) if isinstance(value, dict) else value
+    return patch
+
+class _Client:
+    def __init__(self, max_queue: int):
+        self.queue = queue.Queue(max_queue)
+        self.lagging = False  # Missed patches; gets the full state again instead
+
+class EventStream:
+    """Latest state of a page, streamed to browsers as Server-Sent Events.
+
+    publish() is given the whole state each time and sends connected browsers
+    only what changed, as a merge patch; nothing is sent when nothing changed.
+    A browser that connects (or reconnects) first receives the full state. A
+    browser that falls too far behind is sent the full state again rather than
+    holding up everybody else.
+    """
+
+    def __init__(self, name: str = "events", keepalive: float = 15.0, max_queue: int = 32,
+                 max_clients: int = 50):
+        self.name = name
+        self.keepalive = keepalive  # Seconds between comments that keep idle connections open
+        self.max_queue = max_queue
+        self.max_clients = max_clients  # Each stream holds a server thread
+        self.state = None
+        self.version = 0
+        self._clients = set()
+        self._lock = threading.Lock()
+        self.stats = {'published': 0, 'unchanged': 0, 'resyncs': 0, 'rejected': 0}
+
+    def publish(self, state: Dict[str, Any]) -> bool:
+        """Send the changes from the previous state to every browser; returns False if nothing changed"""
+        # Round trip through JSON so the stored state can't be changed by the caller and always serializes
+        state = json.loads(json.dumps(state, default=str))
+        with self._lock:
+            if state == self.state:
+                self.stats['unchanged'] += 1
+                return False
+            patch = merge_patch(self.state, state) if self.state is not None else state
+            event = 'patch' if self.state is not None else 'state'
+            self.version += 1
+            self.state = state
+            self.stats['published'] += 1
+            frame = self._frame(event, self.version, patch)
+            for client in self._clients:
+                if client.lagging:
+                    continue
+                try:
+                    client.queue.put_nowait(frame)
+                except queue.Full:
+                    client.lagging = True
+            return True
+
+    @staticmethod
+    def _frame(event: str, version: int, data: Any) -> str:
+        return f"id: {version}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+    def _full_state(self, client: _Client) -> Optional[str]:
+        with self._lock:
+            client.lagging = False
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            if self.state is None:
+                return None
+            return self._frame('state', self.version, self.state)
+
+    def stream(self) -> Iterator[str]:
+        """SSE frames for one browser, ending when it disconnects"""
+        client = _Client(self.max_queue)
+        with self._lock:
+            self._clients.add(client)
+        try:
+            yield "retry: 3000\n\n"
+            frame = self._full_state(client)
+            if frame:
+                yield frame
+            while True:
+                if client.lagging:
+                    self.stats['resyncs'] += 1
+                    frame = self._full_state(client)
+                    if frame:
+                        yield frame
+                try:
+                    yield client.queue.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._clients.discard(client)
+
+    def response(self) -> Response:
+        """Streaming response for a browser's EventSource"""
+        with self._lock:
+            full = len(self._clients) >= self.max_clients
+        if full:
+            # The page falls back to reloading itself now and then instead of live updates
+            self.stats['rejected'] += 1
+            return Response("Too many live connections", status=503, mimetype='text/plain')
+        response = Response(self.stream(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Don't let a reverse proxy hold events back
+        return response
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'version': self.version, 'clients': len(self._clients), 'stats': dict(self.stats)}
@@ -0,0 +1,133 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+class ControllerOutcome:
+    """Result of a single controller call within a fan-out"""
+
+    def __init__(self, name: str, url: str, success: bool, latency: Optional[float],
+                 response: Any = None, error: Optional[str] = None, timed_out: bool = False):
+        self.name = name
+        self.url = url
+        self.success = success
+        self.latency = latency
+        self.response = response
+        self.error = error
+        self.timed_out = timed_out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'url': self.url,
+            'success': self.success,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'error': self.error,
+            'timed_out': self.timed_out
+        }
+
+class FanOutResult:
+    """Aggregate of all controller outcomes for one fan-out"""
+
+    def __init__(self, label: str, started_at: datetime, duration: float, outcomes: List[ControllerOutcome]):
+        self.label = label
+        self.started_at = started_at
+        self.duration = duration
+        self.outcomes = outcomes
+
+    @property
+    def succeeded(self) -> List[ControllerOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.success]
+
+    @property
+    def failed(self) -> List[ControllerOutcome]:
+        return [outcome for outcome in self.outcomes if not outcome.success]
+
+    @property
+    def timed_out(self) -> List[ControllerOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.timed_out]
+
+    @property
+    def all_succeeded(self) -> bool:
+        return not self.failed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'label': self.label,
+            'started_at': self.started_at.isoformat(),
+            'duration': round(self.duration, 3),
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'controllers': [outcome.to_dict() for outcome in self.outcomes]
+        }
+
+class FanOut:
+    """Run one call against many controllers with bounded concurrency and a per-controller deadline"""
+
+    def __init__(self, max_workers: int = 8, deadline: float = 20.0):
+        self.max_workers = max(1, int(max_workers))
+        self.deadline = float(deadline)
+
+    def _timed_call(self, call: Callable[[dict, float], Any], controller: dict, deadline: float) -> ControllerOutcome:
+        start = time.monotonic()
+        try:
+            response = call(controller, deadline)
+            error = None
+            if isinstance(response, dict):
+                success = bool(response.get('success', True))
+                if not success:
+                    error = response.get('error')
+            else:
+                success = bool(response)
+        except Exception as e:
+            response = None
+            success = False
+            error = str(e)
+        latency = time.monotonic() - start
+
+        timed_out = latency > deadline
+        if timed_out:
+            success = False
+            error = error or f"Deadline of {deadline:.1f}s exceeded"
+
+        return ControllerOutcome(controller.get('name', controller.get('url')), controller.get('url'),
+                                 success, latency, response, error, timed_out)
+
+    def run(self, controllers: List[dict], call: Callable[[dict, float], Any],
+            label: str = "fan-out", deadline: Optional[float] = None,
+            overall_deadline: Optional[float] = None) -> FanOutResult:
+        """Call call(controller, timeout) for every controller and aggregate the outcomes.
+
+        At most max_workers calls run at once. Each call is given the per-controller
+        deadline as its timeout; calls that have not returned once every worker slot
+        has had its deadline (or once overall_deadline has passed, if given) are
+        reported as timed out.
+        """
+        deadline = self.deadline if deadline is None else float(deadline)
+        started_at = datetime.now()
+        start = time.monotonic()
+
+        if not controllers:
+            return FanOutResult(label, started_at, 0.0, [])
+
+        workers = min(self.max_workers, len(controllers))
+        waves = -(-len(controllers) // workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fanout')
+        futures = [executor.submit(self._timed_call, call, controller, deadline) for controller in controllers]
+
+        if overall_deadline is None:
+            # Every wave of workers gets one deadline, plus a small grace for scheduling
+            overall_deadline = waves * deadline + 1.0
+        wait(futures, timeout=overall_deadline)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        outcomes = []
+        for controller, future in zip(controllers, futures):
+            if future.done() and not future.cancelled():
+                outcomes.append(future.result())
+            else:
+                outcomes.append(ControllerOutcome(controller.get('name', controller.get('url')), controller.get('url'),
+                                                  False, None, error=f"Deadline of {overall_deadline:.1f}s exceeded",
+                                                  timed_out=True))
+
+        return FanOutResult(label, started_at, time.monotonic() - start, outcomes)
@@ -1,6 +1,13 @@
 import time
+import functools
 import threading
-from typing import Dict, Callable, Optional
+from typing import Any, Dict, Callable, List, Optional
+
+from .actuator import Actuator, Preempted, PRIORITY_NORMAL, PRIORITY_STOP
+from .channel_navigator import ALL_CHANNELS, ChannelNavigator
+from .pin_events import (PinEvents, PinEventsUnavailable, RPiGPIOPinEvents, GpiozeroPinEvents,
+                         LgpioPinEvents)
+from .versioned_state import VersionedState
 
 # Multi-library GPIO support for maximum compatibility
 GPIO_LIBRARY = None
@@ -41,16 +48,42 @@ except Exception as e:
             GPIO_AVAILABLE = False
             print("GPIO: All GPIO libraries failed - running in test mode")
 
+def _actuated(priority: int = PRIORITY_NORMAL, preemptible: bool = False, preempts: bool = False,
+              interrupted: Callable[[], Any] = lambda: False):
+    """Run the decorated GPIOController method on the actuator thread and wait for it.
+
+    A preemptible method that a Stop cancels while it is still queued returns
+    interrupted() instead of raising Preempted, like one interrupted mid-sequence.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return self.actuator.run(lambda: method(self, *args, **kwargs), priority, method.__name__,
+                                         preemptible=preemptible, preempts=preempts)
+            except Preempted:
+                if not preemptible:
+                    raise
+                print(f"{method.__name__} cancelled by Stop before it started")
+                return interrupted()
+        return wrapper
+    return decorator
+
 class GPIOController:
     """GPIO controller for blind remote control - supports multiple GPIO libraries"""
     
-    def __init__(self, remote_power_pin: int, button_pins: Dict[str, int], test_mode: bool = False, default_channel: int = 0):
+    def __init__(self, remote_power_pin: int, button_pins: Dict[str, int], test_mode: bool = False, default_channel: int = 0,
+                 max_queue: int = 8, channel_press_duration: float = 0.8, channel_press_gap: float = 0.5,
+                 channel_wake_timeout: float = 5.0):
         self.remote_power_pin = remote_power_pin
         self.button_pins = button_pins
         self.remote_on = False
         self.channel_status = "All Channels"
         self.channel_selection_in_progress = False
         self.blinds_lowered = False
+        # The same four values with a version that moves on with every change, for conditional status requests
+        self.state = VersionedState(remote_on=False, channel_status="All Channels",
+                                    channel_selection_in_progress=False, blinds_lowered=False)
         self.test_mode = test_mode or not GPIO_AVAILABLE
         self.default_channel = default_channel  # 0 = All Channels, 1-16 = specific channel
         self.gpio_library = GPIO_LIBRARY
@@ -59,6 +92,20 @@ class GPIOController:
         self.gpio_devices = {}
         self.lgpio_handle = None
         
+        # Every press sequence runs on this single worker, which owns the pins
+        self.actuator = Actuator(max_queue)
+        
+        # Tracks the remote's channel so selection can step there directly
+        self.navigator = ChannelNavigator(wake_timeout=channel_wake_timeout)
+        self.channel_press_duration = channel_press_duration
+        self.channel_press_gap = channel_press_gap
+        
+        # Set whenever remote_on changes; wakes the event-driven monitor
+        self._state_changed = threading.Event()
+        self._state_listeners = []  # Called with this controller after any power/channel/selection/blinds change
+        self.pin_events = None
+        self.monitoring_mode = None
+        
         # Initialize GPIO only if not in test mode
         if not self.test_mode:
             print(f"GPIO: Initializing {self.gpio_library} GPIO control")
@@ -150,6 +197,10 @@ class GPIOController:
                 except:
                     pass
                 lgpio.gpio_claim_output(self.lgpio_handle, pin, 1 if value else 0)
+            
+            # We are the only writer of the power pin, so every write is a state change to report
+            if pin == self.remote_power_pin:
+                self._set_remote_state(value)
         except Exception as e:
             print(f"GPIO: Error setting pin {pin} to {value}: {e}")
     
@@ -203,16 +254,79 @@ class GPIOController:
         if self.test_mode:
             return  # In test mode, we control the state manually
             
-        actual_state = self.check_remote_power_state()
-        if self.remote_on != actual_state:
-            self.remote_on = actual_state
+        self._set_remote_state(self.check_remote_power_state())
+    
+    def _set_remote_state(self, state: bool) -> None:
+        """Record the remote's power state and wake the monitor if it changed"""
+        if self.remote_on != state:
+            self.remote_on = state
+            self.state.update(remote_on=state)
             print(f"Remote state updated to: {'ON' if self.remote_on else 'OFF'}")
+            self._state_changed.set()
+            self._notify_state_listeners()
+    
+    def add_state_listener(self, listener: Callable[['GPIOController'], None]) -> None:
+        """Call listener whenever remote_on, channel_status, channel_selection_in_progress or blinds_lowered changes.
+        
+        Listeners may run on the actuator thread, so they must return quickly.
+        """
+        self._state_listeners.append(listener)
+    
+    def _notify_state_listeners(self) -> None:
+        for listener in self._state_listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                print(f"State listener failed: {e}")
+    
+    def _set_channel_status(self, status: str) -> None:
+        if self.channel_status != status:
+            self.channel_status = status
+            self.state.update(channel_status=status)
+            self._notify_state_listeners()
+    
+    def _set_selection_in_progress(self, in_progress: bool) -> None:
+        if self.channel_selection_in_progress != in_progress:
+            self.channel_selection_in_progress = in_progress
+            self.state.update(channel_selection_in_progress=in_progress)
+            self._notify_state_listeners()
+    
+    def _set_blinds_lowered(self, lowered: bool) -> None:
+        if self.blinds_lowered != lowered:
+            self.blinds_lowered = lowered
+            self.state.update(blinds_lowered=lowered)
+            self._notify_state_listeners()
+    
+    def _dispatch(self, fn: Callable[[], Any], name: str, wait: bool, priority: int = PRIORITY_NORMAL,
+                  preemptible: bool = False, preempts: bool = False) -> Any:
+        """Hand fn to the actuator, waiting for it if asked or if already on the actuator thread.
+        
+        Raises ActuatorBusy when the actuator queue is full.
+        """
+        if wait or self.actuator.on_actuator_thread:
+            return self.actuator.run(fn, priority, name, preemptible, preempts)
+        self.actuator.submit(fn, priority, name, preemptible, preempts)
+        return None
+    
+    def press_button(self, button_name: str, wait: bool = False) -> bool:
+        """Queue a single button press; Stop jumps the queue and cancels pending or running Up/Down moves"""
+        if button_name not in self.button_pins:
+            return False
+        
+        if button_name == "Stop":
+            self._dispatch(lambda: self.press_button_action(button_name), "press Stop", wait,
+                           PRIORITY_STOP, preempts=True)
+        else:
+            self._dispatch(lambda: self.press_button_action(button_name), f"press {button_name}", wait,
+                           preemptible=button_name in ("Up", "Down"))
+        return True
     
     def press_button_action(self, button_name: str, duration: float = 0.8) -> bool:
-        """Press a button for specified duration"""
+        """Press a button for specified duration (runs on the calling thread; use press_button from outside the actuator)"""
         if self.test_mode:
             print(f"[TEST MODE] Pressed {button_name} button for {duration}s")
             time.sleep(0.1)  # Brief delay to simulate button press
+            self.navigator.record_press(button_name)
             return True
             
         if button_name in self.button_pins:
@@ -220,26 +334,85 @@ class GPIOController:
             self._set_pin_output(pin, False)  # Press button (LOW)
             time.sleep(duration)
             self._set_pin_input(pin)  # Release button (back to input with pull-up)
+            self.navigator.record_press(button_name)
             print(f"Pressed {button_name} button for {duration}s")
             return True
         return False
     
-    def select_all_channels(self) -> None:
-        """Select all channels by pressing Channel Down button"""
+    def _power_up(self) -> None:
+        """Switch the remote on and wait for it to initialize (actuator thread only)"""
         if self.test_mode:
-            print("[TEST MODE] All channels selected")
-            self.channel_status = "All Channels"
+            self._set_remote_state(True)
+            time.sleep(1)  # Simulate initialization time
+        else:
+            # Reset all button pins before turning on
+            for pin in self.button_pins.values():
+                self._set_pin_input(pin)
+            self._set_pin_output(self.remote_power_pin, True)  # Turn on
+            time.sleep(3)  # Wait for remote to initialize
+            self.update_remote_state()
+        self.navigator.powered_on()
+        self._set_channel_status(self.navigator.label(self.navigator.position))
+    
+    def _power_down(self) -> None:
+        """Switch the remote off (actuator thread only)"""
+        if self.test_mode:
+            self._set_remote_state(False)
+        else:
+            self._set_pin_output(self.remote_power_pin, False)  # Turn off
+            self.update_remote_state()
+        self.navigator.powered_off()
+    
+    def _navigate_to(self, target: int) -> None:
+        """Step the remote to a channel slot along the shortest path (actuator thread only).
+        
+        The remote is only power cycled when it is off or its channel is unknown.
+        All Channels is reached with a single long Channel Down press from any
+        channel, as the remote has always been driven: where the All Channels slot
+        sits in the Channel Up/Down ring hasn't been checked on the real remote.
+        """
+        if target == ALL_CHANNELS:
+            if not self.check_remote_power_state():
+                self._power_up()
+            self.press_button_action("Channel Down", 1)  # A 1 second press jumps to All Channels
+            self.navigator.position = ALL_CHANNELS
+            self._set_channel_status(self.navigator.label(ALL_CHANNELS))
             return
-            
-        def press_release():
-            pin = self.button_pins["Channel Down"]
-            self._set_pin_output(pin, False)  # Press button (LOW)
-            time.sleep(1)  # 1 second press
-            self._set_pin_input(pin)  # Release button
         
-        threading.Thread(target=press_release).start()
-        self.channel_status = "All Channels"
-        print("All channels selected")
+        if not self.check_remote_power_state() or not self.navigator.known:
+            print("Resyncing remote channel with a power cycle")
+            if self.check_remote_power_state():
+                self._power_down()
+                time.sleep(2)
+            self._power_up()
+        
+        presses = self.navigator.plan(target)
+        for index, button in enumerate(presses):
+            self.press_button_action(button, self.channel_press_duration)
+            if index < len(presses) - 1:
+                time.sleep(self.channel_press_gap)
+        self._set_channel_status(self.navigator.label(self.navigator.position))
+    
+    def _select(self, target: int, name: str, wait: bool) -> None:
+        """Navigate to a channel slot on the actuator, in the background unless wait is set"""
+        self._set_selection_in_progress(True)
+        
+        def navigate():
+            try:
+                self._navigate_to(target)
+            finally:
+                self._set_selection_in_progress(False)
+                print(f"Channel selection complete: {self.channel_status}")
+        
+        try:
+            self._dispatch(navigate, name, wait)
+        except Exception:
+            self._set_selection_in_progress(False)
+            raise
+    
+    def select_all_channels(self, wait: bool = False) -> None:
+        """Select All Channels (in the background unless wait is set)"""
+        self._select(ALL_CHANNELS, "select_all_channels", wait)
     
     def select_default_channel(self) -> None:
         """Select the configured default channel"""
@@ -250,84 +423,99 @@ class GPIOController:
             # Select specific channel
             self.select_channel(self.default_channel)
     
+    @_actuated()
     def toggle_remote_power(self) -> bool:
         """Toggle remote power on/off"""
-        if self.test_mode:
-            self.remote_on = not self.remote_on
-            if self.remote_on:
-                time.sleep(1)  # Simulate initialization time
-                self.select_default_channel()
-            print(f"[TEST MODE] Remote power: {'ON' if self.remote_on else 'OFF'}")
-            return self.remote_on
-            
         if self.remote_on:
-            self._set_pin_output(self.remote_power_pin, False)  # Turn off
+            self._power_down()
         else:
-            # Reset all button pins before turning on
-            for pin in self.button_pins.values():
-                self._set_pin_input(pin)
-            self._set_pin_output(self.remote_power_pin, True)  # Turn on
-            time.sleep(3)  # Wait for remote to initialize
+            self._power_up()
             self.select_default_channel()
         
+        if self.test_mode:
+            print(f"[TEST MODE] Remote power: {'ON' if self.remote_on else 'OFF'}")
+            return self.remote_on
+        
         time.sleep(0.1)  # Small delay to allow GPIO state to settle
         self.update_remote_state()
         return self.remote_on
     
+    def go_to_all_channels(self, wait: bool = True) -> None:
+        """Select All Channels (blocking unless wait is cleared)"""
+        self.select_all_channels(wait)
+    
+    def resync_channel(self, wait: bool = True) -> None:
+        """Power cycle the remote to recover a known channel, then return to the default channel"""
+        self.navigator.invalidate()
+        self._select(self.default_channel, "resync_channel", wait)
+    
+    @_actuated()
     def power_on_remote(self) -> None:
         """Ensure remote is powered on"""
-        if self.test_mode:
-            if not self.remote_on:
-                self.remote_on = True
-                time.sleep(1)  # Simulate initialization
-                self.select_default_channel()
-                print("[TEST MODE] Remote powered on")
-            return
-            
         if not self.check_remote_power_state():
-            for pin in self.button_pins.values():
-                self._set_pin_input(pin)
-            self._set_pin_output(self.remote_power_pin, True)
-            time.sleep(3)  # Wait for remote to initialize
+            self._power_up()
             self.select_default_channel()
-            time.sleep(1)
+            if self.test_mode:
+                print("[TEST MODE] Remote powered on")
+            else:
+                time.sleep(1)
     
-    def lower_blinds(self) -> bool:
-        """Lower the blinds"""
+    @_actuated(preemptible=True)
+    def lower_blinds(self, progress: Optional[Callable[[int, int], None]] = None, power_on: bool = True) -> bool:
+        """Lower the blinds, reporting progress(press, total_presses) after each press"""
         print("[TEST MODE] Lowering blinds" if self.test_mode else "Lowering blinds")
-        self.power_on_remote()
-        for attempt in range(3):
-            self.press_button_action("Down")
-            if attempt < 2:
-                time.sleep(3)
-        self.blinds_lowered = True
+        if power_on:
+            self.power_on_remote()
+        try:
+            for attempt in range(3):
+                self.actuator.check_preempted()
+                self.press_button_action("Down")
+                if progress:
+                    progress(attempt + 1, 3)
+                if attempt < 2:
+                    self.actuator.sleep(3)
+        except Preempted:
+            print("Lowering blinds interrupted by Stop")
+            return False
+        self._set_blinds_lowered(True)
         print("STATE: DOWN (controller)")
         print("[TEST MODE] Blinds lowered" if self.test_mode else "Blinds lowered")
         return True
     
-    def raise_blinds(self) -> bool:
-        """Raise the blinds"""
+    @_actuated(preemptible=True)
+    def raise_blinds(self, progress: Optional[Callable[[int, int], None]] = None, power_on: bool = True) -> bool:
+        """Raise the blinds, reporting progress(press, total_presses) after each press"""
         print("[TEST MODE] Raising blinds" if self.test_mode else "Raising blinds")
-        self.power_on_remote()
+        if power_on:
+            self.power_on_remote()
         # Send three Up presses spaced out to ensure reception
-        for attempt in range(3):
-            self.press_button_action("Up")
-            if attempt < 2:
-                time.sleep(3)
-        self.blinds_lowered = False
+        try:
+            for attempt in range(3):
+                self.actuator.check_preempted()
+                self.press_button_action("Up")
+                if progress:
+                    progress(attempt + 1, 3)
+                if attempt < 2:
+                    self.actuator.sleep(3)
+        except Preempted:
+            print("Raising blinds interrupted by Stop")
+            return False
+        self._set_blinds_lowered(False)
         print("STATE: UP (controller)")
         print("[TEST MODE] Blinds raised" if self.test_mode else "Blinds raised")
         return True
     
-    def stop_blinds(self) -> bool:
+    @_actuated(PRIORITY_STOP, preempts=True)
+    def stop_blinds(self, power_on: bool = True) -> bool:
         """Stop the blinds"""
         print("[TEST MODE] Stopping blinds" if self.test_mode else "Stopping blinds")
-        self.power_on_remote()
+        if power_on:
+            self.power_on_remote()
         self.press_button_action("Stop")
         print("[TEST MODE] Blinds stopped" if self.test_mode else "Blinds stopped")
         return True
     
-    def pair_remote(self) -> None:
+    def pair_remote(self, wait: bool = False) -> None:
         """Pair the remote (hold Up button for 5 seconds)"""
         if self.test_mode:
             print("[TEST MODE] Pairing remote (holding Up button for 5 seconds)")
@@ -341,55 +529,161 @@ class GPIOController:
                 time.sleep(5)  # Hold for 5 seconds
                 self._set_pin_input(pin)
                 print("Held Up button for 5 seconds (Pairing)")
-            threading.Thread(target=press_hold_release).start()
+            self._dispatch(press_hold_release, "pair_remote", wait)
     
-    def select_channel(self, channel: int) -> None:
-        """Select a specific channel (1-16)"""
+    def select_channel(self, channel: int, wait: bool = False) -> None:
+        """Select a specific channel (1-16), in the background unless wait is set"""
         if channel < 1 or channel > 16:
             channel = 1
+        self._select(channel, f"select_channel {channel}", wait)
+    
+    @_actuated(preemptible=True, interrupted=lambda: {'results': [], 'success': False, 'error': "Interrupted by Stop"})
+    def sweep(self, channels: List[int], action: str,
+              progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Run action once on each channel in a single pass, then return to the default channel.
+        
+        Channels are visited in the order that needs the fewest Channel Up/Down
+        presses. The sweep stops at the first channel that fails or is interrupted
+        by Stop, leaving the remote where it is.
+        """
+        actions = {
+            'lower_blinds': self.lower_blinds,
+            'raise_blinds': self.raise_blinds,
+            'stop_blinds': self.stop_blinds
+        }
+        if action not in actions:
+            raise ValueError(f"Unknown sweep action: {action}")
         
-        self.channel_status = f"Channel {channel}"
-        self.channel_selection_in_progress = True
+        self.power_on_remote()
+        if not self.navigator.known:
+            self._navigate_to(self.default_channel)  # Resync before planning
+        order, presses = self.navigator.plan_sweep(channels, self.default_channel)
+        print(f"Sweep {action}: channels {order} ({presses} channel presses)")
         
-        def navigate_to_channel():
+        results = []
+        for index, channel in enumerate(order):
+            start = time.monotonic()
             try:
-                if self.test_mode:
-                    print(f"[TEST MODE] Selecting channel {channel}")
-                    time.sleep(2)  # Simulate channel selection time
-                    self.channel_status = f"Channel {channel}"
-                    return
-                
-                # Cut power to the remote
-                self._set_pin_output(self.remote_power_pin, False)
-                time.sleep(2)  # Wait for 2 seconds
-                
-                # Turn power back on
-                for pin in self.button_pins.values():
-                    self._set_pin_input(pin)
-                self._set_pin_output(self.remote_power_pin, True)
-                time.sleep(3)  # Wait for remote to initialize
+                self.actuator.check_preempted()
+                self._navigate_to(channel)
+                success = actions[action](power_on=False)
+                error = None if success else "Interrupted by Stop"
+            except Preempted:
+                success, error = False, "Interrupted by Stop"
+            except Exception as e:
+                success, error = False, str(e)
+            
+            results.append({
+                'channel': channel,
+                'success': success,
+                'error': error,
+                'duration': round(time.monotonic() - start, 3)
+            })
+            if progress:
+                progress(index + 1, len(order))
+            if not success:
+                print(f"Sweep stopped at channel {channel}: {error}")
+                break
+        else:
+            self._navigate_to(self.default_channel)
+        
+        return {
+            'order': order,
+            'channel_presses': presses,
+            'results': results,
+            'success': len(results) == len(order) and all(result['success'] for result in results)
+        }
+    
+    @_actuated()
+    def run_batch(self, steps: List[Dict[str, Any]],
+                  progress: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+        """Run an ordered list of {'command', 'params'} steps as one sequence on the remote.
+        
+        The remote's power is checked at most once for the whole batch, and steps
+        that would not change anything (re-selecting the current channel, a stop
+        right after a stop) are skipped. Returns one result per step.
+        """
+        results = []
+        powered = False
+        previous = None
+        
+        for index, step in enumerate(steps):
+            command = step.get('command')
+            params = step.get('params') or {}
+            start = time.monotonic()
+            skipped = False
+            error = None
+            
+            try:
+                if command in ('lower_blinds', 'raise_blinds', 'stop_blinds') and not powered:
+                    self.power_on_remote()
+                    powered = True
                 
-                # Channel 1 is the default after power on
-                if channel == 1:
-                    pass  # No need to press any buttons
-                elif channel <= 8:
-                    # For channels 2-8, press Channel Up channel times
-                    for _ in range(channel):
-                        self.press_button_action("Channel Up")
-                        time.sleep(0.5)
+                if command == 'lower_blinds':
+                    success = self.lower_blinds(power_on=False)
+                elif command == 'raise_blinds':
+                    success = self.raise_blinds(power_on=False)
+                elif command == 'stop_blinds':
+                    skipped = previous == 'stop_blinds'
+                    success = True if skipped else self.stop_blinds(power_on=False)
+                elif command == 'select_channel':
+                    channel = params['channel']
+                    skipped = self.channel_status == f"Channel {channel}" and self.remote_on
+                    if not skipped:
+                        self.select_channel(channel, wait=True)
+                        powered = True  # Channel selection leaves the remote powered on
+                    success = True
+                elif command == 'select_all_channels':
+                    skipped = self.channel_status == "All Channels"
+                    if not skipped:
+                        self.go_to_all_channels()
+                        powered = True
+                    success = True
+                elif command == 'sweep':
+                    self.power_on_remote()
+                    powered = True
+                    sweep = self.sweep(params['channels'], params['action'])
+                    success = sweep['success']
+                    if not success:
+                        error = next((result['error'] for result in sweep['results'] if not result['success']), None)
+                elif command == 'resync_channel':
+                    self.resync_channel()
+                    powered = True
+                    success = True
+                elif command == 'toggle_remote':
+                    self.toggle_remote_power()
+                    powered = self.remote_on
+                    success = True
                 else:
-                    # For channels 9-16, press Channel Down (19-channel) times
-                    for _ in range(19 - channel):
-                        self.press_button_action("Channel Down")
-                        time.sleep(0.5)
-            finally:
-                self.channel_selection_in_progress = False
-                print(f"Channel selection complete: {self.channel_status}")
+                    success = False
+                    error = f"Unknown command: {command}"
+            except Exception as e:
+                success = False
+                error = str(e)
+            
+            results.append({
+                'command': command,
+                'params': params,
+                'success': success,
+                'skipped': skipped,
+                'error': error,
+                'duration': round(time.monotonic() - start, 3)
+            })
+            previous = command
+            if progress:
+                progress(index + 1, len(steps))
+            if not success:
+                print(f"Batch stopped at step {index + 1} ({command}): {error}")
+                break
         
-        threading.Thread(target=navigate_to_channel).start()
+        return results
     
+    @_actuated(PRIORITY_STOP, preempts=True)
     def cleanup(self) -> None:
         """Clean up GPIO resources"""
+        if self.pin_events is not None:
+            self.pin_events.close()
+        
         if self.test_mode:
             print("[TEST MODE] GPIO cleanup (simulated)")
             return
@@ -416,8 +710,65 @@ class GPIOController:
         except Exception as e:
             print(f"GPIO: Error during cleanup: {e}")
     
-    def start_monitoring(self, monitor_callback: Optional[Callable] = None) -> None:
-        """Start background monitoring of remote power state"""
+    def _create_pin_events(self) -> PinEvents:
+        """Edge notification backend for the active GPIO library"""
+        if self.test_mode:
+            return PinEvents()
+        if self.gpio_library == "RPi.GPIO":
+            return RPiGPIOPinEvents()
+        if self.gpio_library == "gpiozero":
+            devices = {self.remote_power_pin: self.gpio_devices.get('power')}
+            return GpiozeroPinEvents(devices)
+        if self.gpio_library == "lgpio":
+            return LgpioPinEvents(self.lgpio_handle)
+        return PinEvents()
+    
+    def _on_power_edge(self, level: bool) -> None:
+        self._set_remote_state(level)
+    
+    def start_monitoring(self, monitor_callback: Optional[Callable] = None, mode: str = "auto",
+                         pin_events: Optional[PinEvents] = None, reconcile_interval: float = 60.0) -> None:
+        """Start background monitoring of remote power state.
+        
+        In "event" mode monitor_callback runs only when the power state changes:
+        changes are reported by our own writes to the power pin and, where the
+        backend can watch that pin, by its edge detection. The pin is re-read
+        every reconcile_interval seconds as a safety net. "poll" mode is the
+        original once-a-second loop; "auto" uses events and falls back to polling
+        if the backend can't be set up.
+        """
+        if mode in ("auto", "event"):
+            self.pin_events = pin_events or self._create_pin_events()
+            try:
+                self.pin_events.watch(self.remote_power_pin, self._on_power_edge)
+                print(f"GPIO: Watching power pin edges with {self.pin_events.name}")
+            except PinEventsUnavailable as e:
+                # Our own power pin writes are still reported, so events remain usable
+                print(f"GPIO: {e}; relying on power pin writes")
+            except Exception as e:
+                print(f"GPIO: Edge detection setup failed: {e}")
+                if mode == "event":
+                    raise
+                mode = "poll"
+        
+        if mode in ("auto", "event"):
+            self.monitoring_mode = "event"
+            
+            def wait_for_changes():
+                while True:
+                    changed = self._state_changed.wait(reconcile_interval)
+                    self._state_changed.clear()
+                    if not changed and not self.test_mode:
+                        self.update_remote_state()  # Catch anything no edge was reported for
+                    elif changed and monitor_callback:
+                        monitor_callback(self)
+            
+            monitor_thread = threading.Thread(target=wait_for_changes, name="gpio-monitor", daemon=True)
+            monitor_thread.start()
+            return
+        
+        self.monitoring_mode = "poll"
+        
         def monitor_remote_power():
             while True:
                 if not self.test_mode:
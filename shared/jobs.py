@@ -0,0 +1,133 @@
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+class Job:
+    """A command accepted for background execution"""
+
+    def __init__(self, command: str, params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.params = params or {}
+        self.status = "queued"  # queued -> running -> succeeded/failed
+        self.step = 0
+        self.total_steps = None
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.completed_at = None
+        self.on_finish = None  # Called with the job once it has succeeded or failed
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def report_progress(self, step: int, total_steps: int, message: Optional[str] = None) -> None:
+        """Progress callback handed to the work function"""
+        self.step = step
+        self.total_steps = total_steps
+        if message:
+            self.message = message
+
+    def cancel(self, reason: str) -> None:
+        """Mark a job that never got to run as failed"""
+        if self.status == "queued":
+            self.error = reason
+            self.completed_at = datetime.now()
+            self.status = "failed"
+            self._finished()
+
+    def _finished(self) -> None:
+        if self.on_finish is not None:
+            try:
+                self.on_finish(self)
+            except Exception as e:
+                print(f"Job {self.id}: finish callback failed: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'command': self.command,
+            'params': self.params,
+            'status': self.status,
+            'step': self.step,
+            'total_steps': self.total_steps,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'duration': (self.completed_at - self.started_at).total_seconds()
+                        if self.started_at and self.completed_at else None
+        }
+
+def _run_on_thread(fn: Callable[[], None], job: Job) -> None:
+    threading.Thread(target=fn, daemon=True).start()
+
+class JobManager:
+    """Runs commands in the background and keeps a bounded history of their outcome"""
+
+    def __init__(self, max_history: int = 100,
+                 runner: Callable[[Callable[[], None], Job], Any] = _run_on_thread):
+        """runner(fn, job) schedules fn() in the background; it may raise to refuse the job"""
+        self.max_history = max_history
+        self.runner = runner
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, command: str, params: Optional[Dict[str, Any]],
+               work: Callable[[Callable[..., None]], Any],
+               on_finish: Optional[Callable[[Job], None]] = None) -> Job:
+        """Accept a command and run work(progress) in the background; on_finish(job) is called when it ends"""
+        job = Job(command, params)
+        job.on_finish = on_finish
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs once the history is full
+            while len(self._jobs) > self.max_history:
+                oldest_id = next((job_id for job_id, old in self._jobs.items() if old.finished), None)
+                if oldest_id is None:
+                    break
+                del self._jobs[oldest_id]
+
+        try:
+            self.runner(lambda: self._run(job, work), job)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def _run(self, job: Job, work: Callable[[Callable[..., None]], Any]) -> None:
+        job.status = "running"
+        job.started_at = datetime.now()
+        print(f"Job {job.id}: {job.command} started")
+        status = "failed"
+        try:
+            result = work(job.report_progress)
+            job.result = result
+            if isinstance(result, dict) and not result.get('success', True):
+                job.error = result.get('error')
+            else:
+                status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            # Pollers treat a finished status as final, so everything else is in place before it is set
+            job.completed_at = datetime.now()
+            job.status = status
+            print(f"Job {job.id}: {job.command} {job.status}")
+            job._finished()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 20) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())[-limit:]
@@ -0,0 +1,123 @@
+from typing import Any, Callable, Dict, List
+
+class PinEventsUnavailable(Exception):
+    """Raised when a backend can't report edges for a pin"""
+
+class PinEvents:
+    """Edge notifications for GPIO pins: watch(pin, callback) calls callback(level) on every change"""
+
+    name = "none"
+
+    def watch(self, pin: int, callback: Callable[[bool], None]) -> None:
+        raise PinEventsUnavailable(f"{self.name} can't report edges")
+
+    def close(self) -> None:
+        pass
+
+class RPiGPIOPinEvents(PinEvents):
+    """Edges through RPi.GPIO event detection (input pins only)"""
+
+    name = "RPi.GPIO"
+
+    def __init__(self, bouncetime: int = 50):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.bouncetime = bouncetime
+        self._pins = []
+
+    def watch(self, pin: int, callback: Callable[[bool], None]) -> None:
+        GPIO = self.GPIO
+        try:
+            GPIO.add_event_detect(pin, GPIO.BOTH, bouncetime=self.bouncetime,
+                                  callback=lambda channel: callback(GPIO.input(channel) == GPIO.HIGH))
+        except RuntimeError as e:
+            # RPi.GPIO refuses event detection on pins set up as outputs
+            raise PinEventsUnavailable(f"RPi.GPIO can't watch pin {pin}: {e}")
+        self._pins.append(pin)
+
+    def close(self) -> None:
+        for pin in self._pins:
+            try:
+                self.GPIO.remove_event_detect(pin)
+            except Exception:
+                pass
+        self._pins = []
+
+class GpiozeroPinEvents(PinEvents):
+    """Edges through gpiozero device callbacks (devices with when_activated only)"""
+
+    name = "gpiozero"
+
+    def __init__(self, devices: Dict[int, Any]):
+        self.devices = devices  # pin -> gpiozero device
+        self._watched = []
+
+    def watch(self, pin: int, callback: Callable[[bool], None]) -> None:
+        device = self.devices.get(pin)
+        if device is None or not hasattr(device, 'when_activated'):
+            raise PinEventsUnavailable(f"gpiozero has no event-capable device on pin {pin}")
+        device.when_activated = lambda: callback(True)
+        device.when_deactivated = lambda: callback(False)
+        self._watched.append(device)
+
+    def close(self) -> None:
+        for device in self._watched:
+            device.when_activated = None
+            device.when_deactivated = None
+        self._watched = []
+
+class LgpioPinEvents(PinEvents):
+    """Edges through lgpio alerts (input pins only)"""
+
+    name = "lgpio"
+
+    def __init__(self, handle: int):
+        import lgpio
+        self.lgpio = lgpio
+        self.handle = handle
+        self._callbacks = []
+
+    def watch(self, pin: int, callback: Callable[[bool], None]) -> None:
+        lgpio = self.lgpio
+        mode = lgpio.gpio_get_mode(self.handle, pin)
+        if mode < 0 or mode & 2:
+            # Claiming an alert would turn an output pin back into an input
+            raise PinEventsUnavailable(f"lgpio can only watch input pins (pin {pin})")
+        lgpio.gpio_claim_alert(self.handle, pin, lgpio.BOTH_EDGES, lgpio.SET_PULL_UP)
+
+        def on_alert(chip, gpio, level, timestamp):
+            if level in (0, 1):  # 2 is a watchdog timeout, not an edge
+                callback(level == 1)
+        self._callbacks.append(lgpio.callback(self.handle, pin, lgpio.BOTH_EDGES, on_alert))
+
+    def close(self) -> None:
+        for cb in self._callbacks:
+            cb.cancel()
+        self._callbacks = []
+
+class FakePinEvents(PinEvents):
+    """In-memory backend for exercising event-driven monitoring without hardware"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.levels = {}
+        self._callbacks = {}
+
+    def watch(self, pin: int, callback: Callable[[bool], None]) -> None:
+        self._callbacks.setdefault(pin, []).append(callback)
+
+    def set_level(self, pin: int, level: bool) -> None:
+        """Drive a pin as if it changed on the hardware, firing callbacks on a change"""
+        if self.levels.get(pin) == level:
+            return
+        self.levels[pin] = level
+        for callback in self._callbacks.get(pin, []):
+            callback(level)
+
+    @property
+    def watched_pins(self) -> List[int]:
+        return list(self._callbacks)
+
+    def close(self) -> None:
+        self._callbacks = {}
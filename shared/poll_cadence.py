@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+class PollCadence:
+    """Chooses how long to wait before the next cloud cover reading.
+
+    Far from the threshold the wait stretches towards ceiling minutes; close
+    to it, heading for it, or just after crossing it, the wait shrinks towards
+    floor minutes. Readings taken inside a window are also compared against a
+    fixed baseline interval, so calls_saved shows what the adaptive cadence
+    saved (or spent, if negative) over polling every baseline minutes.
+    """
+
+    def __init__(self, floor: float, ceiling: float, threshold: float, baseline: float, far_band: float = 30.0):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.threshold = threshold
+        self.baseline = baseline
+        self.far_band = far_band
+        self.polls = 0
+        self.warmups = 0
+        self.baseline_polls = 0.0
+        self.last_poll = None  # Time of the latest poll in the current window
+        self.last_reading = None  # (time, cloud cover) of the latest good reading
+        self.last_interval = None
+        self.last_reason = None
+        self._lock = threading.Lock()
+
+    def configure(self, floor: float, ceiling: float, threshold: float, baseline: float) -> None:
+        with self._lock:
+            self.floor = floor
+            self.ceiling = max(floor, ceiling)
+            self.threshold = threshold
+            self.baseline = baseline
+
+    def warmup(self, when: datetime, cloud_cover: Optional[float]) -> None:
+        """Record the reading taken just before the window opens; it seeds the first interval"""
+        with self._lock:
+            self.polls += 1
+            self.warmups += 1
+            self.last_poll = None
+            self.last_reading = (when, cloud_cover) if cloud_cover is not None else None
+
+    def observe(self, when: datetime, cloud_cover: Optional[float], first: bool = False) -> float:
+        """Record a reading inside the window and return the minutes to wait before the next one.
+
+        first marks the window's opening reading, which a fixed cadence would have taken too.
+        """
+        with self._lock:
+            self.polls += 1
+            if first or self.last_poll is None:
+                self.baseline_polls += 1
+            else:
+                self.baseline_polls += (when - self.last_poll).total_seconds() / 60 / self.baseline
+            self.last_poll = when
+            previous = self.last_reading
+
+            if cloud_cover is None:
+                # No reading; try again soon without forgetting the last good one
+                return self._choose(self.floor, "no reading")
+            self.last_reading = (when, cloud_cover)
+
+            distance = abs(cloud_cover - self.threshold)
+            interval = self.floor + (self.ceiling - self.floor) * min(1.0, distance / self.far_band)
+            reason = f"{distance:.0f} points from threshold"
+            if previous is not None:
+                minutes = (when - previous[0]).total_seconds() / 60
+                change = cloud_cover - previous[1]
+                if (previous[1] >= self.threshold) != (cloud_cover >= self.threshold):
+                    return self._choose(self.floor, "crossed threshold")
+                heading_in = change != 0 and (change > 0) == (cloud_cover < self.threshold)
+                if minutes > 0 and heading_in:
+                    # Check again by the time the trend would have used up half the distance
+                    eta = distance / (abs(change) / minutes)
+                    if eta / 2 < interval:
+                        interval = eta / 2
+                        reason = f"threshold in ~{eta:.0f} min at {abs(change) / minutes:.1f} points/min"
+            return self._choose(interval, reason)
+
+    def close_window(self, when: datetime) -> None:
+        """The window ended at when; a fixed cadence would have kept polling until then"""
+        with self._lock:
+            if self.last_poll is not None:
+                self.baseline_polls += max(0.0, (when - self.last_poll).total_seconds() / 60 / self.baseline)
+            self.last_poll = None
+            self.last_reading = None
+
+    def _choose(self, interval: float, reason: str) -> float:
+        self.last_interval = min(self.ceiling, max(self.floor, interval))
+        self.last_reason = reason
+        return self.last_interval
+
+    @property
+    def calls_saved(self) -> int:
+        return round(self.baseline_polls) - self.polls
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'floor': self.floor,
+                'ceiling': self.ceiling,
+                'baseline': self.baseline,
+                'polls': self.polls,
+                'warmups': self.warmups,
+                'baseline_polls': round(self.baseline_polls, 1),
+                'calls_saved': self.calls_saved,
+                'last_interval': round(self.last_interval, 1) if self.last_interval is not None else None,
+                'last_reason': self.last_reason
+            }
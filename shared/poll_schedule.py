@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+class PollSchedule:
+    """When to poll each controller next, going by what it is doing.
+
+    A controller that is selecting a channel, or was just sent a command, is
+    polled every fast seconds. One whose status changed within idle_after
+    seconds is polled every normal seconds, a quiet one every idle seconds and
+    an unreachable one every offline seconds. Each interval is jittered by
+    +/- jitter so controllers drift apart instead of being polled in lockstep.
+    """
+
+    BUCKETS = (5, 15, 30, 60, 120, 300)  # Upper bounds (seconds) of the interval histogram
+
+    def __init__(self, fast: float = 5, normal: float = 60, idle: float = 180, offline: float = 300,
+                 idle_after: float = 600, busy_window: float = 60, jitter: float = 0.2):
+        self.fast = fast
+        self.normal = normal
+        self.idle = idle
+        self.offline = offline
+        self.idle_after = idle_after
+        self.busy_window = busy_window
+        self.jitter = jitter
+        self.polls = 0
+        self.started = time.monotonic()
+        self.histogram = Counter()  # Interval bucket -> times chosen
+        self.reasons = Counter()  # busy/active/idle/offline -> times chosen
+        self._controllers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, url: str) -> Dict[str, Any]:
+        entry = self._controllers.get(url)
+        if entry is None:
+            now = time.monotonic()
+            # New controllers are spread over the first fast seconds rather than all polled at once
+            entry = {'next': now + random.uniform(0, self.fast), 'interval': None, 'reason': 'new',
+                     'changed_at': now, 'busy_until': 0.0, 'polls': 0}
+            self._controllers[url] = entry
+        return entry
+
+    def due(self, urls: Iterable[str], slack: float = 0) -> List[str]:
+        """The controllers among urls whose next poll time has come, or comes within slack seconds"""
+        now = time.monotonic()
+        with self._lock:
+            return [url for url in urls if self._entry(url)['next'] <= now + slack]
+
+    def next_due_in(self, urls: Iterable[str]) -> Optional[float]:
+        """Seconds until the first of urls is due, or None if there are none"""
+        now = time.monotonic()
+        with self._lock:
+            times = [self._entry(url)['next'] for url in urls]
+        return max(0.0, min(times) - now) if times else None
+
+    def record(self, url: str, status: Optional[Dict[str, Any]], changed: bool) -> float:
+        """Note a poll of url (status None if it failed) and schedule the next one; returns the interval"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(url)
+            if changed:
+                entry['changed_at'] = now
+            if status is None:
+                reason, interval = 'offline', self.offline
+            elif status.get('channel_selection_in_progress') or now < entry['busy_until']:
+                reason, interval = 'busy', self.fast
+            elif now - entry['changed_at'] < self.idle_after:
+                reason, interval = 'active', self.normal
+            else:
+                reason, interval = 'idle', self.idle
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+            entry.update(next=now + interval, interval=interval, reason=reason)
+            entry['polls'] += 1
+            self.polls += 1
+            self.reasons[reason] += 1
+            self.histogram[next((f"<={bound}s" for bound in self.BUCKETS if interval <= bound),
+                                f">{self.BUCKETS[-1]}s")] += 1
+            return interval
+
+    def expedite(self, url: str) -> None:
+        """url was just sent a command: poll it soon, and quickly for the next busy_window seconds"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(url)
+            entry['busy_until'] = now + self.busy_window
+            entry['next'] = min(entry['next'], now + self.fast * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def poll_now(self, url: str) -> None:
+        with self._lock:
+            self._entry(url)['next'] = time.monotonic()
+
+    def forget(self, active_urls: Iterable[str]) -> None:
+        active = set(active_urls)
+        with self._lock:
+            for url in list(self._controllers):
+                if url not in active:
+                    del self._controllers[url]
+
+    def describe(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            controllers = {url: {'interval': round(entry['interval'], 1) if entry['interval'] else None,
+                                 'reason': entry['reason'],
+                                 'next_poll_in': round(max(0.0, entry['next'] - now), 1),
+                                 'polls': entry['polls']}
+                           for url, entry in self._controllers.items()}
+            minutes = max((now - self.started) / 60, 1 / 60)
+            return {
+                'controllers': controllers,
+                'polls': self.polls,
+                'polls_per_minute': round(self.polls / minutes, 2),
+                'intervals': {bucket: self.histogram[bucket]
+                              for bucket in [f"<={bound}s" for bound in self.BUCKETS] + [f">{self.BUCKETS[-1]}s"]},
+                'reasons': dict(self.reasons)
+            }
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, time as dt_time
+from typing import Any, Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+class SchedulePlan:
+    """Lower and raise times for a rolling window of days.
+
+    Each day is planned once from its sunset and the offsets (or from the fixed
+    test-mode times) and kept until it has passed, so rolling forward a day
+    only plans the new last day. The whole plan is rebuilt only when one of the
+    settings it was built from changes.
+    """
+
+    ACTIONS = ('lower', 'raise')
+
+    def __init__(self, days: int = 7):
+        self.days = days
+        self.settings = None
+        self.built_at = None
+        self.extended_at = None
+        self._days = OrderedDict()  # date -> planned day
+        self._lock = threading.Lock()
+
+    def update(self, settings: Dict[str, Any], sunset_for: Callable[[date], datetime],
+               today: Optional[date] = None) -> bool:
+        """Bring the plan up to date for settings, starting today. Returns True if it had to be rebuilt.
+
+        settings holds timezone, lower_offset, raise_offset, test_mode,
+        test_lower_time and test_raise_time.
+        """
+        with self._lock:
+            tz = ZoneInfo(settings['timezone'])
+            today = today or datetime.now(tz).date()
+            rebuilt = settings != self.settings
+            if rebuilt:
+                self._days.clear()
+                self.settings = dict(settings)
+                self.built_at = datetime.now(tz)
+
+            for day in [day for day in self._days if day < today]:
+                del self._days[day]
+            added = 0
+            for offset in range(self.days):
+                day = today + timedelta(days=offset)
+                if day not in self._days:
+                    self._days[day] = self._plan_day(day, tz, sunset_for)
+                    added += 1
+            if added and not rebuilt:
+                self.extended_at = datetime.now(tz)
+            return rebuilt
+
+    def _plan_day(self, day: date, tz: ZoneInfo, sunset_for: Callable[[date], datetime]) -> Dict[str, Any]:
+        settings = self.settings
+        if settings['test_mode']:
+            sunset = None
+            lower = datetime.combine(day, dt_time.fromisoformat(settings['test_lower_time']), tz)
+            raise_ = datetime.combine(day, dt_time.fromisoformat(settings['test_raise_time']), tz)
+        else:
+            sunset = sunset_for(day)
+            lower = sunset - timedelta(minutes=settings['lower_offset'])
+            raise_ = sunset + timedelta(minutes=settings['raise_offset'])
+        return {'date': day, 'sunset': sunset, 'lower': lower, 'raise': raise_}
+
+    def next(self, action: str, after: datetime) -> Optional[datetime]:
+        """Earliest planned time for action ('lower' or 'raise') later than after"""
+        with self._lock:
+            for planned in self._days.values():
+                if planned[action] > after:
+                    return planned[action]
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'days': self.days,
+                'settings': self.settings,
+                'built_at': self.built_at.isoformat() if self.built_at else None,
+                'extended_at': self.extended_at.isoformat() if self.extended_at else None,
+                'plan': [{
+                    'date': planned['date'].isoformat(),
+                    'sunset': planned['sunset'].isoformat() if planned['sunset'] else None,
+                    'lower': planned['lower'].isoformat(),
+                    'raise': planned['raise'].isoformat()
+                } for planned in self._days.values()]
+            }
@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable
+
+from flask import Flask
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+SERVER_MODES = ('production', 'development')
+
+class AccessLog:
+    """WSGI middleware that prints one line per request: client, method, path, status, bytes and milliseconds.
+
+    The line is printed when the response has been sent, so streamed responses
+    (such as live event streams) are logged when they end.
+    """
+
+    def __init__(self, app: Callable, name: str = "http"):
+        self.app = app
+        self.name = name
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        start = time.monotonic()
+        response = {'status': '-'}
+
+        def logging_start_response(status, headers, exc_info=None):
+            response['status'] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, logging_start_response)
+        return _LoggedBody(body, lambda sent: self._log(environ, response['status'], sent, start))
+
+    def _log(self, environ: Dict[str, Any], status: str, sent: int, start: float) -> None:
+        path = environ.get('PATH_INFO', '')
+        if environ.get('QUERY_STRING'):
+            path = f"{path}?{environ['QUERY_STRING']}"
+        client = environ.get('HTTP_X_FORWARDED_FOR') or environ.get('REMOTE_ADDR', '-')
+        print(f"[{self.name}] {client} {datetime.now().strftime('%H:%M:%S')} "
+              f"\"{environ.get('REQUEST_METHOD')} {path}\" {status} {sent} "
+              f"{(time.monotonic() - start) * 1000:.1f}ms")
+
+class _LoggedBody:
+    def __init__(self, body: Iterable[bytes], on_close: Callable[[int], None]):
+        self._body = body
+        self._on_close = on_close
+        self._sent = 0
+
+    def __iter__(self):
+        for chunk in self._body:
+            self._sent += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._on_close(self._sent)
+
+def serve(app: Flask, host: str, port: int, mode: str = 'production', threads: int = 8,
+          connection_limit: int = 100, channel_timeout: int = 30, backlog: int = 64,
+          max_request_body_size: int = 1048576, access_log: bool = True, name: str = "http") -> None:
+    """Serve app until the process exits.
+
+    "production" uses waitress: one process with a pool of threads, so the
+    background threads the app started at import time (timers, pollers,
+    monitors) keep running exactly once alongside it. HTTP/1.1 keep-alive is
+    on; channel_timeout closes connections idle (or stalled mid-request) for
+    that many seconds. "development" is Flask's built-in server. Production
+    mode falls back to the development server if waitress is not installed.
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server mode {mode!r}; expected one of {', '.join(SERVER_MODES)}")
+    if mode == 'production' and waitress is None:
+        print(f"[{name}] waitress is not installed (pip3 install waitress); using the development server")
+        mode = 'development'
+
+    if mode == 'production':
+        print(f"[{name}] Serving on {host}:{port} with waitress ({threads} threads)")
+        wsgi_app = AccessLog(app.wsgi_app, name) if access_log else app.wsgi_app
+        waitress.serve(wsgi_app, host=host, port=port, threads=threads, connection_limit=connection_limit,
+                       channel_timeout=channel_timeout, backlog=backlog,
+                       max_request_body_size=max_request_body_size, ident=name)
+        return
+
+    # The development server logs every request itself
+    print(f"[{name}] Serving on {host}:{port} with the development server")
+    # HTTP/1.1 so clients can keep their connection alive between requests
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    app.run(host=host, port=port, threaded=True)
+
+def serve_websockets(app: Flask, host: str, port: int, name: str = "websocket") -> threading.Thread:
+    """Serve app's WebSocket routes on their own port from a background thread.
+
+    waitress cannot hand a connection over to a WebSocket, so WebSocket routes
+    get a small threaded Werkzeug server of their own (one thread per open
+    socket). Plain HTTP requests to this port work too but belong on the main
+    server.
+    """
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name=name, daemon=True)
+    thread.start()
+    print(f"[{name}] Serving WebSockets on {host}:{port}")
+    return thread
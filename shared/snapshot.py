@@ -0,0 +1,104 @@
+import copy
+import hashlib
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from flask import Request, Response
+
+class Snapshot:
+    """One immutable rendering of a page together with the state it was rendered from"""
+
+    __slots__ = ('version', 'state', 'body', 'etag', 'built_at', 'build_time')
+
+    def __init__(self, version: int, state: Mapping[str, Any], body: bytes, build_time: float):
+        self.version = version
+        self.state = MappingProxyType(state)
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+        self.built_at = datetime.now().astimezone()
+        self.build_time = build_time
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"Snapshot.{name} is read-only")
+        object.__setattr__(self, name, value)
+
+class SnapshotPublisher:
+    """Keeps the latest Snapshot of a page and swaps in a new one when rebuild() is called.
+
+    build() returns the page state and a render(state) function; it runs on
+    whichever background thread calls rebuild(), never on a request. Requests
+    read the current snapshot with a single attribute lookup and answer
+    conditional requests with 304, so serving the page costs the same no
+    matter how many browsers have it open.
+    """
+
+    def __init__(self, build: Callable[[], Tuple[Dict[str, Any], Callable[[Dict[str, Any]], str]]],
+                 name: str = "snapshot"):
+        self.name = name
+        self._build = build
+        self._current = None
+        self._version = 0
+        self._build_lock = threading.Lock()
+        self.stats = {'builds': 0, 'unchanged': 0, 'served': 0, 'not_modified': 0, 'errors': 0}
+
+    @property
+    def current(self) -> Snapshot:
+        snapshot = self._current
+        if snapshot is None:
+            # Only before the first background build has finished
+            snapshot = self.rebuild()
+        return snapshot
+
+    def rebuild(self) -> Optional[Snapshot]:
+        """Build a new snapshot and publish it; keeps the previous one if the build fails"""
+        with self._build_lock:
+            start = datetime.now()
+            try:
+                state, render = self._build()
+                state = copy.deepcopy(state)
+                body = render(state).encode('utf-8')
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"[{self.name}] Rebuild failed: {e}")
+                if self._current is None:
+                    raise
+                return self._current
+
+            previous = self._current
+            if previous is not None and previous.body == body:
+                # Nothing visible changed; keep the version and ETag browsers already have
+                self.stats['unchanged'] += 1
+                return previous
+
+            self._version += 1
+            snapshot = Snapshot(self._version, state, body, (datetime.now() - start).total_seconds())
+            self._current = snapshot
+            self.stats['builds'] += 1
+            return snapshot
+
+    def serve(self, request: Request, mimetype: str = 'text/html') -> Response:
+        """Response for the current snapshot; 304 if the browser already has it"""
+        snapshot = self.current
+        if snapshot.etag in request.if_none_match:
+            self.stats['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            self.stats['served'] += 1
+            response = Response(snapshot.body, mimetype=mimetype)
+        response.set_etag(snapshot.etag)
+        # Browsers may keep the page but must check the ETag before showing it again
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def describe(self) -> Dict[str, Any]:
+        snapshot = self._current
+        return {
+            'version': snapshot.version if snapshot else None,
+            'etag': snapshot.etag if snapshot else None,
+            'built_at': snapshot.built_at.isoformat() if snapshot else None,
+            'build_time': round(snapshot.build_time, 4) if snapshot else None,
+            'stats': dict(self.stats)
+        }
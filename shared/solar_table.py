@@ -0,0 +1,245 @@
+import json
+import math
+import os
+import struct
+import sys
+import threading
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Union
+from zoneinfo import ZoneInfo
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Solar depression (degrees below the horizon) and direction of each event in the table
+SOLAR_EVENTS = {
+    'astronomical_dawn': (18.0, True),
+    'nautical_dawn': (12.0, True),
+    'civil_dawn': (6.0, True),
+    'sunrise': (0.833, True),
+    'noon': (None, None),
+    'sunset': (0.833, False),
+    'civil_dusk': (6.0, False),
+    'nautical_dusk': (12.0, False),
+    'astronomical_dusk': (18.0, False)
+}
+
+MISSING = -(2 ** 31)  # Stored for events that don't happen on a day (polar day/night)
+_MAGIC = b"SOLR1\n"
+
+def _julian_days(first_day: date, days: int) -> List[float]:
+    # Same day count as astral's Excel-style datediff from 1900-01-01
+    start = first_day.toordinal() - date(1900, 1, 1).toordinal() + 2 + 2415018.5
+    return [start + offset for offset in range(days)]
+
+def _event_minutes(m: SimpleNamespace, jd, latitude: float, longitude: float, depression, rising):
+    """Minutes after UTC midnight of each event (NOAA equations, as used by astral)"""
+    t = (jd - 2451545.0) / 36525.0
+    l0 = (280.46646 + t * (36000.76983 + 0.0003032 * t)) % 360.0
+    anomaly = 357.52911 + t * (35999.05029 - 0.0001537 * t)
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    mrad = m.radians(anomaly)
+    center = (m.sin(mrad) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + m.sin(2 * mrad) * (0.019993 - 0.000101 * t) + m.sin(3 * mrad) * 0.000289)
+    omega = 125.04 - 1934.136 * t
+    apparent_long = l0 + center - 0.00569 - 0.00478 * m.sin(m.radians(omega))
+    seconds = 21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))
+    obliquity = 23.0 + (26.0 + seconds / 60.0) / 60.0 + 0.00256 * m.cos(m.radians(omega))
+    declination = m.degrees(m.asin(m.sin(m.radians(obliquity)) * m.sin(m.radians(apparent_long))))
+
+    y = m.tan(m.radians(obliquity) / 2.0) ** 2
+    l0rad = m.radians(l0)
+    eqtime = m.degrees(y * m.sin(2 * l0rad) - 2 * eccentricity * m.sin(mrad)
+                       + 4 * eccentricity * y * m.sin(mrad) * m.cos(2 * l0rad)
+                       - 0.5 * y * y * m.sin(4 * l0rad) - 1.25 * eccentricity ** 2 * m.sin(2 * mrad)) * 4.0
+    if depression is None:
+        return 720.0 - 4 * longitude - eqtime
+
+    latitude = max(-89.8, min(89.8, latitude))
+    lat = math.radians(latitude)
+    dec = m.radians(declination)
+    h = math.cos(math.radians(90 + depression)) / (math.cos(lat) * m.cos(dec)) - math.tan(lat) * m.tan(dec)
+    hour_angle = m.degrees(m.acos(h))
+    if not rising:
+        hour_angle = -hour_angle
+    return 720.0 + 4.0 * (-longitude - hour_angle) - eqtime
+
+def _scalar_acos(value: float) -> float:
+    return math.acos(value) if -1.0 <= value <= 1.0 else math.nan
+
+_SCALAR_MATH = SimpleNamespace(sin=math.sin, cos=math.cos, tan=math.tan, asin=math.asin, acos=_scalar_acos,
+                               radians=math.radians, degrees=math.degrees)
+
+class SolarTable:
+    """Sunrise, sunset, noon and dawn/dusk times of one location for a whole year.
+
+    Times are stored as seconds after UTC midnight of each date in one flat
+    int32 array (event-major), so a lookup is an index into the array.
+    """
+
+    def __init__(self, latitude: float, longitude: float, tz_name: str, year: int,
+                 events: List[str], offsets: array):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.tz_name = tz_name
+        self.tz = ZoneInfo(tz_name)
+        self.year = year
+        self.events = events
+        self.days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+        self._index = {event: i for i, event in enumerate(events)}
+        self._offsets = offsets
+
+    @classmethod
+    def compute(cls, latitude: float, longitude: float, tz_name: str, year: int) -> 'SolarTable':
+        """Work out every event for every day of the year (vectorized with numpy when it is installed)"""
+        first_day = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - first_day).days
+        julian = _julian_days(first_day, days)
+        offsets = array('i')
+
+        for depression, rising in SOLAR_EVENTS.values():
+            if np is not None:
+                m = SimpleNamespace(sin=np.sin, cos=np.cos, tan=np.tan, asin=np.arcsin, acos=np.arccos,
+                                    radians=np.radians, degrees=np.degrees)
+                with np.errstate(invalid='ignore'):
+                    minutes = _event_minutes(m, np.array(julian), latitude, longitude, depression, rising)
+                values = np.where(np.isnan(minutes), MISSING, np.floor(minutes * 60))
+                offsets.extend(int(value) for value in values)
+            else:
+                for jd in julian:
+                    minutes = _event_minutes(_SCALAR_MATH, jd, latitude, longitude, depression, rising)
+                    offsets.append(MISSING if math.isnan(minutes) else int(math.floor(minutes * 60)))
+
+        return cls(latitude, longitude, tz_name, year, list(SOLAR_EVENTS), offsets)
+
+    def get(self, event: str, day: Union[date, datetime]) -> Optional[datetime]:
+        """Local time of event on day, or None if it doesn't happen that day"""
+        if isinstance(day, datetime):
+            day = day.astimezone(self.tz).date() if day.tzinfo else day.date()
+        if day.year != self.year:
+            raise KeyError(f"{day} is outside the {self.year} solar table")
+
+        offset = self._offsets[self._index[event] * self.days + day.timetuple().tm_yday - 1]
+        if offset == MISSING:
+            return None
+        midnight = datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+        return (midnight + timedelta(seconds=offset)).astimezone(self.tz)
+
+    def save(self, path: str) -> None:
+        header = json.dumps({
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'timezone': self.tz_name,
+            'year': self.year,
+            'events': self.events
+        }).encode()
+        data = array('i', self._offsets)
+        if sys.byteorder != 'little':
+            data.byteswap()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC + struct.pack('<I', len(header)) + header)
+            data.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SolarTable':
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a solar table")
+            (length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(length))
+            offsets = array('i')
+            offsets.frombytes(f.read())
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+
+        table = cls(header['latitude'], header['longitude'], header['timezone'], header['year'],
+                    header['events'], offsets)
+        if len(offsets) != len(table.events) * table.days:
+            raise ValueError(f"{path} is truncated")
+        return table
+
+class SolarCalendar:
+    """Per-year SolarTables for one location, computed once and kept on disk.
+
+    Tables are loaded (or computed and saved) by prepare(), which callers run at
+    startup and once a day, so lookups on the request path are array reads.
+    """
+
+    def __init__(self, latitude: float, longitude: float, tz_name: str, cache_dir: Optional[str] = None):
+        self.latitude = round(float(latitude), 4)
+        self.longitude = round(float(longitude), 4)
+        self.tz_name = tz_name
+        self.tz = ZoneInfo(tz_name)
+        self.cache_dir = cache_dir
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _path(self, year: int) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"solar_{self.latitude}_{self.longitude}_{year}.bin")
+
+    def table(self, year: int) -> SolarTable:
+        """Table for year, loading or computing it if this is the first use"""
+        table = self._tables.get(year)
+        if table is not None:
+            return table
+
+        with self._lock:
+            if year in self._tables:
+                return self._tables[year]
+            path = self._path(year)
+            table = None
+            if path and os.path.exists(path):
+                try:
+                    table = SolarTable.load(path)
+                    if table.tz_name != self.tz_name:
+                        table = None
+                except Exception as e:
+                    print(f"[SolarCalendar] Ignoring unreadable table {path}: {e}")
+            if table is None:
+                table = SolarTable.compute(self.latitude, self.longitude, self.tz_name, year)
+                print(f"[SolarCalendar] Computed {year} solar table for {self.latitude}, {self.longitude}")
+                if path:
+                    try:
+                        os.makedirs(self.cache_dir, exist_ok=True)
+                        table.save(path)
+                    except OSError as e:
+                        print(f"[SolarCalendar] Could not save {path}: {e}")
+            self._tables[year] = table
+            return table
+
+    def prepare(self, years: Optional[Iterable[int]] = None) -> None:
+        """Make sure this year's and next year's tables are ready (or the given years)"""
+        if years is None:
+            this_year = datetime.now(self.tz).year
+            years = (this_year, this_year + 1)
+        for year in years:
+            self.table(year)
+
+    def get(self, event: str, day: Union[date, datetime, None] = None) -> Optional[datetime]:
+        """Local time of event on day (default: today at the location)"""
+        if day is None:
+            day = datetime.now(self.tz).date()
+        elif isinstance(day, datetime):
+            day = day.astimezone(self.tz).date() if day.tzinfo else day.date()
+        return self.table(day.year).get(event, day)
+
+    def sunset(self, day: Union[date, datetime, None] = None) -> Optional[datetime]:
+        return self.get('sunset', day)
+
+    def sunrise(self, day: Union[date, datetime, None] = None) -> Optional[datetime]:
+        return self.get('sunrise', day)
+
+    def day(self, day: Union[date, datetime, None] = None) -> Dict[str, Optional[datetime]]:
+        """Every event on day"""
+        if day is None:
+            day = datetime.now(self.tz).date()
+        return {event: self.get(event, day) for event in SOLAR_EVENTS}
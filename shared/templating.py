@@ -0,0 +1,71 @@
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Iterable
+
+from flask import Flask
+from markupsafe import Markup
+
+class FragmentCache:
+    """Rendered HTML fragments that only change when configuration changes.
+
+    Call invalidate() whenever the configuration a fragment is built from is
+    saved; the fragment is rendered again on its next use.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.version = 0
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, render: Callable[[], str]) -> Markup:
+        if not self.enabled:
+            return Markup(render())
+
+        with self._lock:
+            fragment = self._fragments.get(name)
+            version = self.version
+        if fragment is None:
+            fragment = Markup(render())
+            with self._lock:
+                # Don't keep a fragment rendered from config that changed while we rendered it
+                if self.version == version:
+                    self._fragments[name] = fragment
+        return fragment
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._fragments.clear()
+
+def setup_templates(app: Flask, templates: Iterable[str], static_max_age: int = 31536000) -> Dict[str, str]:
+    """Compile the app's templates once at startup and serve its static files with long-lived caching.
+
+    Adds an asset_url(filename) template helper that appends a content hash to
+    the static URL, so browsers can keep assets for static_max_age seconds and
+    still pick up a changed file straight away. Returns the asset versions.
+    """
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = static_max_age
+    app.jinja_env.auto_reload = False
+
+    versions = {}
+    if app.static_folder and os.path.isdir(app.static_folder):
+        for filename in os.listdir(app.static_folder):
+            path = os.path.join(app.static_folder, filename)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    versions[filename] = hashlib.sha1(f.read()).hexdigest()[:10]
+
+    def asset_url(filename: str) -> str:
+        # Built without url_for so pages can also be rendered outside a request
+        version = versions.get(filename)
+        url = f"{app.static_url_path}/{filename}"
+        return f"{url}?v={version}" if version else url
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    # Jinja keeps compiled templates in its cache, so requests only execute them
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return versions
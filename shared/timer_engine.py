@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+class TimerJob:
+    """A callback due at an absolute, timezone-aware deadline, optionally repeating"""
+
+    def __init__(self, name: str, fn: Callable[[], Any], deadline: datetime,
+                 interval: Optional[float] = None, tag: Optional[str] = None):
+        if deadline.tzinfo is None:
+            raise ValueError(f"Deadline for {name} must be timezone-aware")
+        self.name = name
+        self.fn = fn
+        self.deadline = deadline
+        self.interval = interval  # Seconds between runs for repeating jobs
+        self.tag = tag
+        self.cancelled = False
+        self.runs = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'tag': self.tag,
+            'deadline': self.deadline.isoformat(),
+            'interval': self.interval,
+            'runs': self.runs
+        }
+
+class TimerEngine:
+    """One thread that fires jobs at their deadlines from a min-heap.
+
+    The thread sleeps on a condition variable until the earliest deadline, and
+    is woken early whenever a job is added or cancelled. Jobs run on their own
+    thread so a slow job never delays the next deadline. Every firing is
+    recorded with how late it was.
+    """
+
+    def __init__(self, name: str = "timer-engine", history: int = 50, max_sleep: float = 60.0):
+        self.name = name
+        self.max_sleep = max_sleep  # Re-check the wall clock at least this often (NTP steps, DST)
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self.history = deque(maxlen=history)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def schedule_at(self, deadline: datetime, fn: Callable[[], Any], name: str,
+                    tag: Optional[str] = None) -> TimerJob:
+        """Run fn once at deadline (timezone-aware)"""
+        return self._push(TimerJob(name, fn, deadline, tag=tag))
+
+    def schedule_every(self, interval: float, fn: Callable[[], Any], name: str, tag: Optional[str] = None,
+                       first: Optional[datetime] = None) -> TimerJob:
+        """Run fn every interval seconds, starting at first (default: now)"""
+        first = first or datetime.now(timezone.utc)
+        return self._push(TimerJob(name, fn, first, interval=interval, tag=tag))
+
+    def _push(self, job: TimerJob) -> TimerJob:
+        with self._condition:
+            heapq.heappush(self._heap, (job.deadline.timestamp(), next(self._counter), job))
+            self._condition.notify()
+        return job
+
+    def cancel(self, job: TimerJob) -> None:
+        with self._condition:
+            job.cancelled = True
+            self._condition.notify()
+
+    def cancel_tag(self, tag: str) -> int:
+        """Cancel every pending job with tag; returns how many were cancelled"""
+        with self._condition:
+            cancelled = 0
+            for _, _, job in self._heap:
+                if job.tag == tag and not job.cancelled:
+                    job.cancelled = True
+                    cancelled += 1
+            self._condition.notify()
+            return cancelled
+
+    def jobs(self, tag: Optional[str] = None) -> List[TimerJob]:
+        """Pending jobs in deadline order"""
+        with self._condition:
+            pending = sorted(self._heap, key=lambda entry: entry[:2])
+        return [job for _, _, job in pending if not job.cancelled and (tag is None or job.tag == tag)]
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                # Drop cancelled jobs from the top so they don't decide how long we sleep
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait(self.max_sleep)
+                    continue
+                due, _, job = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._condition.wait(min(delay, self.max_sleep))
+                    continue
+                heapq.heappop(self._heap)
+
+                fired_at = datetime.now(job.deadline.tzinfo)
+                scheduled_for = job.deadline
+                job.runs += 1
+                if job.interval:
+                    # Re-arm from the previous deadline so repeating jobs don't drift, skipping missed runs
+                    next_deadline = job.deadline + timedelta(seconds=job.interval)
+                    while next_deadline <= fired_at:
+                        next_deadline += timedelta(seconds=job.interval)
+                    job.deadline = next_deadline
+                    heapq.heappush(self._heap, (next_deadline.timestamp(), next(self._counter), job))
+
+            threading.Thread(target=self._run, args=(job, scheduled_for, fired_at),
+                             name=f"timer-{job.name}", daemon=True).start()
+
+    def _run(self, job: TimerJob, scheduled_for: datetime, fired_at: datetime) -> None:
+        lateness = (fired_at - scheduled_for).total_seconds()
+        start = time.monotonic()
+        error = None
+        try:
+            job.fn()
+        except Exception as e:
+            error = str(e)
+            print(f"Timer job {job.name} failed: {e}")
+        self.history.append({
+            'name': job.name,
+            'tag': job.tag,
+            'scheduled_for': scheduled_for.isoformat(),
+            'fired_at': fired_at.isoformat(),
+            'lateness': round(lateness, 3),
+            'duration': round(time.monotonic() - start, 3),
+            'error': error
+        })
+        if lateness > 1:
+            print(f"Timer job {job.name} fired {lateness:.1f}s late")
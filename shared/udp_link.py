@@ -0,0 +1,371 @@
+import abc
+import hashlib
+import hmac
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Every packet: header, payload, then the first MAC_SIZE bytes of HMAC-SHA256(secret, header + payload)
+MAGIC = b'BC'
+PROTOCOL_VERSION = 1
+HEADER = struct.Struct('!2sBBII')  # Magic, protocol version, packet type, sequence number, send time (Unix seconds)
+MAC_SIZE = 16
+MAX_PACKET = 1024
+
+# Packet types
+COMMAND = 1    # Hub -> controller: command code and its parameters
+ACK = 2        # Either way: sequence number acknowledged, 0 (accepted) or 1 (refused), and why
+RESULT = 3     # Controller -> hub: sequence number of the command, whether it succeeded, and the error
+HEARTBEAT = 4  # Hub -> controller: empty; answered with STATUS
+STATUS = 5     # Controller -> hub: sequence number answered (0 when pushed), state flags and status version
+
+# One byte per command; select_channel adds the channel, sweep adds the action and the channels
+COMMAND_CODES = {'lower_blinds': 1, 'raise_blinds': 2, 'stop_blinds': 3, 'toggle_remote': 4,
+                 'select_all_channels': 5, 'resync_channel': 6, 'select_channel': 7, 'sweep': 8}
+COMMAND_NAMES = {code: command for command, code in COMMAND_CODES.items()}
+SWEEP_ACTIONS = ('lower_blinds', 'raise_blinds', 'stop_blinds')
+STATUS_FLAGS = ('remote_on', 'blinds_lowered', 'channel_selection_in_progress', 'standalone_mode')
+
+ACCEPTED = 0
+REFUSED = 1
+
+class BadPacket(Exception):
+    """A datagram that is malformed, unsigned, signed with another secret, or too old"""
+
+def encode_command(command: str, params: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+    """The command as bytes, or None if it has no compact form (it then has to go over HTTP)"""
+    params = params or {}
+    code = COMMAND_CODES.get(command)
+    if code is None:
+        return None
+    if command == 'select_channel':
+        channel = params.get('channel')
+        return bytes([code, channel]) if isinstance(channel, int) and 0 <= channel <= 255 else None
+    if command == 'sweep':
+        channels = params.get('channels')
+        if (params.get('action') not in SWEEP_ACTIONS or not isinstance(channels, list)
+                or any(not isinstance(channel, int) or not 0 <= channel <= 255 for channel in channels)):
+            return None
+        return bytes([code, SWEEP_ACTIONS.index(params['action']), *channels])
+    return bytes([code])
+
+def decode_command(payload: bytes) -> Tuple[str, Dict[str, Any]]:
+    if not payload or payload[0] not in COMMAND_NAMES:
+        raise BadPacket("Unknown command code")
+    command = COMMAND_NAMES[payload[0]]
+    if command == 'select_channel':
+        if len(payload) != 2:
+            raise BadPacket("select_channel needs one channel")
+        return command, {'channel': payload[1]}
+    if command == 'sweep':
+        if len(payload) < 2 or payload[1] >= len(SWEEP_ACTIONS):
+            raise BadPacket("Bad sweep")
+        return command, {'action': SWEEP_ACTIONS[payload[1]], 'channels': list(payload[2:])}
+    return command, {}
+
+def encode_digest(status: Dict[str, Any]) -> bytes:
+    flags = sum(1 << bit for bit, name in enumerate(STATUS_FLAGS) if status.get(name))
+    return bytes([flags]) + str(status.get('version', '')).encode()
+
+def decode_digest(payload: bytes) -> Dict[str, Any]:
+    if not payload:
+        raise BadPacket("Empty status digest")
+    digest = {name: bool(payload[0] & (1 << bit)) for bit, name in enumerate(STATUS_FLAGS)}
+    digest['version'] = payload[1:].decode(errors='replace')
+    return digest
+
+class _Endpoint(abc.ABC):
+    """Signing, checking, de-duplicating and retransmitting shared by both ends.
+
+    Each end numbers its packets from a random start. A packet whose MAC does
+    not match, or whose send time is more than max_skew seconds off, is
+    dropped. A packet seen before (retransmitted or replayed, recognised by its
+    MAC) is not handled again; the reply sent the first time is repeated
+    instead, so a command never runs twice.
+    """
+
+    def __init__(self, secret: str, bind: Tuple[str, int], retransmit: float, max_retransmits: int,
+                 max_skew: float, name: str):
+        self.key = secret.encode()
+        self.retransmit = retransmit
+        self.max_retransmits = max_retransmits
+        self.max_skew = max_skew
+        self.name = name
+        self.stats = Counter()
+        self._seq = random.getrandbits(32)
+        self._seen: Dict[bytes, list] = {}  # MAC of a received packet -> [time received, reply packet or None]
+        self._last_prune = time.monotonic()
+        self._waiters: Dict[Tuple[str, int], Dict[str, Any]] = {}  # ('reply' or 'result', sequence) -> waiter
+        self._lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind)
+
+    def start(self) -> None:
+        threading.Thread(target=self._receive, name=self.name, daemon=True).start()
+
+    def _next_seq(self) -> int:
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xFFFFFFFF or 1  # 0 means "unsolicited" in STATUS
+            return self._seq
+
+    def _pack(self, kind: int, seq: int, payload: bytes) -> bytes:
+        packet = HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, seq, int(time.time()) & 0xFFFFFFFF) + payload
+        return packet + hmac.new(self.key, packet, hashlib.sha256).digest()[:MAC_SIZE]
+
+    def _unpack(self, data: bytes) -> Tuple[int, int, bytes, bytes]:
+        if len(data) < HEADER.size + MAC_SIZE:
+            raise BadPacket("Too short")
+        packet, mac = data[:-MAC_SIZE], data[-MAC_SIZE:]
+        if not hmac.compare_digest(mac, hmac.new(self.key, packet, hashlib.sha256).digest()[:MAC_SIZE]):
+            raise BadPacket("Bad MAC")
+        magic, version, kind, seq, sent = HEADER.unpack_from(packet)
+        if magic != MAGIC or version != PROTOCOL_VERSION:
+            raise BadPacket("Unknown protocol")
+        if abs(time.time() - sent) > self.max_skew:
+            raise BadPacket("Stale packet (or clocks differ)")
+        return kind, seq, packet[HEADER.size:], mac
+
+    def _send(self, address: Any, packet: bytes) -> None:
+        try:
+            self.sock.sendto(packet, address)
+            self.stats['sent'] += 1
+        except OSError as e:
+            self.stats['send_errors'] += 1
+            print(f"[{self.name}] Send to {address} failed: {e}")
+
+    def _reply(self, address: Any, request: bytes, kind: int, payload: bytes) -> None:
+        """Answer the packet with MAC request, keeping the answer for its retransmissions"""
+        packet = self._pack(kind, self._next_seq(), payload)
+        with self._lock:
+            seen = self._seen.get(request)
+            if seen is not None:
+                seen[1] = packet
+        self._send(address, packet)
+
+    def _exchange(self, address: Any, kind: int, payload: bytes, deadline: float,
+                  result_waiter: bool = False) -> Tuple[int, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Send a packet, retransmitting with doubling waits until it is answered or deadline passes.
+
+        Returns (sequence number, the answer's waiter or None, the RESULT waiter if result_waiter).
+        """
+        seq = self._next_seq()
+        reply = {'event': threading.Event(), 'kind': None, 'payload': None}
+        result = {'event': threading.Event(), 'kind': None, 'payload': None} if result_waiter else None
+        with self._lock:
+            self._waiters[('reply', seq)] = reply
+            if result is not None:
+                # The result of a quick command can arrive before the acknowledgement is handled
+                self._waiters[('result', seq)] = result
+        packet = self._pack(kind, seq, payload)
+        try:
+            wait = self.retransmit
+            for attempt in range(self.max_retransmits + 1):
+                if attempt:
+                    self.stats['retransmits'] += 1
+                self._send(address, packet)
+                remaining = deadline - time.monotonic()
+                if reply['event'].wait(max(0.0, min(wait, remaining))):
+                    return seq, reply, result
+                if remaining <= wait:
+                    break
+                wait *= 2
+            self.stats['unanswered'] += 1
+            return seq, None, result
+        finally:
+            with self._lock:
+                self._waiters.pop(('reply', seq), None)
+
+    def _resolve(self, which: str, seq: int, kind: int, payload: bytes) -> bool:
+        with self._lock:
+            waiter = self._waiters.get((which, seq))
+        if waiter is None:
+            return False
+        waiter['kind'] = kind
+        waiter['payload'] = payload
+        waiter['event'].set()
+        return True
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_PACKET)
+            except OSError as e:
+                print(f"[{self.name}] Receive failed: {e}")
+                time.sleep(1)
+                continue
+            try:
+                kind, seq, payload, mac = self._unpack(data)
+            except BadPacket as e:
+                self.stats['rejected'] += 1
+                print(f"[{self.name}] Dropped packet from {address}: {e}")
+                continue
+            self.stats['received'] += 1
+
+            now = time.monotonic()
+            with self._lock:
+                seen = self._seen.get(mac)
+                if seen is None:
+                    self._seen[mac] = [now, None]
+                if now - self._last_prune > 10:
+                    # Anything older than this is refused as stale anyway
+                    self._seen = {key: entry for key, entry in self._seen.items()
+                                  if now - entry[0] <= 2 * self.max_skew}
+                    self._last_prune = now
+            if seen is not None:
+                self.stats['duplicates'] += 1
+                if seen[1] is not None:
+                    self._send(address, seen[1])
+                continue
+
+            try:
+                self._handle(address, kind, seq, payload, mac)
+            except BadPacket as e:
+                self.stats['rejected'] += 1
+                print(f"[{self.name}] Bad packet from {address}: {e}")
+            except Exception as e:
+                print(f"[{self.name}] Error handling packet from {address}: {e}")
+
+    @abc.abstractmethod
+    def _handle(self, address: Any, kind: int, seq: int, payload: bytes, mac: bytes) -> None:
+        """Act on a new, verified packet from address"""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'port': self.sock.getsockname()[1], **{key: self.stats[key] for key in
+                ('sent', 'received', 'retransmits', 'unanswered', 'duplicates', 'rejected', 'send_errors')}}
+
+class UdpTransport(_Endpoint):
+    """Hub side: commands and heartbeats to controllers over signed UDP datagrams.
+
+    A command is retransmitted until the controller acknowledges it, then its
+    RESULT is awaited (and acknowledged) until the command's deadline. A
+    heartbeat is answered with a status digest: the remote's state flags and
+    the controller's status version. on_digest(url, digest) receives digests
+    controllers push when their state changes.
+    """
+
+    def __init__(self, secret: str, retransmit: float = 0.25, max_retransmits: int = 4, max_skew: float = 120,
+                 on_digest: Optional[Callable[[str, Dict[str, Any]], None]] = None, name: str = "udp-transport"):
+        super().__init__(secret, ('0.0.0.0', 0), retransmit, max_retransmits, max_skew, name)
+        self.on_digest = on_digest
+        self._peers: Dict[Any, str] = {}  # Resolved (address, port) -> controller URL, to place pushed digests
+
+    def _address(self, url: str, host: str, port: int) -> Any:
+        address = (socket.gethostbyname(host), port)
+        self._peers[address] = url
+        return address
+
+    def command(self, url: str, host: str, port: int, command: str, params: Optional[Dict[str, Any]] = None,
+                timeout: float = 20) -> Optional[Dict[str, Any]]:
+        """Run a command on the controller at host:port; None if the command has no compact form"""
+        payload = encode_command(command, params)
+        if payload is None:
+            return None
+        deadline = time.monotonic() + timeout
+        try:
+            address = self._address(url, host, port)
+        except OSError as e:
+            return {"success": False, "error": str(e), "unreachable": True}
+        seq, ack, result = self._exchange(address, COMMAND, payload, deadline, result_waiter=True)
+        try:
+            if ack is None:
+                return {"success": False, "error": f"No acknowledgement over UDP within {timeout}s",
+                        "unreachable": True}
+            if ack['kind'] == ACK and ack['payload'][4:5] != bytes([ACCEPTED]):
+                return {"success": False, "error": ack['payload'][5:].decode(errors='replace') or "Refused"}
+            if not result['event'].wait(max(0.0, deadline - time.monotonic())):
+                return {"success": False, "error": f"No result over UDP within {timeout}s", "no_answer": True}
+            error = result['payload'][5:].decode(errors='replace')
+            return {"success": result['payload'][4] == 1, "error": error or None}
+        finally:
+            with self._lock:
+                self._waiters.pop(('result', seq), None)
+
+    def heartbeat(self, url: str, host: str, port: int, timeout: float = 5) -> Optional[Dict[str, Any]]:
+        """The controller's status digest, or None if it did not answer"""
+        try:
+            address = self._address(url, host, port)
+        except OSError:
+            return None
+        _, reply, _ = self._exchange(address, HEARTBEAT, b'', time.monotonic() + timeout)
+        if reply is None or reply['kind'] != STATUS:
+            return None
+        return decode_digest(reply['payload'][4:])
+
+    def _handle(self, address: Any, kind: int, seq: int, payload: bytes, mac: bytes) -> None:
+        if len(payload) < 4:
+            raise BadPacket("Missing sequence number")
+        answered, = struct.unpack_from('!I', payload)
+        if kind == ACK:
+            self._resolve('reply', answered, kind, payload)
+        elif kind == RESULT:
+            self._resolve('reply', answered, kind, payload)  # Stands in for a lost acknowledgement
+            self._resolve('result', answered, kind, payload)
+            self._reply(address, mac, ACK, struct.pack('!IB', seq, ACCEPTED))
+        elif kind == STATUS:
+            if answered and self._resolve('reply', answered, kind, payload):
+                return
+            url = self._peers.get(address)
+            if url is not None and self.on_digest is not None:
+                self.on_digest(url, decode_digest(payload[4:]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**super().to_dict(), 'controllers': sorted(set(self._peers.values()))}
+
+class UdpResponder(_Endpoint):
+    """Controller side: answers the hub's UDP commands and heartbeats next to the HTTP API.
+
+    on_command(command, params, finish) checks and starts a command, returning
+    an error message to refuse it; it later calls finish(result) and the
+    RESULT is retransmitted until the hub acknowledges it. digest() returns
+    the status to summarise and on_contact() is called for every packet from
+    the hub.
+    """
+
+    def __init__(self, secret: str, port: int,
+                 on_command: Callable[[str, Dict[str, Any], Callable[[Dict[str, Any]], None]], Optional[str]],
+                 digest: Callable[[], Dict[str, Any]], on_contact: Callable[[], None],
+                 retransmit: float = 0.25, max_retransmits: int = 4, max_skew: float = 120,
+                 name: str = "udp-responder"):
+        super().__init__(secret, ('0.0.0.0', port), retransmit, max_retransmits, max_skew, name)
+        self.on_command = on_command
+        self.digest = digest
+        self.on_contact = on_contact
+        self.hub_address = None  # Where the hub's packets last came from; pushed digests go there
+
+    def push_digest(self) -> None:
+        """Tell the hub the status changed (not retransmitted: the hub still polls)"""
+        if self.hub_address is not None:
+            self._send(self.hub_address, self._pack(STATUS, self._next_seq(),
+                                                    struct.pack('!I', 0) + encode_digest(self.digest())))
+
+    def _handle(self, address: Any, kind: int, seq: int, payload: bytes, mac: bytes) -> None:
+        self.hub_address = address
+        self.on_contact()
+        if kind == HEARTBEAT:
+            self._reply(address, mac, STATUS, struct.pack('!I', seq) + encode_digest(self.digest()))
+        elif kind == ACK:
+            if len(payload) >= 4:
+                self._resolve('reply', struct.unpack_from('!I', payload)[0], kind, payload)
+        elif kind == COMMAND:
+            try:
+                command, params = decode_command(payload)
+                error = self.on_command(command, params, lambda result: self._deliver(address, seq, result))
+            except BadPacket as e:
+                error = str(e)
+            self._reply(address, mac, ACK, struct.pack('!IB', seq, REFUSED if error else ACCEPTED)
+                        + (error or '').encode()[:200])
+
+    def _deliver(self, address: Any, command_seq: int, result: Dict[str, Any]) -> None:
+        payload = (struct.pack('!IB', command_seq, 1 if result.get('success') else 0)
+                   + str(result.get('error') or '').encode()[:200])
+        # Results are retransmitted on their own thread so a slow hub never holds up the receiver
+        threading.Thread(target=self._exchange, args=(address, RESULT, payload,
+                                                      time.monotonic() + self.retransmit * 2 ** (self.max_retransmits + 1)),
+                         name=f"{self.name}-result", daemon=True).start()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**super().to_dict(), 'hub_address': '%s:%s' % self.hub_address if self.hub_address else None}
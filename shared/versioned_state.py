@@ -0,0 +1,49 @@
+import threading
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+class VersionedState:
+    """A few named values with a version that moves on with every change.
+
+    Versions are strings "<epoch>-<counter>". The epoch is new every time the
+    process starts, so a version from before a restart is never mistaken for
+    a current one. Each field remembers the counter of its last change, so
+    changes_since() can answer with just the fields that changed.
+    """
+
+    def __init__(self, **fields: Any):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._fields = dict(fields)
+        self._changed_at = {name: 0 for name in fields}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        return f"{self.epoch}-{self._counter}"
+
+    def update(self, **fields: Any) -> bool:
+        """Set fields; bumps the version (once) and returns True if any value actually changed"""
+        with self._lock:
+            changed = [name for name, value in fields.items() if self._fields.get(name) != value]
+            if not changed:
+                return False
+            self._counter += 1
+            for name in changed:
+                self._fields[name] = fields[name]
+                self._changed_at[name] = self._counter
+            return True
+
+    def snapshot(self) -> Tuple[str, Dict[str, Any]]:
+        """(version, every field) read together"""
+        with self._lock:
+            return self.version, dict(self._fields)
+
+    def changes_since(self, version: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(current version, fields changed after version), or None instead of the fields if version isn't ours"""
+        epoch, _, counter = (version or '').partition('-')
+        with self._lock:
+            if epoch != self.epoch or not counter.isdigit() or int(counter) > self._counter:
+                return self.version, None
+            since = int(counter)
+            return self.version, {name: self._fields[name] for name, at in self._changed_at.items() if at > since}
@@ -1,60 +1,246 @@
+import time
+import threading
 import requests
-from typing import Tuple, Optional
+from typing import Any, Callable, Dict, Tuple, Optional
 from datetime import datetime, timedelta
-from astral import Location, Astral
+from astral import Astral
 from zoneinfo import ZoneInfo
 
-class WeatherClient:
-    """Weather API client for blind control system"""
+from .solar_table import SolarCalendar
+from .cloud_forecast import CloudForecast
+
+class CachedFetch:
+    """A single cached value refreshed by fetch(), shared by every caller.
     
-    def __init__(self, api_key: str, location: str, cloud_threshold: int = 15):
-        self.api_key = api_key
-        self.location = location
-        self.cloud_threshold = cloud_threshold
+    Values younger than ttl are served from memory. Older values (up to
+    max_stale) are still served straight away while one background refresh
+    runs. With nothing usable cached, concurrent callers wait on a single
+    fetch instead of each making their own. If a fetch fails the last value
+    is used while it is younger than max_stale, and the API isn't retried for
+    error_ttl seconds. A fetch that was already running when invalidate() was
+    called is thrown away when it finishes.
+    """
     
-    def get_cloud_cover(self) -> Tuple[Optional[int], Optional[str]]:
-        """Get current cloud cover percentage and condition"""
-        try:
-            url = f"http://api.weatherapi.com/v1/current.json?key={self.api_key}&q={self.location}&aqi=no"
-            response = requests.get(url)
-            data = response.json()
+    def __init__(self, fetch: Callable[[], Any], ttl: float = 300, max_stale: float = 3600,
+                 error_ttl: float = 60, name: str = "cache"):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.error_ttl = error_ttl
+        self.name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._failed_at = None
+        self._inflight = None  # Event set when the running fetch finishes
+        self._generation = 0  # Bumped by invalidate(); fetches started before that are discarded
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'fetches': 0, 'errors': 0, 'coalesced': 0,
+                      'discarded': 0}
+    
+    def _age(self, now: float) -> Optional[float]:
+        return now - self._fetched_at if self._fetched_at is not None else None
+    
+    def get(self, max_age: Optional[float] = None) -> Any:
+        """Cached value, refreshing as needed; None if no usable value could be fetched.
+        
+        max_age (default: max_stale) is the oldest value the caller accepts
+        without waiting for a refresh; anything past ttl is refreshed either way.
+        """
+        max_age = self.max_stale if max_age is None else max_age
+        with self._lock:
+            now = time.monotonic()
+            age = self._age(now)
+            if age is not None and age < min(max_age, self.ttl):
+                self.stats['hits'] += 1
+                return self._value
             
-            # Get cloud cover percentage (0-100)
-            cloud_cover = data['current']['cloud']
+            backing_off = self._failed_at is not None and now - self._failed_at < self.error_ttl
+            if age is not None and (age < max_age or backing_off) and age < self.max_stale:
+                # Serve what we have and refresh behind the caller's back
+                self.stats['stale_hits'] += 1
+                if self._inflight is None and not backing_off:
+                    self._inflight = threading.Event()
+                    threading.Thread(target=self._refresh, args=(self._generation, self._inflight),
+                                     name=f"{self.name}-refresh", daemon=True).start()
+                return self._value
             
-            # Also get condition text for logging
-            condition = data['current']['condition']['text']
+            if backing_off:
+                return None
             
-            print(f"Current conditions: {condition}, Cloud cover: {cloud_cover}%")
-            return cloud_cover, condition
+            self.stats['misses'] += 1
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                leader = True
+            else:
+                self.stats['coalesced'] += 1
+                leader = False
+            inflight = self._inflight
+            generation = self._generation
+        
+        if leader:
+            self._refresh(generation, inflight)
+        else:
+            inflight.wait()
+        
+        with self._lock:
+            age = self._age(time.monotonic())
+            return self._value if age is not None and age < self.max_stale else None
+    
+    def _refresh(self, generation: int, inflight: threading.Event) -> None:
+        self.stats['fetches'] += 1
+        try:
+            value = self._fetch()
+            error = None
         except Exception as e:
-            print(f"Error checking weather: {e}")
+            error = e
+        
+        with self._lock:
+            if generation != self._generation:
+                # invalidate() ran while this fetch was out, so its result may already be out of date
+                self.stats['discarded'] += 1
+            elif error is None:
+                self._value = value
+                self._fetched_at = time.monotonic()
+                self._failed_at = None
+            else:
+                print(f"[{self.name}] Refresh failed: {error}")
+                self.stats['errors'] += 1
+                self._failed_at = time.monotonic()
+            if self._inflight is inflight:
+                self._inflight = None
+        inflight.set()
+    
+    def peek(self, max_age: Optional[float] = None) -> Any:
+        """Cached value no older than max_age (default: max_stale) without ever fetching; None if there is none"""
+        max_age = self.max_stale if max_age is None else max_age
+        with self._lock:
+            age = self._age(time.monotonic())
+            return self._value if age is not None and age < min(max_age, self.max_stale) else None
+    
+    def invalidate(self) -> None:
+        """Drop the cached value so the next get() fetches, ignoring any fetch already running"""
+        with self._lock:
+            self._generation += 1
+            self._inflight = None
+            self._value = None
+            self._fetched_at = None
+            self._failed_at = None
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            age = self._age(time.monotonic())
+            return {
+                'age': round(age, 1) if age is not None else None,
+                'ttl': self.ttl,
+                'max_stale': self.max_stale,
+                'refreshing': self._inflight is not None,
+                **self.stats
+            }
+
+class WeatherClient:
+    """Weather API client for blind control system.
+    
+    Current conditions are cached (see CachedFetch), so any number of page
+    renders and monitors share one API request per ttl. The hourly forecast
+    is cached separately for forecast_ttl and is meant to be refreshed only a
+    couple of times a day.
+    """
+    
+    def __init__(self, api_key: str, location: str, cloud_threshold: int = 15,
+                 ttl: float = 300, max_stale: float = 3600, timeout: float = 5,
+                 forecast_ttl: float = 43200, forecast_days: int = 2):
+        self.api_key = api_key
+        self.location = location
+        self.cloud_threshold = cloud_threshold
+        self.timeout = timeout
+        self.forecast_days = forecast_days
+        self.cache = CachedFetch(self._fetch_current, ttl, max_stale, name="weather")
+        # A forecast stays usable until it runs out, so it may be kept for three refresh periods
+        self.forecast_cache = CachedFetch(self._fetch_forecast, forecast_ttl, forecast_ttl * 3,
+                                          error_ttl=600, name="forecast")
+    
+    def configure(self, api_key: str, location: str, cloud_threshold: Optional[int] = None) -> None:
+        """Apply new settings, dropping cached conditions if they were for another location or key"""
+        if cloud_threshold is not None:
+            self.cloud_threshold = cloud_threshold
+        if api_key != self.api_key or location != self.location:
+            self.api_key = api_key
+            self.location = location
+            self.cache.invalidate()
+            self.forecast_cache.invalidate()
+    
+    def _fetch_current(self) -> Dict[str, Any]:
+        url = f"http://api.weatherapi.com/v1/current.json?key={self.api_key}&q={self.location}&aqi=no"
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        current = data['current']
+        print(f"Current conditions: {current['condition']['text']}, Cloud cover: {current['cloud']}%")
+        return current
+    
+    def _fetch_forecast(self) -> CloudForecast:
+        url = (f"http://api.weatherapi.com/v1/forecast.json?key={self.api_key}&q={self.location}"
+               f"&days={self.forecast_days}&aqi=no&alerts=no")
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        forecast = CloudForecast.from_weatherapi(response.json())
+        print(f"Fetched hourly cloud forecast from {forecast.start.isoformat()} to {forecast.end.isoformat()}")
+        return forecast
+    
+    def get_forecast(self, refresh: bool = False) -> Optional[CloudForecast]:
+        """Cached hourly forecast (fetching one if there is none); refresh forces a new fetch"""
+        return self.forecast_cache.get(0 if refresh else None)
+    
+    def forecast_cloud_cover(self, when: Optional[datetime] = None) -> Tuple[Optional[float], Optional[str]]:
+        """Forecast cloud cover and condition at when (default: now), without calling the API"""
+        forecast = self.forecast_cache.peek()
+        when = when or datetime.now().astimezone()
+        if forecast is None or not forecast.covers(when):
+            return None, None
+        return round(forecast.cloud_at(when)), forecast.condition_at(when)
+    
+    def peek_cloud_cover(self, max_age: Optional[float] = None) -> Tuple[Optional[int], Optional[str]]:
+        """Cached current cloud cover and condition, without calling the API"""
+        current = self.cache.peek(max_age)
+        if current is None:
             return None, None
+        return current['cloud'], current['condition']['text']
     
-    def is_overcast(self) -> bool:
+    def get_cloud_cover(self, max_age: Optional[float] = None) -> Tuple[Optional[int], Optional[str]]:
+        """Get current cloud cover percentage and condition, no older than max_age seconds"""
+        current = self.cache.get(max_age)
+        if current is None:
+            return None, None
+        
+        # Cloud cover percentage (0-100) and condition text for logging
+        return current['cloud'], current['condition']['text']
+    
+    def is_overcast(self, max_age: Optional[float] = None) -> bool:
         """Determine if it's overcast based on cloud threshold"""
-        cloud_cover, _ = self.get_cloud_cover()
+        cloud_cover, _ = self.get_cloud_cover(max_age)
         if cloud_cover is not None:
             return cloud_cover >= self.cloud_threshold
         return False
     
     def should_lower_blinds(self) -> bool:
         """Determine if blinds should be lowered based on weather"""
-        return not self.is_overcast()
+        return not self.is_overcast(self.cache.ttl)
     
     def should_raise_blinds(self) -> bool:
         """Determine if blinds should be raised based on weather"""
-        return self.is_overcast()
+        return self.is_overcast(self.cache.ttl)
 
 class SunsetScheduler:
     """Sunset-based scheduling for blind control"""
     
-    def __init__(self, api_key: str, location_query: str, fallback_city: str = 'New York'):
+    def __init__(self, api_key: str, location_query: str, fallback_city: str = 'New York',
+                 table_dir: Optional[str] = None):
         self.api_key = api_key
         self.location_query = location_query
         self.fallback_city = fallback_city
+        self.table_dir = table_dir  # Where yearly sun tables are kept between restarts
         self._location_details = None
-        self._location = None
+        self._calendar = None
         self._astral = Astral()
     
     def _get_location_details(self) -> dict:
@@ -95,21 +281,16 @@ class SunsetScheduler:
         
         return self._location_details
     
-    def _get_location(self) -> Location:
-        if self._location:
-            return self._location
+    def get_calendar(self) -> SolarCalendar:
+        """Precomputed sun tables for the location (built once, then read from disk)"""
+        if self._calendar:
+            return self._calendar
         
         details = self._get_location_details()
-        location = Location()
-        location.name = "Configured Location"
-        location.region = str(self.location_query)
-        location.latitude = details['latitude']
-        location.longitude = details['longitude']
-        location.timezone = details['timezone']
-        location.elevation = 0
-        
-        self._location = location
-        return self._location
+        calendar = SolarCalendar(details['latitude'], details['longitude'], details['timezone'], self.table_dir)
+        calendar.prepare()
+        self._calendar = calendar
+        return self._calendar
     
     def _ensure_timezone_datetime(self, date: datetime, tz_name: str) -> datetime:
         tz = ZoneInfo(tz_name)
@@ -119,16 +300,15 @@ class SunsetScheduler:
     
     def get_sunset_time(self, date: datetime = None) -> datetime:
         """Get sunset time for the specified date (default: today)"""
-        location = self._get_location()
-        tz_name = location.timezone
+        calendar = self.get_calendar()
+        tz_name = calendar.tz_name
         
         if date is None:
             target_datetime = datetime.now(ZoneInfo(tz_name))
         else:
             target_datetime = self._ensure_timezone_datetime(date, tz_name)
         
-        sun_info = location.sun(date=target_datetime, local=True)
-        sunset = sun_info['sunset']
+        sunset = calendar.sunset(target_datetime)
         
         print(f"Sunset time for {target_datetime.strftime('%Y-%m-%d')} ({tz_name}): {sunset.strftime('%H:%M:%S')}")
         return sunset
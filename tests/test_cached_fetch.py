@@ -0,0 +1,59 @@
+"""CachedFetch invalidation while a fetch is still running"""
+
+import threading
+
+from shared.weather_client import CachedFetch
+
+def test_fetch_started_before_invalidate_is_discarded():
+    started = threading.Event()
+    release = threading.Event()
+    values = iter(["old", "new"])
+
+    def fetch():
+        value = next(values)
+        if value == "old":
+            started.set()
+            release.wait(2)
+        return value
+
+    cache = CachedFetch(fetch, ttl=300)
+    results = []
+    caller = threading.Thread(target=lambda: results.append(cache.get()))
+    caller.start()
+    assert started.wait(2)
+
+    cache.invalidate()
+    release.set()
+    caller.join(2)
+    assert results == [None]
+    assert cache.peek() is None
+    assert cache.stats['discarded'] == 1
+
+    # The next get() fetches afresh instead of waiting on the discarded fetch
+    assert cache.get() == "new"
+    assert cache.peek() == "new"
+
+def test_invalidate_lets_the_next_get_fetch_while_an_old_fetch_runs():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(None)
+        if len(calls) == 1:
+            started.set()
+            release.wait(2)
+            return "old"
+        return "new"
+
+    cache = CachedFetch(fetch, ttl=300)
+    caller = threading.Thread(target=cache.get)
+    caller.start()
+    assert started.wait(2)
+    cache.invalidate()
+    assert cache.get() == "new"
+
+    release.set()
+    caller.join(2)
+    # The old fetch finishing late doesn't overwrite the newer value
+    assert cache.peek() == "new"
@@ -0,0 +1,152 @@
+"""CircuitBreaker, RetryBudget and ControllerHealth, run against a fake clock"""
+
+import pytest
+
+from shared import circuit_breaker
+from shared.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, ControllerHealth,
+                                    RetryBudget)
+
+class FakeClock:
+    """Stands in for the time module; sleep() just moves the clock on"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(circuit_breaker.random, 'uniform', lambda low, high: high)
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure("refused")
+
+def test_closed_open_half_open_closed(clock):
+    breaker = CircuitBreaker(failure_threshold=3, open_delay=10)
+    breaker.record_failure("refused")
+    breaker.record_failure("refused")
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("refused")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_half_open_lets_a_single_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, open_delay=10)
+    open_breaker(breaker)
+    clock.now += 10
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+def test_failed_trial_reopens_the_circuit(clock, no_jitter):
+    breaker = CircuitBreaker(failure_threshold=1, open_delay=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_failure("still refused")
+    assert breaker.state == OPEN
+    assert breaker.retry_in() == 20
+    assert not breaker.allow()
+
+def test_open_delay_doubles_up_to_max_open_delay(clock, no_jitter):
+    breaker = CircuitBreaker(failure_threshold=1, open_delay=10, max_open_delay=60)
+    open_breaker(breaker)
+    delays = []
+    for _ in range(5):
+        delays.append(breaker.retry_in())
+        clock.now += breaker.retry_in()
+        assert breaker.allow()
+        breaker.record_failure()
+    assert delays == [10, 20, 40, 60, 60]
+
+    breaker.record_success()
+    open_breaker(breaker)
+    assert breaker.retry_in() == 10
+
+def test_open_delay_jitter_stays_within_half_to_full_delay(clock):
+    for _ in range(20):
+        breaker = CircuitBreaker(failure_threshold=1, open_delay=10)
+        open_breaker(breaker)
+        assert 5 <= breaker.retry_in() <= 10
+
+def test_retry_budget_refuses_once_drained():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    assert (budget.allowed, budget.denied) == (2, 1)
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+def test_retry_budget_never_holds_more_than_the_reserve():
+    budget = RetryBudget(ratio=1, reserve=2)
+    for _ in range(5):
+        budget.deposit()
+    assert budget.tokens == 2
+
+def test_call_retries_failures_until_one_succeeds(clock):
+    health = ControllerHealth(failure_threshold=5, max_retries=2)
+    results = iter([None, None, {'ok': True}])
+    result = health.call("http://controller", lambda timeout_left: next(results),
+                         lambda status: "No status" if status is None else None, timeout=5)
+    assert result == {'ok': True}
+    assert health.breaker("http://controller").state == CLOSED
+    assert health.budget.allowed == 2
+
+def test_call_does_not_retry_results_that_are_not_retryable(clock):
+    health = ControllerHealth(failure_threshold=5, max_retries=2)
+    attempts = []
+
+    def attempt(timeout_left):
+        attempts.append(timeout_left)
+        return {'success': False, 'error': "Read timed out", 'no_answer': True}
+
+    result = health.call("http://controller", attempt, lambda result: result['error'], timeout=5,
+                         retryable=lambda result: bool(result.get('unreachable')))
+    assert result['no_answer']
+    assert len(attempts) == 1
+    assert health.breaker("http://controller").failures == 1
+
+def test_call_skips_an_open_circuit(clock):
+    health = ControllerHealth(failure_threshold=1, max_retries=0)
+    health.call("http://controller", lambda timeout_left: None, lambda status: "No status", timeout=5)
+    with pytest.raises(CircuitOpen):
+        health.call("http://controller", lambda timeout_left: {}, lambda status: None, timeout=5)
@@ -0,0 +1,106 @@
+"""Event-driven remote power monitoring in GPIOController, driven through FakePinEvents"""
+
+import threading
+import time
+
+from shared import GPIOController, FakePinEvents, PinEvents, PinEventsUnavailable
+
+POWER_PIN = 4
+BUTTON_PINS = {"Up": 21, "Stop": 24, "Down": 16, "Channel Up": 12, "Channel Down": 25}
+
+def make_controller():
+    return GPIOController(POWER_PIN, BUTTON_PINS, test_mode=True)
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+class UnwatchablePinEvents(PinEvents):
+    """A backend that can't report edges for the power pin (like RPi.GPIO on an output pin)"""
+
+    name = "unwatchable"
+
+    def watch(self, pin, callback):
+        raise PinEventsUnavailable(f"{self.name} can't watch pin {pin}")
+
+class BrokenPinEvents(PinEvents):
+    """A backend whose edge detection fails to set up at all"""
+
+    name = "broken"
+
+    def watch(self, pin, callback):
+        raise RuntimeError("edge detection failed")
+
+def test_edge_wakes_monitor():
+    controller = make_controller()
+    pin_events = FakePinEvents()
+    seen = []
+    monitored = threading.Event()
+
+    def on_change(gpio):
+        seen.append(gpio.remote_on)
+        monitored.set()
+
+    controller.start_monitoring(on_change, mode="event", pin_events=pin_events, reconcile_interval=60)
+    assert controller.monitoring_mode == "event"
+    assert pin_events.watched_pins == [POWER_PIN]
+
+    pin_events.set_level(POWER_PIN, True)
+    # The edge is handled long before the 60 s reconcile would have noticed it
+    assert monitored.wait(2)
+    assert controller.remote_on is True
+
+    monitored.clear()
+    pin_events.set_level(POWER_PIN, False)
+    assert monitored.wait(2)
+    assert controller.remote_on is False
+    assert seen == [True, False]
+
+def test_repeated_level_is_not_a_change():
+    controller = make_controller()
+    pin_events = FakePinEvents()
+    seen = []
+    monitored = threading.Event()
+
+    def on_change(gpio):
+        seen.append(gpio.remote_on)
+        monitored.set()
+
+    controller.start_monitoring(on_change, mode="event", pin_events=pin_events, reconcile_interval=60)
+    pin_events.set_level(POWER_PIN, True)
+    assert monitored.wait(2)
+
+    monitored.clear()
+    controller._on_power_edge(True)
+    assert not monitored.wait(0.2)
+    assert seen == [True]
+
+def test_unwatchable_pin_is_caught_by_reconcile_reads():
+    controller = make_controller()
+    level = {'on': False}
+    # Pretend the pin can be read, so the reconcile pass reads it instead of skipping it in test mode
+    controller.test_mode = False
+    controller.check_remote_power_state = lambda: level['on']
+    seen = []
+
+    controller.start_monitoring(lambda gpio: seen.append(gpio.remote_on), mode="auto",
+                                pin_events=UnwatchablePinEvents(), reconcile_interval=0.05)
+    # Without edges the monitor still runs in event mode and falls back to re-reading the pin
+    assert controller.monitoring_mode == "event"
+
+    level['on'] = True
+    assert wait_until(lambda: seen == [True])
+    assert controller.remote_on is True
+
+def test_auto_mode_falls_back_to_polling_when_backend_fails():
+    controller = make_controller()
+    monitored = threading.Event()
+
+    controller.start_monitoring(lambda gpio: monitored.set(), mode="auto", pin_events=BrokenPinEvents())
+    assert controller.monitoring_mode == "poll"
+    # The polling loop runs the callback straight away, then once a second
+    assert monitored.wait(2)
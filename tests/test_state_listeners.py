@@ -0,0 +1,55 @@
+"""GPIOController state listeners, which feed the controller page's live updates"""
+
+from shared import GPIOController, FakePinEvents
+
+POWER_PIN = 4
+BUTTON_PINS = {"Up": 21, "Stop": 24, "Down": 16, "Channel Up": 12, "Channel Down": 25}
+
+def make_controller():
+    return GPIOController(POWER_PIN, BUTTON_PINS, test_mode=True)
+
+def test_power_edges_notify_listeners():
+    controller = make_controller()
+    pin_events = FakePinEvents()
+    notified = []
+    controller.add_state_listener(lambda gpio: notified.append(gpio.remote_on))
+    controller.start_monitoring(mode="event", pin_events=pin_events, reconcile_interval=60)
+
+    pin_events.set_level(POWER_PIN, True)
+    pin_events.set_level(POWER_PIN, False)
+    assert notified == [True, False]
+
+def test_repeated_level_does_not_notify():
+    controller = make_controller()
+    pin_events = FakePinEvents()
+    notified = []
+    controller.add_state_listener(lambda gpio: notified.append(gpio.remote_on))
+    controller.start_monitoring(mode="event", pin_events=pin_events, reconcile_interval=60)
+
+    pin_events.set_level(POWER_PIN, True)
+    controller._on_power_edge(True)
+    assert notified == [True]
+
+def test_channel_selection_notifies_progress_and_channel():
+    controller = make_controller()
+    notified = []
+    controller.add_state_listener(
+        lambda gpio: notified.append((gpio.channel_status, gpio.channel_selection_in_progress)))
+
+    controller.select_channel(3, wait=True)
+    assert notified[0][1] is True
+    assert ("Channel 3", True) in notified
+    assert notified[-1] == ("Channel 3", False)
+
+def test_failing_listener_does_not_stop_the_others():
+    controller = make_controller()
+    notified = []
+
+    def broken(gpio):
+        raise RuntimeError("listener failed")
+
+    controller.add_state_listener(broken)
+    controller.add_state_listener(lambda gpio: notified.append(gpio.remote_on))
+    controller._on_power_edge(True)
+    assert controller.remote_on is True
+    assert notified == [True]
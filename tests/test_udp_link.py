@@ -0,0 +1,196 @@
+"""The signed UDP link, with a hub and a controller end talking over 127.0.0.1"""
+
+import hashlib
+import hmac
+import struct
+import threading
+import time
+
+import pytest
+
+from shared.udp_link import (ACCEPTED, ACK, COMMAND, HEADER, MAC_SIZE, MAGIC, PROTOCOL_VERSION, RESULT, BadPacket,
+                             UdpResponder, UdpTransport, decode_command, decode_digest, encode_command,
+                             encode_digest)
+
+SECRET = "testsecret"
+URL = "http://127.0.0.1:5000"
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+class Controller:
+    """A UdpResponder on an ephemeral port that records the commands it runs"""
+
+    def __init__(self, secret=SECRET, refuse=None, **options):
+        self.commands = []
+        self.refuse = refuse
+        self.status = {'remote_on': True, 'blinds_lowered': False, 'channel_selection_in_progress': False,
+                       'standalone_mode': False, 'version': 'abc-1'}
+        self.responder = UdpResponder(secret, 0, self.on_command, lambda: self.status, lambda: None, **options)
+        self.port = self.responder.sock.getsockname()[1]
+
+    def on_command(self, command, params, finish):
+        if self.refuse:
+            return self.refuse
+        self.commands.append((command, params))
+        finish({'success': True})
+        return None
+
+@pytest.fixture
+def controller():
+    controller = Controller(retransmit=0.05)
+    controller.responder.start()
+    yield controller
+    controller.responder.sock.close()
+
+@pytest.fixture
+def hub():
+    transport = UdpTransport(SECRET, retransmit=0.05, max_retransmits=3)
+    transport.start()
+    yield transport
+    transport.sock.close()
+
+@pytest.fixture
+def raw():
+    """An endpoint that is never started: its socket and signing are driven by hand"""
+    endpoint = UdpTransport(SECRET)
+    endpoint.sock.settimeout(2)
+    yield endpoint
+    endpoint.sock.close()
+
+def receive(endpoint):
+    data, address = endpoint.sock.recvfrom(1024)
+    return endpoint._unpack(data)
+
+@pytest.mark.parametrize("command, params", [
+    ('lower_blinds', {}),
+    ('raise_blinds', {}),
+    ('stop_blinds', {}),
+    ('toggle_remote', {}),
+    ('select_all_channels', {}),
+    ('resync_channel', {}),
+    ('select_channel', {'channel': 12}),
+    ('sweep', {'action': 'raise_blinds', 'channels': [3, 1, 16]}),
+    ('sweep', {'action': 'stop_blinds', 'channels': []}),
+])
+def test_command_round_trip(command, params):
+    assert decode_command(encode_command(command, params)) == (command, params)
+
+@pytest.mark.parametrize("command, params", [
+    ('pair', {}),
+    ('select_channel', {}),
+    ('select_channel', {'channel': 300}),
+    ('sweep', {'action': 'pair', 'channels': [1]}),
+    ('sweep', {'action': 'lower_blinds', 'channels': [1, 'two']}),
+])
+def test_commands_without_a_compact_form(command, params):
+    assert encode_command(command, params) is None
+
+@pytest.mark.parametrize("payload", [b'', b'\xff', b'\x07', b'\x07\x01\x02', b'\x08'])
+def test_malformed_commands_are_refused(payload):
+    with pytest.raises(BadPacket):
+        decode_command(payload)
+
+def test_digest_round_trip():
+    status = {'remote_on': True, 'blinds_lowered': False, 'channel_selection_in_progress': True,
+              'standalone_mode': False, 'version': 'a1b2c3d4-17'}
+    assert decode_digest(encode_digest(status)) == status
+    assert decode_digest(b'\x00') == {'remote_on': False, 'blinds_lowered': False,
+                                      'channel_selection_in_progress': False, 'standalone_mode': False,
+                                      'version': ''}
+    with pytest.raises(BadPacket):
+        decode_digest(b'')
+
+def test_command_and_heartbeat(controller, hub):
+    result = hub.command(URL, '127.0.0.1', controller.port, 'select_channel', {'channel': 4}, timeout=2)
+    assert result == {'success': True, 'error': None}
+    assert controller.commands == [('select_channel', {'channel': 4})]
+
+    assert hub.heartbeat(URL, '127.0.0.1', controller.port, timeout=2) == controller.status
+
+def test_refused_command(hub):
+    controller = Controller(refuse="Remote is busy")
+    controller.responder.start()
+    try:
+        result = hub.command(URL, '127.0.0.1', controller.port, 'lower_blinds', timeout=2)
+    finally:
+        controller.responder.sock.close()
+    assert result == {'success': False, 'error': "Remote is busy"}
+    assert not result.get('unreachable')
+
+def test_wrong_secret_is_rejected(controller):
+    intruder = UdpTransport("not the secret", retransmit=0.05, max_retransmits=2)
+    intruder.start()
+    try:
+        result = intruder.command(URL, '127.0.0.1', controller.port, 'lower_blinds', timeout=1)
+    finally:
+        intruder.sock.close()
+    assert result['unreachable']
+    assert controller.commands == []
+    assert wait_until(lambda: controller.responder.stats['rejected'] == 3)
+
+def test_stale_packet_is_rejected(controller, raw):
+    packet = HEADER.pack(MAGIC, PROTOCOL_VERSION, COMMAND, 1, int(time.time()) - 600) + encode_command('lower_blinds')
+    packet += hmac.new(SECRET.encode(), packet, hashlib.sha256).digest()[:MAC_SIZE]
+    raw.sock.sendto(packet, ('127.0.0.1', controller.port))
+
+    assert wait_until(lambda: controller.responder.stats['rejected'] == 1)
+    assert controller.commands == []
+    with pytest.raises(BadPacket, match="Stale"):
+        controller.responder._unpack(packet)
+
+def test_replayed_command_runs_once(controller, raw):
+    packet = raw._pack(COMMAND, 7, encode_command('lower_blinds'))
+    raw.sock.sendto(packet, ('127.0.0.1', controller.port))
+    first = receive(raw)
+    raw.sock.sendto(packet, ('127.0.0.1', controller.port))
+
+    # The RESULT and the repeated ACK arrive in either order
+    answers = [receive(raw), receive(raw)]
+    acks = [answer for answer in [first] + answers if answer[0] == ACK]
+    assert len(acks) == 2
+    assert acks[0][2] == acks[1][2] == struct.pack('!IB', 7, ACCEPTED)
+    assert controller.commands == [('lower_blinds', {})]
+    assert controller.responder.stats['duplicates'] == 1
+
+def test_seen_packets_are_pruned(controller, raw):
+    responder = controller.responder
+    old = raw._pack(COMMAND, 1, encode_command('stop_blinds'))
+    raw.sock.sendto(old, ('127.0.0.1', controller.port))
+    assert wait_until(lambda: controller.commands)
+    old_mac = old[-MAC_SIZE:]
+    with responder._lock:
+        responder._seen[old_mac][0] -= 3 * responder.max_skew
+        responder._last_prune -= 11
+
+    new = raw._pack(COMMAND, 2, encode_command('stop_blinds'))
+    raw.sock.sendto(new, ('127.0.0.1', controller.port))
+    assert wait_until(lambda: len(controller.commands) == 2)
+    with responder._lock:
+        assert old_mac not in responder._seen
+        assert new[-MAC_SIZE:] in responder._seen
+
+def test_result_arriving_before_the_ack(hub, raw):
+    """A controller that finishes so quickly its RESULT overtakes the acknowledgement"""
+    port = raw.sock.getsockname()[1]
+    answers = []
+
+    def serve():
+        data, address = raw.sock.recvfrom(1024)
+        kind, seq, payload, mac = raw._unpack(data)
+        answers.append((kind, decode_command(payload)))
+        raw.sock.sendto(raw._pack(RESULT, 100, struct.pack('!IB', seq, 1)), address)
+        # The hub acknowledges the RESULT
+        answers.append(receive(raw)[0])
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    result = hub.command(URL, '127.0.0.1', port, 'raise_blinds', timeout=2)
+    thread.join(2)
+    assert result == {'success': True, 'error': None}
+    assert answers == [(COMMAND, ('raise_blinds', {})), ACK]
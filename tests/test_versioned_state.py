@@ -0,0 +1,45 @@
+"""VersionedState, and the GPIOController state the hub's conditional polls are answered from"""
+
+from shared import GPIOController, FakePinEvents
+from shared.versioned_state import VersionedState
+
+POWER_PIN = 4
+BUTTON_PINS = {"Up": 21, "Stop": 24, "Down": 16, "Channel Up": 12, "Channel Down": 25}
+
+def test_version_moves_only_on_real_changes():
+    state = VersionedState(remote_on=False, channel_status="All Channels")
+    version = state.version
+    assert state.update(remote_on=False) is False
+    assert state.version == version
+
+    assert state.update(remote_on=True, channel_status="All Channels") is True
+    assert state.version != version
+    assert state.snapshot() == (state.version, {'remote_on': True, 'channel_status': "All Channels"})
+
+def test_changes_since_returns_only_the_changed_fields():
+    state = VersionedState(remote_on=False, channel_status="All Channels")
+    version = state.version
+    state.update(channel_status="Channel 2")
+    current, changes = state.changes_since(version)
+    assert current == state.version
+    assert changes == {'channel_status': "Channel 2"}
+    assert state.changes_since(current) == (current, {})
+
+def test_changes_since_refuses_versions_that_are_not_ours():
+    state = VersionedState(remote_on=False)
+    other = VersionedState(remote_on=False)
+    other.update(remote_on=True)
+    for version in (other.version, f"{state.epoch}-99", "garbage", None):
+        assert state.changes_since(version) == (state.version, None)
+
+def test_power_edges_update_the_controller_state():
+    controller = GPIOController(POWER_PIN, BUTTON_PINS, test_mode=True)
+    pin_events = FakePinEvents()
+    controller.start_monitoring(mode="event", pin_events=pin_events, reconcile_interval=60)
+
+    pin_events.set_level(POWER_PIN, True)
+    version, fields = controller.state.snapshot()
+    assert fields['remote_on'] is True
+
+    controller._on_power_edge(True)
+    assert controller.state.version == version
@@ -0,0 +1,64 @@
+"""Measure requests/s and latency percentiles of a hub or controller URL.
+
+Usage: python3 tools/http_benchmark.py URL [--clients 16] [--duration 10] [--header 'If-None-Match: "..."']
+
+Each client is a thread with its own keep-alive session, issuing requests
+back to back for the whole duration.
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+def run_client(url, headers, deadline, latencies, errors):
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            response = session.get(url, headers=headers, timeout=10)
+            response.content
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except requests.RequestException as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.monotonic() - start)
+
+def percentile(values, fraction):
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run')
+    parser.add_argument('--header', action='append', default=[], help="extra request header, 'Name: value'")
+    args = parser.parse_args()
+
+    headers = dict(header.split(': ', 1) for header in args.header)
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=run_client, args=(args.url, headers, deadline, latencies, errors))
+               for _ in range(args.clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    if not latencies:
+        print(f"No successful requests ({len(errors)} errors)")
+        return
+    print(f"{args.url}: {args.clients} clients, {elapsed:.1f}s")
+    print(f"  requests/s: {len(latencies) / elapsed:.0f}  errors: {len(errors)}")
+    print(f"  latency ms: p50 {percentile(latencies, 0.5) * 1000:.1f}  "
+          f"p90 {percentile(latencies, 0.9) * 1000:.1f}  p99 {percentile(latencies, 0.99) * 1000:.1f}  "
+          f"max {latencies[-1] * 1000:.1f}")
+
+if __name__ == '__main__':
+    main()